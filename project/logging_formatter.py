@@ -4,7 +4,11 @@ import logging
 
 class JsonLogFormatter(logging.Formatter):
     def format(self, record):
-        return json.dumps({
+        _log_json = {
             'severity': record.levelname,
             'message': super().format(record),
-        })
+        }
+        _metrics = getattr(record, 'metrics', None)  # e.g. `logger.info(..., extra={'metrics': {...}})`
+        if _metrics:
+            _log_json['metrics'] = _metrics
+        return json.dumps(_log_json)
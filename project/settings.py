@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/1.9/ref/settings/
 """
 
+import json
 import os
 
 from celery.schedules import crontab
@@ -303,12 +304,64 @@ ELASTICSEARCH = {
     'CHUNK_SIZE': int(os.environ.get('ELASTICSEARCH_CHUNK_SIZE', 2000)),
     'MAX_RETRIES': int(os.environ.get('ELASTICSEARCH_MAX_RETRIES', 7)),
     'POST_INDEX_DELAY': int(os.environ.get('ELASTICSEARCH_POST_INDEX_DELAY', 3)),
+    'SCRAP_DELETE_INTERVAL': float(os.environ.get('ELASTICSEARCH_SCRAP_DELETE_INTERVAL', 10)),  # seconds between collected scrap deletes
+    'SCRAP_DELETE_BATCH_SIZE': int(os.environ.get('ELASTICSEARCH_SCRAP_DELETE_BATCH_SIZE', 10000)),  # targets per delete-by-query
+    'MESSAGEQUEUE_SHARD_COUNT': int(os.environ.get('ELASTICSEARCH_MESSAGEQUEUE_SHARD_COUNT', 1)),  # (see `shtrove_indexer_run --processes`)
+    'MAX_IDS_PER_MESSAGE': int(os.environ.get('ELASTICSEARCH_MAX_IDS_PER_MESSAGE', 1000)),  # target ids packed in each queued message
+    'MAX_MESSAGE_ATTEMPTS': int(os.environ.get('ELASTICSEARCH_MAX_MESSAGE_ATTEMPTS', 3)),  # for target ids that fail (in packed messages)
+    'BACKFILL_PARTITION_COUNT': int(os.environ.get('ELASTICSEARCH_BACKFILL_PARTITION_COUNT', 8)),  # target pk ranges, scheduled in parallel
+    'BACKFILL_QUEUE_HIGH_WATER': int(os.environ.get('ELASTICSEARCH_BACKFILL_QUEUE_HIGH_WATER', 100)),  # queued messages (all shards, all partitions) before backfill scheduling pauses
+    'BACKFILL_PAUSE_SECONDS': float(os.environ.get('ELASTICSEARCH_BACKFILL_PAUSE_SECONDS', 30)),  # before paused backfill scheduling continues
+    'BULK_LOAD_WAIT_FOR_STATUS': os.environ.get('ELASTICSEARCH_BULK_LOAD_WAIT_FOR_STATUS', 'green'),  # after backfill (may be 'yellow' for a single-node cluster)
+    'BULK_LOAD_WAIT_SECONDS': int(os.environ.get('ELASTICSEARCH_BULK_LOAD_WAIT_SECONDS', 60)),
+    'MAX_IN_FLIGHT_CHUNKS': int(os.environ.get('ELASTICSEARCH_MAX_IN_FLIGHT_CHUNKS', 2)),  # per message type, per daemon
+    'SKIP_UNCHANGED_DOCS': bool(os.environ.get('ELASTICSEARCH_SKIP_UNCHANGED_DOCS')),  # by sourcehash (for strategies that allow)
+    'HTTP_COMPRESS': bool(os.environ.get('ELASTICSEARCH_HTTP_COMPRESS')),  # gzip request bodies (bulk bodies compress well)
+    'SERIALIZER': os.environ.get('ELASTICSEARCH_SERIALIZER', 'json'),  # 'json' or 'orjson' (opt-in; falls back to 'json' without `orjson`)
+    'CONNECTIONS_PER_NODE': int(os.environ.get('ELASTICSEARCH_CONNECTIONS_PER_NODE', 10)),  # per process, shared by its threads (e.g. daemon chunks in flight)
+    'VALUESEARCH_CARD_PREFILTER_MAX': int(os.environ.get('ELASTICSEARCH_VALUESEARCH_CARD_PREFILTER_MAX', 10000)),  # cards matching cardSearchText before a valuesearch is refused
+}
+INDEXER_CHUNK_RATE = {  # adaptive (AIMD) chunk sizing for the indexer daemon (see share.search.chunk_rate)
+    'MIN_CHUNK_SIZE': int(os.environ.get('INDEXER_CHUNK_RATE_MIN_CHUNK_SIZE', 100)),
+    'MAX_CHUNK_SIZE': ELASTICSEARCH['CHUNK_SIZE'],
+    'MIN_IN_FLIGHT_CHUNKS': int(os.environ.get('INDEXER_CHUNK_RATE_MIN_IN_FLIGHT_CHUNKS', 1)),
+    'MAX_IN_FLIGHT_CHUNKS': ELASTICSEARCH['MAX_IN_FLIGHT_CHUNKS'],
+    'INCREASE_STEP': int(os.environ.get('INDEXER_CHUNK_RATE_INCREASE_STEP', 100)),  # chunk size added after a healthy chunk
+    'DECREASE_FACTOR': float(os.environ.get('INDEXER_CHUNK_RATE_DECREASE_FACTOR', 0.5)),  # multiplied after rejections or a slow chunk
+    'TARGET_SECONDS_PER_CHUNK': float(os.environ.get('INDEXER_CHUNK_RATE_TARGET_SECONDS_PER_CHUNK', 20)),
+    'REPORT_SECONDS': float(os.environ.get('INDEXER_CHUNK_RATE_REPORT_SECONDS', 30)),  # how often to save status (for admin)
+    # overrides by strategy name, e.g. '{"trovesearch_denorm": {"MAX_CHUNK_SIZE": 500}}'
+    'BY_STRATEGY': json.loads(os.environ.get('INDEXER_CHUNK_RATE_BY_STRATEGY') or '{}'),
+}
+INDEX_MESSENGER_BUFFER = {
+    'ENABLED': bool(os.environ.get('INDEX_MESSENGER_BUFFER_ENABLED')),  # opt-in: coalesce index messages across worker tasks (acked before published; lost if a worker is killed)
+    'MAX_SIZE': int(os.environ.get('INDEX_MESSENGER_BUFFER_MAX_SIZE', 2000)),  # target ids (flush when reached)
+    'MAX_SECONDS': float(os.environ.get('INDEX_MESSENGER_BUFFER_MAX_SECONDS', 5)),  # (flush when reached)
 }
 ELASTICSEARCH8_URL = os.environ.get('ELASTICSEARCH8_URL')
 ELASTICSEARCH8_CERT_PATH = os.environ.get('ELASTICSEARCH8_CERT_PATH')
 ELASTICSEARCH8_USERNAME = os.environ.get('ELASTICSEARCH8_USERNAME', 'elastic')
 ELASTICSEARCH8_SECRET = os.environ.get('ELASTICSEARCH8_SECRET')
 
+DIGESTIVE_TRACT = {
+    'MAX_BATCH_SIZE': int(os.environ.get('DIGESTIVE_TRACT_MAX_BATCH_SIZE', 1000)),  # records per batch-ingest request
+    'DERIVE_CHUNK_SIZE': int(os.environ.get('DIGESTIVE_TRACT_DERIVE_CHUNK_SIZE', 100)),  # indexcards per derive task
+    'MAX_STAGED_RECORD_SIZE': int(os.environ.get('DIGESTIVE_TRACT_MAX_STAGED_RECORD_SIZE', 2621440)),  # bytes per async-ingest record
+    'STAGED_RECORD_KEEP_DAYS': int(os.environ.get('DIGESTIVE_TRACT_STAGED_RECORD_KEEP_DAYS', 7)),  # async-ingest status kept (then forgotten, with expired data)
+    'EXPEL_CHUNK_SIZE': int(os.environ.get('DIGESTIVE_TRACT_EXPEL_CHUNK_SIZE', 1000)),  # indexcards per bulk expiration
+}
+
+PARSED_TURTLE_CACHE = {
+    'MAX_BYTES': int(os.environ.get('PARSED_TURTLE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),  # in-process, per worker
+    'SHARED_CACHE_ALIAS': os.environ.get('PARSED_TURTLE_CACHE_SHARED_ALIAS'),  # optional second tier (a key in CACHES)
+}
+
+CONTENT_BLOB_STORE = {
+    'ENABLED': not os.environ.get('CONTENT_BLOB_STORE_DISABLED'),  # store turtle and derived text by checksum (else inline)
+    'CODEC': os.environ.get('CONTENT_BLOB_STORE_CODEC', 'zlib'),  # "zlib" or "zstd" (opt-in; needs `zstandard` on every host)
+    'BACKFILL_CHUNK_SIZE': int(os.environ.get('CONTENT_BLOB_STORE_BACKFILL_CHUNK_SIZE', 500)),  # rows per backfill query
+}
+
 # Seconds, not an actual celery settings
 CELERY_RETRY_BACKOFF_BASE = int(os.environ.get('CELERY_RETRY_BACKOFF_BASE', 2 if DEBUG else 10))
 
@@ -334,6 +387,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'trove.digestive_tract.task__expel_expired_data',
         'schedule': crontab(hour=0, minute=0),  # every day at midnight UTC
     },
+    'Delete iri-value scraps': {
+        'task': 'share.search.index_strategy.trovesearch_denorm.task__delete_pending_iri_value_scraps',
+        'schedule': ELASTICSEARCH['SCRAP_DELETE_INTERVAL'],
+    },
 }
 
 CELERY_RESULT_BACKEND = 'share.celery:CeleryDatabaseBackend'
@@ -365,6 +422,8 @@ CELERY_TASK_DEFAULT_ROUTING_KEY = 'share_default'
 
 URGENT_TASK_QUEUES = {
     'trove.digestive_tract.task__derive': 'digestive_tract.urgent',
+    'trove.digestive_tract.task__derive_chunk': 'digestive_tract.urgent',
+    'trove.digestive_tract.task__ingest_staged_record': 'digestive_tract.urgent',
 }
 
 
@@ -1,11 +1,14 @@
+import datetime
 import logging
 
 from django.http.response import HttpResponseRedirect, JsonResponse
 from django.template.response import TemplateResponse
 from django.urls import reverse
+from django.utils import timezone
 
 from share.admin.util import admin_url
-from share.models.index_backfill import IndexBackfill
+from share.models.index_backfill import IndexBackfill, IndexBackfillPartition
+from share.models.indexer_daemon_status import IndexerDaemonStatus
 from share.search.index_messenger import IndexMessenger
 from share.search.index_strategy import (
     IndexStrategy,
@@ -61,6 +64,15 @@ def _index_status_by_strategy():
             .filter(index_strategy_name__in=all_strategy_names())
         )
     }
+    _daemons_by_strategy_name: dict[str, list[dict]] = {}
+    for _daemon_status in IndexerDaemonStatus.objects.recent().order_by('daemon_name', 'message_type'):
+        _daemons_by_strategy_name.setdefault(_daemon_status.index_strategy_name, []).append({
+            'daemon_name': _daemon_status.daemon_name,
+            'message_type': _daemon_status.message_type,
+            'chunk_rate': _daemon_status.chunk_rate,
+            'parsed_turtle_cache': _daemon_status.parsed_turtle_cache,
+            'modified': _daemon_status.modified,
+        })
     status_by_strategy = {}
     _messenger = IndexMessenger()
     for _index_strategy in each_strategy():
@@ -76,11 +88,9 @@ def _index_status_by_strategy():
                     'name': _queue_name,
                     **_messenger.get_queue_stats(_queue_name),
                 }
-                for _queue_name in (
-                    _index_strategy.urgent_messagequeue_name,
-                    _index_strategy.nonurgent_messagequeue_name,
-                )
+                for _queue_name in _messenger.each_messagequeue_name(_index_strategy)
             ],
+            'daemons': _daemons_by_strategy_name.get(_index_strategy.strategy_name, []),
         }
     return status_by_strategy
 
@@ -95,12 +105,54 @@ def _serialize_backfill(
         return {
             'can_start_backfill': strategy.pls_check_exists(),
         }
+    _partitions = list(backfill.partitions.order_by('partition_index'))
     return {
         'backfill_status': backfill.backfill_status,
         'backfill_admin_url': admin_url(backfill),
         'can_start_backfill': (backfill.backfill_status == IndexBackfill.INITIAL),
         'can_mark_backfill_complete': (backfill.backfill_status == IndexBackfill.INDEXING),
         'is_complete': (backfill.backfill_status == IndexBackfill.COMPLETE),
+        'can_retry_partitions': (
+            backfill.backfill_status == IndexBackfill.SCHEDULING
+            and any(_partition.error_message for _partition in _partitions)
+        ),
+        'progress': _serialize_progress(_partitions),
+        'partitions': [
+            {
+                'partition_index': _partition.partition_index,
+                'start_pk': _partition.start_pk,
+                'end_pk': _partition.end_pk,
+                'last_scheduled_pk': _partition.last_scheduled_pk,
+                'is_scheduled': _partition.is_scheduled,
+                'error_message': _partition.error_message,
+                **_serialize_progress([_partition]),
+            }
+            for _partition in _partitions
+        ],
+    }
+
+
+def _serialize_progress(partitions: list[IndexBackfillPartition]):
+    # eta from the rate of acks from indexer daemons (since the backfill was split)
+    _target_count = sum(_partition.target_count for _partition in partitions)
+    _indexed_count = sum(_partition.indexed_count for _partition in partitions)
+    _error_count = sum(_partition.error_count for _partition in partitions)
+    _remaining_count = max(0, _target_count - _indexed_count)
+    _eta = None
+    if partitions and _remaining_count and (_indexed_count or _error_count):
+        _seconds = (timezone.now() - min(_partition.created for _partition in partitions)).total_seconds()
+        _eta = datetime.timedelta(seconds=round(_remaining_count * _seconds / (_indexed_count + _error_count)))
+    return {
+        'target_count': _target_count,
+        'scheduled_count': sum(_partition.scheduled_count for _partition in partitions),
+        'indexed_count': _indexed_count,
+        'error_count': _error_count,
+        'percent_indexed': (
+            round(100 * min(_indexed_count, _target_count) / _target_count, 1)
+            if _target_count
+            else None
+        ),
+        'eta': _eta,
     }
 
 
@@ -126,6 +178,10 @@ def _pls_mark_backfill_complete(index_strategy: IndexStrategy, request_kwargs):
     index_strategy.pls_mark_backfill_complete()
 
 
+def _pls_retry_backfill_partitions(index_strategy: IndexStrategy, request_kwargs):
+    index_strategy.get_or_create_backfill().pls_retry_partitions()
+
+
 def _pls_make_default_for_searching(index_strategy: IndexStrategy, request_kwargs):
     index_strategy.pls_make_default_for_searching()
 
@@ -140,6 +196,7 @@ PLS_DOERS = {
     'start_keeping_live': _pls_start_keeping_live,
     'start_backfill': _pls_start_backfill,
     'mark_backfill_complete': _pls_mark_backfill_complete,
+    'retry_backfill_partitions': _pls_retry_backfill_partitions,
     'make_default_for_searching': _pls_make_default_for_searching,
     'stop_keeping_live': _pls_stop_keeping_live,
     'delete': _pls_delete,
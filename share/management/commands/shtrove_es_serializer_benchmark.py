@@ -0,0 +1,81 @@
+import gzip
+import itertools
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from elasticsearch8.helpers import expand_action
+
+from share.models.index_backfill import backfill_target_queryset
+from share.search import index_strategy
+from share.search import messages
+from share.search.index_strategy.elastic8 import JSON, ORJSON, OrjsonSerializer, get_es8_serializers
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare elasticsearch transport options on bulk bodies built for a sample of index targets:"
+        " json vs orjson serializer, with and without http compression"
+        " -- bytes on the wire and cpu time, per 1000 docs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strategy", default="trovesearch_denorm", help="Index strategy to build docs for")
+        parser.add_argument("--sample-size", type=int, default=1000, help="Number of (most recent) backfill targets")
+        parser.add_argument("--docs-per-request", type=int, default=500, help="Docs in each bulk body")
+        parser.add_argument("--repeat", type=int, default=3, help="Times to serialize the sample each way")
+
+    def handle(self, *args, strategy, sample_size, docs_per_request, repeat, **options):
+        _index_strategy = index_strategy.get_strategy(strategy)
+        _actions = list(_sample_actions(_index_strategy, sample_size))
+        if not _actions:
+            self.stdout.write('no docs to compare')
+            return
+        self.stdout.write(f'built {len(_actions)} docs')
+        _serializer_names = [JSON, ORJSON] if (OrjsonSerializer is not None) else [JSON]
+        if OrjsonSerializer is None:
+            self.stdout.write(f'({ORJSON} not installed)')
+        _per_thousand = 1000 / len(_actions)
+        for _serializer_name, _compress in itertools.product(_serializer_names, (False, True)):
+            _cpu_seconds = []
+            for _ in range(repeat):
+                _start = time.process_time()
+                _wire_bytes = sum(
+                    len(_bulk_body)
+                    for _bulk_body in _each_bulk_body(_actions, _serializer_name, docs_per_request, _compress)
+                )
+                _cpu_seconds.append(time.process_time() - _start)
+            self.stdout.write(
+                f'{_serializer_name}{"+gzip" if _compress else ""}:'
+                f' {_wire_bytes * _per_thousand / 1024:.1f}KiB on the wire,'
+                f' median {statistics.median(_cpu_seconds) * _per_thousand * 1000:.1f}ms cpu'
+                f' (per 1000 docs)'
+            )
+
+
+def _sample_actions(index_strategy, sample_size: int):
+    _target_ids = (
+        backfill_target_queryset(index_strategy)
+        .order_by('-pk')
+        .values_list('pk', flat=True)
+        [:sample_size]
+    )
+    _messages_chunk = messages.MessagesChunk(index_strategy.backfill_message_type, list(_target_ids))
+    for _actionset in index_strategy.build_elastic_actions(_messages_chunk):
+        for _actions in _actionset.actions_by_subname.values():
+            yield from (_action for _action in _actions if _action['_op_type'] == 'index')
+
+
+def _each_bulk_body(actions, serializer_name: str, docs_per_request: int, compress: bool):
+    # as `elasticsearch8.helpers.streaming_bulk` and the transport would (each line, then each body)
+    _serializers = get_es8_serializers(serializer_name)
+    _json_serializer = _serializers['application/json']
+    _ndjson_serializer = _serializers['application/x-ndjson']
+    for _actions_chunk in itertools.batched(actions, docs_per_request):
+        _lines = []
+        for _action in _actions_chunk:
+            _action_line, _source = expand_action(_action)
+            _lines.append(_json_serializer.dumps(_action_line))
+            _lines.append(_json_serializer.dumps(_source))
+        _bulk_body = _ndjson_serializer.dumps(_lines)
+        yield (gzip.compress(_bulk_body) if compress else _bulk_body)
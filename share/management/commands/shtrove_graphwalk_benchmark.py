@@ -0,0 +1,141 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from primitive_metadata import primitive_rdf as rdf
+
+from share.search.index_strategy import _trovesearch_util as ts
+from trove.vocab.namespaces import DCTERMS, FOAF, OWL, RDF, SKOS
+from trove.vocab.osfmap import OSFMAP
+
+
+class Command(BaseCommand):
+    help = (
+        "Time walking a synthetic project graph (as for trovesearch_denorm iri-value docs):"
+        " a fresh walk from each iri value vs shortwalks from one memoized walk"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--components", type=int, default=50, help="Components per project (or component)")
+        parser.add_argument("--depth", type=int, default=1, help="Levels of nested components")
+        parser.add_argument("--files", type=int, default=50, help="Files per component")
+        parser.add_argument("--people", type=int, default=50, help="Distinct creators, shared across the graph")
+        parser.add_argument("--repeat", type=int, default=5, help="Times to walk the graph each way")
+
+    def handle(self, *args, components, depth, files, people, repeat, **options):
+        _focus_iri, _rdfdoc = project_graph(components=components, depth=depth, files=files, people=people)
+        _triple_count = sum(1 for _ in rdf.iter_tripleset(_rdfdoc.tripledict))
+        self.stdout.write(f'project graph: {_triple_count} triples')
+        for _name, _walk_all in (('fresh', _fresh_walks), ('memoized', _memoized_walks)):
+            _seconds = []
+            for _ in range(repeat):
+                _start = time.perf_counter()
+                _walk_count = _walk_all(_rdfdoc, _focus_iri)
+                _seconds.append(time.perf_counter() - _start)
+            self.stdout.write(
+                f'{_name}: {_walk_count} walks,'
+                f' median {statistics.median(_seconds) * 1000:.1f}ms,'
+                f' max {max(_seconds) * 1000:.1f}ms'
+            )
+
+
+def project_graph(
+    *,
+    components: int,
+    depth: int,
+    files: int,
+    people: int,
+) -> tuple[str, rdf.RdfGraph]:
+    '''a project with nested components, each with files, all with creators from a shared pool
+
+    (shaped like osfmap: people with affiliations, subjects with broader subjects, and
+    parts linking back to their parent -- tho nested parts make cycles, walked the slow way)
+    '''
+    _tripledict: rdf.RdfTripleDictionary = {}
+    _institutions = [f'https://example.test/institution/{_i}' for _i in range(max(1, people // 10))]
+    for _i, _institution_iri in enumerate(_institutions):
+        _tripledict[_institution_iri] = {
+            RDF.type: {FOAF.Organization},
+            FOAF.name: {rdf.literal(f'institution {_i}')},
+            OWL.sameAs: {f'https://ror.example/{_i}'},
+        }
+    _people = [f'https://example.test/person/{_i}' for _i in range(max(1, people))]
+    for _i, _person_iri in enumerate(_people):
+        _tripledict[_person_iri] = {
+            RDF.type: {FOAF.Person},
+            FOAF.name: {rdf.literal(f'person {_i}')},
+            OWL.sameAs: {f'https://orcid.example/{_i}'},
+            OSFMAP.affiliation: {_institutions[_i % len(_institutions)]},
+        }
+    _subjects = [f'https://example.test/subject/{_i}' for _i in range(20)]
+    for _i, _subject_iri in enumerate(_subjects):
+        _tripledict[_subject_iri] = {
+            RDF.type: {SKOS.Concept},
+            SKOS.prefLabel: {rdf.literal(f'subject {_i}')},
+        }
+        if _i:  # a chain of broader subjects
+            _tripledict[_subject_iri][SKOS.broader] = {_subjects[_i - 1]}
+    _counter = iter(range(1_000_000_000))
+
+    def _add_resource(iri, parent_iri, level):
+        _n = next(_counter)
+        _tripledict[iri] = {
+            RDF.type: {OSFMAP.Project if parent_iri is None else OSFMAP.ProjectComponent},
+            DCTERMS.title: {rdf.literal(f'resource {_n}')},
+            DCTERMS.creator: {_people[(_n + _k) % len(_people)] for _k in range(3)},
+            DCTERMS.subject: {_subjects[(_n + _k) % len(_subjects)] for _k in range(2)},
+        }
+        if parent_iri is not None:
+            _tripledict[iri][DCTERMS.isPartOf] = {parent_iri}
+        _file_iris = {f'{iri}/file/{_f}' for _f in range(files)}
+        for _f, _file_iri in enumerate(sorted(_file_iris)):
+            _tripledict[_file_iri] = {
+                RDF.type: {OSFMAP.File},
+                DCTERMS.title: {rdf.literal(f'file {_f}')},
+                DCTERMS.creator: {_people[(_n + _f) % len(_people)]},
+                OSFMAP.isContainedBy: {iri},
+            }
+        if _file_iris:
+            _tripledict[iri][OSFMAP.contains] = _file_iris
+        if level < depth:
+            _part_iris = {f'{iri}/part/{_c}' for _c in range(components)}
+            if _part_iris:
+                _tripledict[iri][DCTERMS.hasPart] = _part_iris
+            for _part_iri in sorted(_part_iris):
+                _add_resource(_part_iri, iri, level + 1)
+
+    _focus_iri = 'https://example.test/project'
+    _add_resource(_focus_iri, None, 0)
+    return _focus_iri, rdf.RdfGraph(_tripledict)
+
+
+def _fresh_walks(rdfdoc, focus_iri) -> int:
+    # a new walk (and memo) from each iri value, with uncached synonyms
+    # (as each iri-value doc used to get)
+    _fullwalk = ts.GraphWalk(rdfdoc, focus_iri)
+    _walks = [
+        _fullwalk,
+        *(
+            ts.GraphWalk(rdfdoc, _iri, already_visiting={focus_iri})
+            for _iri in _fullwalk.paths_by_iri
+        ),
+    ]
+    for _walk in _walks:
+        for _iris in _walk.iri_values.values():
+            ts.suffuniq_iris(ts.iris_synonyms(_iris, rdfdoc))
+    return len(_walks)
+
+
+def _memoized_walks(rdfdoc, focus_iri) -> int:
+    _fullwalk = ts.GraphWalk(rdfdoc, focus_iri)
+    _walks = [
+        _fullwalk,
+        *(
+            _fullwalk.shortwalk_from(_iri)
+            for _iri in _fullwalk.paths_by_iri
+        ),
+    ]
+    for _walk in _walks:
+        for _iris in _walk.iri_values.values():
+            _walk.suffuniq_synonyms(_iris)
+    return len(_walks)
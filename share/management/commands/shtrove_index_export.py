@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from share.search import index_strategy
+from share.search.bulk_files import export_bulk_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Build docs for an index strategy (as a backfill would) and write them to bulk files,"
+        " to load later with shtrove_index_load"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("strategy_name", help="Name of index strategy")
+        parser.add_argument("directory", help="Directory for bulk files (new, or without a manifest)")
+        parser.add_argument("--processes", type=int, default=4, help="Processes building docs (0 for none)")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Targets per chunk (and per file)")
+
+    def handle(self, *args, strategy_name, directory, processes, chunk_size, **options):
+        _strategy = index_strategy.get_strategy(strategy_name)
+        _manifest = export_bulk_files(_strategy, directory, chunk_size=chunk_size, processes=processes)
+        for _subname, _index_info in _manifest['indexes'].items():
+            self.stdout.write(f'{_subname or "(no subname)"}: {_index_info["doc_count"]} docs')
+        self.stdout.write(self.style.SUCCESS(f'exported {_manifest["target_count"]} targets to {directory}'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from share.search import index_strategy
+from share.search.bulk_files import load_bulk_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Load bulk files (from shtrove_index_export) into an index strategy's existing indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("strategy_name", help="Name of index strategy (may include strategy check)")
+        parser.add_argument("directory", help="Directory of exported bulk files")
+        parser.add_argument("--threads", type=int, default=4, help="Bulk requests in parallel")
+        parser.add_argument("--docs-per-request", type=int, default=500, help="Docs per bulk request")
+        parser.add_argument("--force", action="store_true", help="Load even if mappings changed since export")
+
+    def handle(self, *args, strategy_name, directory, threads, docs_per_request, force, **options):
+        _strategy = index_strategy.parse_strategy_name(strategy_name)
+        _counts_by_subname = load_bulk_files(
+            _strategy,
+            directory,
+            docs_per_request=docs_per_request,
+            threads=threads,
+            force=force,
+        )
+        for _subname, _counts in _counts_by_subname.items():
+            self.stdout.write(f'{_subname or "(no subname)"}: {dict(_counts)}')
@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test.utils import CaptureQueriesContext
+
+from trove import models as trove_db
+from trove.models import resource_description
+from trove.vocab.namespaces import TROVE
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare loading a chunk of index-cards for trovesearch indexing:"
+        " from descriptions (as before) vs from the IndexableCard projection"
+        " -- queries and latency, including parsing turtle (with supplements)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Number of (most recent) index-cards")
+        parser.add_argument("--repeat", type=int, default=5, help="Times to load the chunk each way")
+        parser.add_argument("--cold", action="store_true", help="Clear the (in-process) parsed-turtle cache before each load")
+
+    def handle(self, *args, chunk_size, repeat, cold, **options):
+        _indexcard_pks = list(
+            trove_db.Indexcard.objects
+            .filter(deleted__isnull=True)
+            .order_by('-pk')
+            .values_list('pk', flat=True)
+            [:chunk_size]
+        )
+        trove_db.IndexableCard.objects.refresh_for_indexcard_ids(_indexcard_pks)  # (in case not yet)
+        for _name, _load_chunk in (('descriptions', _load_from_descriptions), ('projection', _load_from_projection)):
+            _seconds = []
+            for _ in range(repeat):
+                if cold:
+                    resource_description.PARSED_TURTLE_CACHE.clear()
+                with CaptureQueriesContext(connection) as _queries:
+                    _start = time.perf_counter()
+                    _card_count = _load_chunk(_indexcard_pks)
+                    _seconds.append(time.perf_counter() - _start)
+            self.stdout.write(
+                f'{_name}: {_card_count} cards, {len(_queries)} queries,'
+                f' median {statistics.median(_seconds) * 1000:.1f}ms,'
+                f' max {max(_seconds) * 1000:.1f}ms'
+            )
+
+
+def _load_from_descriptions(indexcard_pks) -> int:
+    # (as trovesearch indexing loaded each chunk before `IndexableCard`)
+    _resource_descriptions = (
+        trove_db.LatestResourceDescription.objects
+        .filter(indexcard_id__in=indexcard_pks)
+        .filter(Exists(
+            trove_db.DerivedIndexcard.objects
+            .filter(upriver_indexcard_id=OuterRef('indexcard_id'))
+            .filter(deriver_identifier__in=(
+                trove_db.ResourceIdentifier.objects
+                .queryset_for_iri(TROVE['derive/osfmap_json'])
+            ))
+        ))
+        .exclude(indexcard__deleted__isnull=False)
+        .select_related('indexcard__source_record_suid__source_config')
+        .prefetch_related('indexcard__focus_identifier_set')
+        .prefetch_related('indexcard__supplementary_description_set')
+    )
+    _card_count = 0
+    for _resource_description in _resource_descriptions:
+        if not _resource_description.indexcard.source_record_suid.has_forecompat_replacement():
+            _resource_description.as_rdfdoc_with_supplements()
+            _card_count += 1
+    return _card_count
+
+
+def _load_from_projection(indexcard_pks) -> int:
+    _card_count = 0
+    for _indexable_card in trove_db.IndexableCard.objects.for_indexing(indexcard_pks):
+        _indexable_card.as_rdfdoc_with_supplements()
+        _card_count += 1
+    return _card_count
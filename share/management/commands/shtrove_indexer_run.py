@@ -1,12 +1,26 @@
+import signal
+
 from django.core.management.base import BaseCommand
-from share.search.daemon import IndexerDaemonControl
+from share.search.daemon import IndexerDaemonControl, IndexerDaemonSupervisor
 from project.celery import app as celery_app
 
 
 class Command(BaseCommand):
     help = "Start the search indexing daemon"
 
-    def handle(self, *args, **options):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of daemon processes, each consuming its own message-queue shards"
+            " (at most ELASTICSEARCH_MESSAGEQUEUE_SHARD_COUNT)",
+        )
+
+    def handle(self, *args, processes, **options):
+        if processes > 1:
+            self._run_supervisor(processes)
+            return
         daemon_control = IndexerDaemonControl(celery_app)
         daemon_control.start_all_daemonthreads()
         try:
@@ -15,3 +29,11 @@ class Command(BaseCommand):
             pass
         finally:
             daemon_control.stop_daemonthreads(wait=True)
+
+    def _run_supervisor(self, process_count):
+        supervisor = IndexerDaemonSupervisor(celery_app, process_count=process_count)
+        signal.signal(signal.SIGTERM, lambda *_: supervisor.stop_event.set())
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            pass
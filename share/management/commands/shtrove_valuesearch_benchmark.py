@@ -0,0 +1,190 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from elasticsearch8.helpers import bulk
+
+from share.search import index_strategy
+from share.search.index_strategy.trovesearch_denorm import (
+    TrovesearchDenormIndexStrategy,
+    _build_iri_valuesearch,
+    _each_prefiltered_card_pk,
+)
+from trove import models as trove_db
+from trove.trovesearch.page_cursor import OffsetCursor
+from trove.trovesearch.search_params import ValuesearchParams
+
+
+# iri-value doc layouts to compare: name => whether each doc includes the full card
+LAYOUTS = {
+    'full_card': True,  # (prior layout)
+    'slim_card': False,  # (current layout)
+}
+
+DEFAULT_VALUESEARCHES = (
+    'valueSearchPropertyPath=subject',
+    'valueSearchPropertyPath=creator',
+    'valueSearchPropertyPath=subject&cardSearchText=data',
+    'valueSearchPropertyPath=subject&cardSearchText=the',  # (broad text; may exceed the card prefilter cap)
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare iri-value doc layouts for trovesearch_denorm on a sample of index-cards:"
+        " bulk bytes and (with --elastic) index size and valuesearch latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sample-size", type=int, default=1000, help="Number of (most recent) index-cards")
+        parser.add_argument(
+            "--elastic",
+            action="store_true",
+            help="Also load temporary indexes, to compare index size and valuesearch latency",
+        )
+        parser.add_argument(
+            "--valuesearch",
+            action="append",
+            dest="valuesearches",
+            help=f"Valuesearch query string to time (may repeat; default {DEFAULT_VALUESEARCHES})",
+        )
+        parser.add_argument("--repeat", type=int, default=20, help="Times to run each valuesearch")
+        parser.add_argument("--keep-indexes", action="store_true", help="Leave temporary indexes in place")
+
+    def handle(self, *args, sample_size, elastic, valuesearches, repeat, keep_indexes, **options):
+        _docbuilders = list(_sample_docbuilders(sample_size))
+        self.stdout.write(f'sampled {len(_docbuilders)} index-cards')
+        _card_docs = [_doc for _builder in _docbuilders for _doc in _builder.build_cardsearch_docs()]
+        _value_docs_by_layout = {
+            _layout: [
+                _doc
+                for _builder in _docbuilders
+                for _doc in _builder.build_valuesearch_docs(full_card=_is_full_card)
+            ]
+            for _layout, _is_full_card in LAYOUTS.items()
+        }
+        self.stdout.write(f'cards: {len(_card_docs)} docs, {_bulk_bytes(_card_docs)} bulk bytes')
+        for _layout, _value_docs in _value_docs_by_layout.items():
+            self.stdout.write(f'{_layout}: {len(_value_docs)} docs, {_bulk_bytes(_value_docs)} bulk bytes')
+        if elastic:
+            self._benchmark_elastic(
+                _card_docs,
+                _value_docs_by_layout,
+                valuesearches=(valuesearches or DEFAULT_VALUESEARCHES),
+                repeat=repeat,
+                keep_indexes=keep_indexes,
+            )
+
+    def _benchmark_elastic(self, card_docs, value_docs_by_layout, *, valuesearches, repeat, keep_indexes):
+        _es8_client = index_strategy.get_strategy('trovesearch_denorm').es8_client
+        _prefix = f'benchmark_valuesearch_{time.time_ns()}'
+        _cards_indexname = f'{_prefix}__cards'
+        _indexname_by_layout = {_layout: f'{_prefix}__{_layout}' for _layout in LAYOUTS}
+        try:
+            _load_index(
+                _es8_client,
+                _cards_indexname,
+                TrovesearchDenormIndexStrategy._cards_index_mappings(),
+                card_docs,
+            )
+            for _layout, _is_full_card in LAYOUTS.items():
+                _indexname = _indexname_by_layout[_layout]
+                _load_index(
+                    _es8_client,
+                    _indexname,
+                    TrovesearchDenormIndexStrategy._iri_values_index_mappings(full_card=_is_full_card),
+                    value_docs_by_layout[_layout],
+                )
+                _store_bytes = (
+                    _es8_client.indices.stats(index=_indexname, metric='store')
+                    ['indices'][_indexname]['primaries']['store']['size_in_bytes']
+                )
+                self.stdout.write(f'{_layout}: {_store_bytes} bytes stored (primaries)')
+            for _querystring in valuesearches:
+                _params = ValuesearchParams.from_querystring(_querystring)
+                for _layout, _is_full_card in LAYOUTS.items():
+                    _seconds = [
+                        _time_valuesearch(
+                            _es8_client,
+                            _params,
+                            cards_indexname=_cards_indexname,
+                            values_indexname=_indexname_by_layout[_layout],
+                            full_card=_is_full_card,
+                        )
+                        for _ in range(repeat)
+                    ]
+                    if None in _seconds:
+                        self.stdout.write(
+                            f'{_layout}: "{_querystring}": refused (cardSearchText matches over'
+                            f' {settings.ELASTICSEARCH["VALUESEARCH_CARD_PREFILTER_MAX"]} cards)'
+                        )
+                        continue
+                    self.stdout.write(
+                        f'{_layout}: "{_querystring}":'
+                        f' median {statistics.median(_seconds) * 1000:.1f}ms,'
+                        f' max {max(_seconds) * 1000:.1f}ms'
+                    )
+        finally:
+            if not keep_indexes:
+                _es8_client.indices.delete(index=f'{_prefix}__*', ignore=[400, 404])
+
+
+def _sample_docbuilders(sample_size: int):
+    _indexcard_pks = (
+        trove_db.Indexcard.objects
+        .filter(deleted__isnull=True)
+        .order_by('-pk')
+        .values_list('pk', flat=True)
+        [:sample_size]
+    )
+    for _indexable_card in trove_db.IndexableCard.objects.for_indexing(list(_indexcard_pks)):
+        _builder = _BenchmarkDocbuilder(_indexable_card, time.time_ns())
+        if not _builder.should_skip():
+            yield _builder
+
+
+class _BenchmarkDocbuilder(TrovesearchDenormIndexStrategy._SourcedocBuilder):
+    def build_valuesearch_docs(self, *, full_card=False):
+        self.full_card_in_values = full_card
+        return list(super().build_valuesearch_docs())
+
+
+def _bulk_bytes(docs) -> int:
+    return sum(
+        len(json.dumps({'index': {'_id': _doc_id}})) + len(json.dumps(_doc)) + 2  # (ndjson newlines)
+        for _doc_id, _doc in docs
+    )
+
+
+def _load_index(es8_client, indexname, mappings, docs):
+    es8_client.indices.create(
+        index=indexname,
+        mappings=mappings,
+        settings=TrovesearchDenormIndexStrategy._index_settings(),
+    )
+    bulk(es8_client, (
+        {'_op_type': 'index', '_index': indexname, '_id': _doc_id, '_source': _doc}
+        for _doc_id, _doc in docs
+    ))
+    es8_client.indices.refresh(index=indexname)
+    es8_client.indices.forcemerge(index=indexname, max_num_segments=1)
+
+
+def _time_valuesearch(es8_client, params, *, cards_indexname, values_indexname, full_card) -> float | None:
+    # returns None if the valuesearch would be refused (too many cards match card-search text)
+    _cursor = OffsetCursor.from_cursor(params.page_cursor)
+    _start = time.perf_counter()
+    _card_pks = None
+    if params.cardsearch_searchtext and not full_card:
+        _max_count = settings.ELASTICSEARCH['VALUESEARCH_CARD_PREFILTER_MAX']
+        _card_pks = list(_each_prefiltered_card_pk(es8_client, cards_indexname, params, max_count=_max_count))
+        if len(_card_pks) > _max_count:
+            return None
+    es8_client.search(
+        index=values_indexname,
+        request_cache=False,
+        **_build_iri_valuesearch(params, _cursor, card_pks=_card_pks),
+    )
+    return time.perf_counter() - _start
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('share', '0078_delete_rawdatum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexerDaemonStatus',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_strategy_name', models.TextField()),
+                ('message_type', models.TextField()),
+                ('daemon_name', models.TextField()),
+                ('chunk_rate', models.JSONField(default=dict)),
+                ('modified', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('index_strategy_name', 'message_type', 'daemon_name')},
+            },
+        ),
+    ]
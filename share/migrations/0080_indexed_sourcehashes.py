@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('share', '0079_indexer_daemon_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedSourcehashes',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indexname', models.TextField()),
+                ('target_id', models.BigIntegerField()),
+                ('sourcehash_by_docid', models.JSONField(default=dict)),
+            ],
+            options={
+                'unique_together': {('indexname', 'target_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('share', '0080_indexed_sourcehashes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingScraps',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indexname', models.TextField()),
+                ('target_id', models.BigIntegerField()),
+                ('before_timestamp', models.BigIntegerField(db_index=True)),
+            ],
+            options={
+                'unique_together': {('indexname', 'target_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('share', '0081_pending_scraps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexBackfillPartition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partition_index', models.PositiveIntegerField()),
+                ('start_pk', models.BigIntegerField()),
+                ('end_pk', models.BigIntegerField(blank=True, null=True)),
+                ('target_count', models.BigIntegerField(default=0)),
+                ('last_scheduled_pk', models.BigIntegerField(blank=True, null=True)),
+                ('scheduled_count', models.BigIntegerField(default=0)),
+                ('indexed_count', models.BigIntegerField(default=0)),
+                ('error_count', models.BigIntegerField(default=0)),
+                ('is_scheduled', models.BooleanField(default=False)),
+                ('error_message', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('index_backfill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partitions', to='share.indexbackfill')),
+            ],
+            options={
+                'unique_together': {('index_backfill', 'partition_index')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('share', '0082_index_backfill_partitions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexerdaemonstatus',
+            name='parsed_turtle_cache',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -3,7 +3,10 @@ from share.models.celery import CeleryTaskResult
 from share.models.core import ShareUser
 from share.models.feature_flag import FeatureFlag
 from share.models.fields import DateTimeAwareJSONField
-from share.models.index_backfill import IndexBackfill
+from share.models.index_backfill import IndexBackfill, IndexBackfillPartition
+from share.models.indexed_sourcehashes import IndexedSourcehashes
+from share.models.indexer_daemon_status import IndexerDaemonStatus
+from share.models.pending_scraps import PendingScraps
 from share.models.source import Source
 from share.models.source_config import SourceConfig
 from share.models.source_unique_identifier import SourceUniqueIdentifier
@@ -12,6 +15,10 @@ __all__ = (
     'CeleryTaskResult',
     'FeatureFlag',
     'IndexBackfill',
+    'IndexBackfillPartition',
+    'IndexedSourcehashes',
+    'IndexerDaemonStatus',
+    'PendingScraps',
     'ShareUser',
     'SiteBanner',
     'Source',
@@ -1,10 +1,12 @@
 import contextlib
+import math
 import traceback
 import typing
 
 import celery
 from django.conf import settings
 from django.db import models, transaction
+from django.utils import timezone
 
 from share import exceptions
 
@@ -35,8 +37,8 @@ class IndexBackfillManager(models.Manager):
 class IndexBackfill(models.Model):
     INITIAL = 'initial'         # default state; nothing else happen
     WAITING = 'waiting'         # "task__schedule_index_backfill" enqueued
-    SCHEDULING = 'scheduling'   # "task__schedule_index_backfill" running (indexer daemon going)
-    INDEXING = 'indexing'       # "task__schedule_index_backfill" finished (indexer daemon continuing)
+    SCHEDULING = 'scheduling'   # partitions being scheduled (indexer daemon going)
+    INDEXING = 'indexing'       # all partitions scheduled (indexer daemon continuing)
     COMPLETE = 'complete'       # admin confirmed backfill complete
     ERROR = 'error'             # something wrong (check error_* fields)
     BACKFILL_STATUS_CHOICES = (
@@ -98,6 +100,7 @@ class IndexBackfill(models.Model):
                 locked_self.strategy_checksum = _current_checksum
                 locked_self.backfill_status = IndexBackfill.INITIAL
             locked_self.__update_error(None)
+            locked_self.partitions.all().delete()  # (progress from any prior backfill)
             try:
                 task__schedule_index_backfill.apply_async((locked_self.pk,))
             except Exception as error:
@@ -113,6 +116,49 @@ class IndexBackfill(models.Model):
             locked_self.backfill_status = IndexBackfill.SCHEDULING
             locked_self.save()
 
+    def pls_split_partitions(self, target_queryset: models.QuerySet, partition_count: int) -> list['IndexBackfillPartition']:
+        '''split the range of target pks into partitions, to schedule in parallel (unless already split)'''
+        with self.mutex() as locked_self:
+            _partitions = list(locked_self.partitions.order_by('partition_index'))
+            if not _partitions:
+                _pk_range = target_queryset.aggregate(min_pk=models.Min('pk'), max_pk=models.Max('pk'))
+                if _pk_range['min_pk'] is not None:
+                    _partitions = IndexBackfillPartition.objects.bulk_create(
+                        _split_pk_range(locked_self, target_queryset, partition_count, **_pk_range),
+                    )
+        return _partitions
+
+    def pls_note_partition_scheduled(self):
+        with self.mutex() as locked_self:
+            _all_scheduled = not locked_self.partitions.filter(is_scheduled=False).exists()
+            if _all_scheduled and (locked_self.backfill_status == IndexBackfill.SCHEDULING):
+                locked_self.backfill_status = IndexBackfill.INDEXING
+                locked_self.save()
+
+    def pls_retry_partitions(self) -> int:
+        '''resume scheduling any partitions stopped by error (from their checkpoints)'''
+        _retried_count = 0
+        with self.mutex() as locked_self:
+            assert locked_self.backfill_status == IndexBackfill.SCHEDULING
+            for _partition in locked_self.partitions.filter(is_scheduled=False).exclude(error_message=''):
+                _partition.error_message = ''
+                _partition.save(update_fields=['error_message', 'modified'])
+                task__schedule_index_backfill_partition.apply_async((_partition.pk,))
+                _retried_count += 1
+        return _retried_count
+
+    def pls_note_indexed(self, indexed_target_ids, failed_target_ids):
+        '''count targets handled by the indexer daemon, for each partition'''
+        for _partition in self.partitions.all():
+            _indexed_count = sum(1 for _target_id in indexed_target_ids if _partition.has_target_id(_target_id))
+            _failed_count = sum(1 for _target_id in failed_target_ids if _partition.has_target_id(_target_id))
+            if _indexed_count or _failed_count:
+                IndexBackfillPartition.objects.filter(pk=_partition.pk).update(
+                    indexed_count=models.F('indexed_count') + _indexed_count,
+                    error_count=models.F('error_count') + _failed_count,
+                    modified=timezone.now(),
+                )
+
     def pls_note_scheduling_has_finished(self):
         with self.mutex() as locked_self:
             assert locked_self.backfill_status == IndexBackfill.SCHEDULING
@@ -145,44 +191,191 @@ class IndexBackfill(models.Model):
             raise NotImplementedError(f'expected Exception or None (got {error})')
 
 
-@celery.shared_task(bind=True)
-def task__schedule_index_backfill(self, index_backfill_pk):
+class IndexBackfillPartition(models.Model):
+    '''one range of target pks in an IndexBackfill, scheduled by its own task'''
+    index_backfill = models.ForeignKey(IndexBackfill, on_delete=models.CASCADE, related_name='partitions')
+    partition_index = models.PositiveIntegerField()
+    start_pk = models.BigIntegerField()  # inclusive
+    end_pk = models.BigIntegerField(null=True, blank=True)  # exclusive (or null, for the last partition)
+    target_count = models.BigIntegerField(default=0)  # when split
+    last_scheduled_pk = models.BigIntegerField(null=True, blank=True)  # checkpoint, to resume scheduling
+    scheduled_count = models.BigIntegerField(default=0)
+    indexed_count = models.BigIntegerField(default=0)  # acked by indexer daemons
+    error_count = models.BigIntegerField(default=0)  # failed in indexer daemons
+    is_scheduled = models.BooleanField(default=False)
+    error_message = models.TextField(blank=True)  # from the last scheduling task to fail
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('index_backfill', 'partition_index')
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}('
+            f'index_backfill_id={self.index_backfill_id}, '
+            f'partition_index={self.partition_index}, '
+            f'start_pk={self.start_pk}, '
+            f'end_pk={self.end_pk}'
+            ')'
+        )
+
+    def __str__(self):
+        return repr(self)
+
+    def has_target_id(self, target_id: int) -> bool:
+        return (self.start_pk <= target_id) and (self.end_pk is None or target_id < self.end_pk)
+
+    def unscheduled_targets(self, target_queryset: models.QuerySet) -> models.QuerySet:
+        _queryset = target_queryset.filter(pk__gte=self.start_pk)
+        if self.end_pk is not None:
+            _queryset = _queryset.filter(pk__lt=self.end_pk)
+        if self.last_scheduled_pk is not None:
+            _queryset = _queryset.filter(pk__gt=self.last_scheduled_pk)
+        return _queryset
+
+    def pls_note_scheduled(self, scheduled_pks: list[int]) -> bool:
+        '''save a checkpoint -- unless another task has since, or scheduling stopped
+
+        returns whether saved (if not, the caller should stop scheduling)
+        '''
+        _updated_count = (
+            IndexBackfillPartition.objects
+            .filter(
+                pk=self.pk,
+                is_scheduled=False,
+                last_scheduled_pk=self.last_scheduled_pk,
+                index_backfill__backfill_status=IndexBackfill.SCHEDULING,
+            )
+            .update(
+                last_scheduled_pk=scheduled_pks[-1],
+                scheduled_count=models.F('scheduled_count') + len(scheduled_pks),
+                modified=timezone.now(),
+            )
+        )
+        if _updated_count:
+            self.last_scheduled_pk = scheduled_pks[-1]
+        return bool(_updated_count)
+
+    def pls_note_all_scheduled(self):
+        self.is_scheduled = True
+        self.save(update_fields=['is_scheduled', 'modified'])  # (counts may be updated concurrently)
+        self.index_backfill.pls_note_partition_scheduled()
+
+    def pls_note_error(self, error: Exception):
+        self.error_message = f'{type(error).__name__}: {error}'
+        self.save(update_fields=['error_message', 'modified'])
+
+
+def _split_pk_range(index_backfill, target_queryset, partition_count, *, min_pk, max_pk):
+    _width = -(-(max_pk - min_pk + 1) // max(1, partition_count))  # (ceiling division)
+    _start_pks = range(min_pk, max_pk + 1, _width)
+    for _partition_index, _start_pk in enumerate(_start_pks):
+        _is_last = (_partition_index == len(_start_pks) - 1)
+        _partition = IndexBackfillPartition(
+            index_backfill=index_backfill,
+            partition_index=_partition_index,
+            start_pk=_start_pk,
+            end_pk=(None if _is_last else _start_pk + _width),
+        )
+        _partition.target_count = _partition.unscheduled_targets(target_queryset).count()
+        yield _partition
+
+
+def backfill_target_queryset(index_strategy) -> models.QuerySet:
+    '''all targets to index in a backfill (as primary keys for `index_strategy.backfill_message_type`)'''
     from share import models as db
-    from share.search.index_messenger import IndexMessenger
-    from share.search import index_strategy
     from share.search.messages import MessageType
     from trove import models as trove_db
 
-    _index_backfill = db.IndexBackfill.objects.get(pk=index_backfill_pk)
-    _index_backfill.pls_note_scheduling_has_begun()
+    _messagetype = index_strategy.backfill_message_type
+    assert _messagetype in index_strategy.supported_message_types
+    if _messagetype == MessageType.BACKFILL_INDEXCARD:
+        return (
+            trove_db.Indexcard.objects
+            .exclude(source_record_suid__source_config__disabled=True)
+            .exclude(source_record_suid__source_config__source__is_deleted=True)
+        )
+    if _messagetype == MessageType.BACKFILL_SUID:
+        return (
+            db.SourceUniqueIdentifier.objects
+            .exclude(source_config__disabled=True)
+            .exclude(source_config__source__is_deleted=True)
+        )
+    raise ValueError(f'unknown backfill messagetype {_messagetype}')
+
+
+@celery.shared_task(bind=True)
+def task__schedule_index_backfill(self, index_backfill_pk):
+    '''split the backfill into partitions (by target pk) and start scheduling each'''
+    from share.search import index_strategy
+
+    _index_backfill = IndexBackfill.objects.get(pk=index_backfill_pk)
+    if _index_backfill.backfill_status == IndexBackfill.WAITING:
+        _index_backfill.pls_note_scheduling_has_begun()
+    elif _index_backfill.backfill_status != IndexBackfill.SCHEDULING:
+        return  # stale task (backfill since stopped or finished)
     try:
         _index_strategy = index_strategy.get_strategy(_index_backfill.index_strategy_name)
+        _partitions = _index_backfill.pls_split_partitions(
+            backfill_target_queryset(_index_strategy),
+            settings.ELASTICSEARCH['BACKFILL_PARTITION_COUNT'],
+        )
+    except Exception as error:
+        _index_backfill.pls_mark_error(error)
+        raise error
+    if not _partitions:
+        _index_backfill.pls_note_scheduling_has_finished()  # nothing to backfill
+    for _partition in _partitions:
+        if not _partition.is_scheduled:
+            task__schedule_index_backfill_partition.apply_async((_partition.pk,))
+
+
+@celery.shared_task(bind=True)
+def task__schedule_index_backfill_partition(self, partition_pk):
+    '''send index messages for each target in the partition, in pk order, at a pace the indexer
+    can follow: when the strategy's nonurgent queues are deep enough, continue later (in another
+    task, from the saved checkpoint -- as also after a worker restart)
+    '''
+    from share.search.index_messenger import IndexMessenger
+    from share.search import index_strategy
+    from share.search.messages import MessagesChunk
+    from trove.util.django import pk_chunked
+
+    _partition = IndexBackfillPartition.objects.select_related('index_backfill').get(pk=partition_pk)
+    if _partition.is_scheduled or (_partition.index_backfill.backfill_status != IndexBackfill.SCHEDULING):
+        return  # stale task (partition done, or backfill since stopped)
+    try:
+        _index_strategy = index_strategy.get_strategy(_partition.index_backfill.index_strategy_name)
         _messenger = IndexMessenger(celery_app=self.app, index_strategys=[_index_strategy])
         _messagetype = _index_strategy.backfill_message_type
-        assert _messagetype in _index_strategy.supported_message_types
-        _target_queryset: models.QuerySet
-        if _messagetype == MessageType.BACKFILL_INDEXCARD:
-            _target_queryset = (
-                trove_db.Indexcard.objects
-                .exclude(source_record_suid__source_config__disabled=True)
-                .exclude(source_record_suid__source_config__source__is_deleted=True)
-            )
-        elif _messagetype == MessageType.BACKFILL_SUID:
-            _target_queryset = (
-                db.SourceUniqueIdentifier.objects
-                .exclude(source_config__disabled=True)
-                .exclude(source_config__source__is_deleted=True)
-            )
-        else:
-            raise ValueError(f'unknown backfill messagetype {_messagetype}')
+        _target_queryset = _partition.unscheduled_targets(backfill_target_queryset(_index_strategy))
         _chunk_size = settings.ELASTICSEARCH['CHUNK_SIZE']
-        _messenger.stream_message_chunks(
-            _messagetype,
-            _target_queryset,
-            chunk_size=_chunk_size,
-            urgent=False,
-        )
+        _high_water = _partition_high_water(_partition.index_backfill.partitions.count(), _chunk_size)
+        for _pk_chunk in pk_chunked(_target_queryset, _chunk_size):
+            if _messenger.get_queue_depth(_messagetype, urgent=False) >= _high_water:
+                task__schedule_index_backfill_partition.apply_async(
+                    (partition_pk,),
+                    countdown=settings.ELASTICSEARCH['BACKFILL_PAUSE_SECONDS'],
+                )
+                return  # continue later
+            _messenger.send_messages_chunk(MessagesChunk(_messagetype, _pk_chunk), urgent=False)
+            if not _partition.pls_note_scheduled(_pk_chunk):
+                return  # another task has taken over (or backfill stopped)
     except Exception as error:
-        _index_backfill.pls_mark_error(error)
+        _partition.pls_note_error(error)
         raise error
-    _index_backfill.pls_note_scheduling_has_finished()
+    _partition.pls_note_all_scheduled()
+
+
+def _partition_high_water(partition_count: int, chunk_size: int) -> int:
+    '''queue depth at which a partition task pauses -- below `BACKFILL_QUEUE_HIGH_WATER` by
+    room for one chunk from each other partition (which may each pass the check at once)
+    '''
+    _max_messages_per_chunk = min(
+        chunk_size,  # (at most one target id per message)
+        math.ceil(chunk_size / settings.ELASTICSEARCH['MAX_IDS_PER_MESSAGE'])
+        + settings.ELASTICSEARCH['MESSAGEQUEUE_SHARD_COUNT'] - 1,  # (packed by shard)
+    )
+    _room_for_others = max(0, partition_count - 1) * _max_messages_per_chunk
+    return max(1, settings.ELASTICSEARCH['BACKFILL_QUEUE_HIGH_WATER'] - _room_for_others)
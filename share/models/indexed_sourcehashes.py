@@ -0,0 +1,63 @@
+from collections.abc import Collection, Iterable
+
+from django.db import models
+
+
+class IndexedSourcehashesManager(models.Manager):
+    def get_sourcehashes(
+        self,
+        indexnames: Collection[str],
+        target_ids: Collection[int],
+    ) -> dict[tuple[str, int], dict[str, str]]:
+        '''get sourcehash-by-docid for each (indexname, target_id) with any on record'''
+        return {
+            (_indexname, _target_id): _sourcehash_by_docid
+            for _indexname, _target_id, _sourcehash_by_docid in (
+                self.filter(indexname__in=indexnames, target_id__in=target_ids)
+                .values_list('indexname', 'target_id', 'sourcehash_by_docid')
+            )
+        }
+
+    def save_sourcehashes(self, sourcehashes: dict[tuple[str, int], dict[str, str]]) -> None:
+        if sourcehashes:
+            self.bulk_create(
+                [
+                    IndexedSourcehashes(
+                        indexname=_indexname,
+                        target_id=_target_id,
+                        sourcehash_by_docid=_sourcehash_by_docid,
+                    )
+                    for (_indexname, _target_id), _sourcehash_by_docid in sorted(sourcehashes.items())
+                ],
+                update_conflicts=True,
+                unique_fields=['indexname', 'target_id'],
+                update_fields=['sourcehash_by_docid'],
+            )
+
+    def forget_sourcehashes(self, keys: Iterable[tuple[str, int]]) -> None:
+        _target_ids_by_indexname: dict[str, set[int]] = {}
+        for _indexname, _target_id in keys:
+            _target_ids_by_indexname.setdefault(_indexname, set()).add(_target_id)
+        for _indexname, _target_ids in _target_ids_by_indexname.items():
+            self.filter(indexname=_indexname, target_id__in=_target_ids).delete()
+
+
+class IndexedSourcehashes(models.Model):
+    '''hashes of each doc `_source` sent to an elasticsearch index for a message target
+
+    (allows skipping unchanged docs, and deleting docs no longer built, by id)
+    '''
+    indexname = models.TextField()
+    target_id = models.BigIntegerField()
+    sourcehash_by_docid = models.JSONField(default=dict)
+
+    objects = IndexedSourcehashesManager()
+
+    class Meta:
+        unique_together = ('indexname', 'target_id')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(indexname="{self.indexname}", target_id={self.target_id})'
+
+    def __str__(self):
+        return repr(self)
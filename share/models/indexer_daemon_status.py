@@ -0,0 +1,63 @@
+import datetime
+
+from django.db import models
+from django.utils import timezone
+
+
+class IndexerDaemonStatusManager(models.Manager):
+    STALE_AFTER = datetime.timedelta(minutes=10)  # daemon presumed gone, if no report since
+    FORGET_AFTER = datetime.timedelta(days=1)
+
+    def report(
+        self, *,
+        index_strategy_name: str,
+        message_type: str,
+        daemon_name: str,
+        chunk_rate: dict,
+        parsed_turtle_cache: dict | None = None,
+    ):
+        '''save a daemon loop's current status -- one row per loop, updated in place (no history)'''
+        self.update_or_create(
+            index_strategy_name=index_strategy_name,
+            message_type=message_type,
+            daemon_name=daemon_name,
+            defaults={
+                'chunk_rate': chunk_rate,
+                'parsed_turtle_cache': parsed_turtle_cache or {},
+            },
+        )
+        # forget daemons long gone (each daemon process has its own name)
+        self.filter(
+            index_strategy_name=index_strategy_name,
+            modified__lt=timezone.now() - self.FORGET_AFTER,
+        ).delete()
+
+    def recent(self):
+        return self.filter(modified__gte=timezone.now() - self.STALE_AFTER)
+
+
+class IndexerDaemonStatus(models.Model):
+    '''latest report from a running indexer daemon (for the admin's search-indexes view)'''
+    index_strategy_name = models.TextField()
+    message_type = models.TextField()
+    daemon_name = models.TextField()  # host and process id
+    chunk_rate = models.JSONField(default=dict)  # see share.search.chunk_rate.AdaptiveChunkRate
+    parsed_turtle_cache = models.JSONField(default=dict)  # see trove.models.resource_description.parsed_turtle_cache_stats
+    modified = models.DateTimeField(auto_now=True)
+
+    objects = IndexerDaemonStatusManager()
+
+    class Meta:
+        unique_together = ('index_strategy_name', 'message_type', 'daemon_name')
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}('
+            f'index_strategy_name="{self.index_strategy_name}", '
+            f'message_type="{self.message_type}", '
+            f'daemon_name="{self.daemon_name}", '
+            ')'
+        )
+
+    def __str__(self):
+        return repr(self)
@@ -0,0 +1,78 @@
+from collections.abc import Iterable
+import functools
+import operator
+
+from django.db import connections, models
+
+
+class PendingScrapsManager(models.Manager):
+    def add_pending(self, indexname: str, target_ids: Iterable[int], before_timestamp: int) -> None:
+        '''record scraps to delete for each target (keeping the later timestamp, if already pending)
+
+        (chunks may finish out of order, so never lower a pending timestamp)
+        '''
+        _target_ids = sorted(set(target_ids))  # consistent order, to avoid deadlocks between concurrent upserts
+        if not _target_ids:
+            return
+        _meta = self.model._meta
+        _connection = connections[self.db]
+        _quote = _connection.ops.quote_name
+
+        def _column(field_name: str) -> str:
+            return _quote(_meta.get_field(field_name).column)
+        _values_sql = ', '.join(['(%s, %s, %s)'] * len(_target_ids))
+        _params: list = []
+        for _target_id in _target_ids:
+            _params.extend((indexname, _target_id, before_timestamp))
+        _sql = (
+            f'INSERT INTO {_quote(_meta.db_table)} AS _ps'
+            f' ({_column("indexname")}, {_column("target_id")}, {_column("before_timestamp")})'
+            f' VALUES {_values_sql}'
+            f' ON CONFLICT ({_column("indexname")}, {_column("target_id")}) DO UPDATE SET'
+            f' {_column("before_timestamp")} = EXCLUDED.{_column("before_timestamp")}'
+            f' WHERE _ps.{_column("before_timestamp")} < EXCLUDED.{_column("before_timestamp")}'
+        )
+        with _connection.cursor() as _cursor:
+            _cursor.execute(_sql, _params)
+
+    def ripe_by_indexname(self, *, before_timestamp: int, limit: int) -> dict[str, list['PendingScraps']]:
+        '''get pending scraps recorded before the given timestamp, by indexname (at most `limit`)'''
+        _ripe_by_indexname: dict[str, list[PendingScraps]] = {}
+        for _pending in self.filter(before_timestamp__lt=before_timestamp).order_by('before_timestamp')[:limit]:
+            _ripe_by_indexname.setdefault(_pending.indexname, []).append(_pending)
+        return _ripe_by_indexname
+
+    def forget(self, pendings: Iterable['PendingScraps']) -> None:
+        '''delete the given records, unless replaced (with a later timestamp) since retrieved'''
+        _conditions = [
+            models.Q(pk=_pending.pk, before_timestamp=_pending.before_timestamp)
+            for _pending in pendings
+        ]
+        if _conditions:
+            self.filter(functools.reduce(operator.or_, _conditions)).delete()
+
+
+class PendingScraps(models.Model):
+    '''docs to delete from an elasticsearch index for a message target: any left from
+    indexing before the given timestamp (collected, to be deleted together)
+    '''
+    indexname = models.TextField()
+    target_id = models.BigIntegerField()
+    before_timestamp = models.BigIntegerField(db_index=True)  # (nanoseconds, as `MessagesChunk.timestamp`)
+
+    objects = PendingScrapsManager()
+
+    class Meta:
+        unique_together = ('indexname', 'target_id')
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}('
+            f'indexname="{self.indexname}", '
+            f'target_id={self.target_id}, '
+            f'before_timestamp={self.before_timestamp}'
+            ')'
+        )
+
+    def __str__(self):
+        return repr(self)
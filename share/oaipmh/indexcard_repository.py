@@ -164,6 +164,7 @@ class OaiPmhRepository:
         if self.errors:
             return
         assert _indexcard is not None
+        self._load_blobbed_oai_metadata([_indexcard])
         if _indexcard.oai_metadata is None or _indexcard.oai_datestamp is None:
             self.errors.append(oai_errors.BadFormatForRecord(kwargs['metadataPrefix']))
         if self.errors:
@@ -194,6 +195,8 @@ class OaiPmhRepository:
         else:
             _indexcards = _indexcards[:self.PAGE_SIZE]
             _next_token = self._get_resumption_token(kwargs, last_id=_indexcards[-1].id)
+        if not just_identifiers:
+            self._load_blobbed_oai_metadata(_indexcards)
         return _indexcards, _next_token
 
     def _get_indexcard_page_queryset(self, kwargs, catch=True, last_id=None):
@@ -268,7 +271,32 @@ class OaiPmhRepository:
                 .values_list('derived_text', flat=True)
                 [:1]
             ),
+            oai_metadata_checksum_iri=Subquery(
+                trove_db.DerivedIndexcard.objects
+                .filter(
+                    upriver_indexcard_id=OuterRef('id'),
+                    deriver_identifier_id__in=self._deriver_identifier_ids(
+                        metadata_prefix,
+                    ),
+                )
+                .values_list('derived_checksum_iri', flat=True)
+                [:1]
+            ),
+        )
+
+    def _load_blobbed_oai_metadata(self, indexcards):
+        # derived text stored by checksum is empty inline; load it all at once
+        _blobbed = [
+            _indexcard
+            for _indexcard in indexcards
+            if (_indexcard.oai_metadata == '') and _indexcard.oai_metadata_checksum_iri
+        ]
+        _texts = trove_db.ContentBlob.objects.get_texts(
+            _indexcard.oai_metadata_checksum_iri
+            for _indexcard in _blobbed
         )
+        for _indexcard in _blobbed:
+            _indexcard.oai_metadata = _texts.get(_indexcard.oai_metadata_checksum_iri)
 
     def _resume(self, token):
         _from, _until, _set_spec, _prefix, _last_id = token.split('|')
@@ -1,5 +1,15 @@
 from share.search.messages import MessageType, MessagesChunk
-from share.search.index_messenger import IndexMessenger
+from share.search.index_messenger import (
+    BufferedIndexMessenger,
+    IndexMessenger,
+    get_worker_index_messenger,
+)
 
 
-__all__ = ('IndexMessenger', 'MessageType', 'MessagesChunk',)
+__all__ = (
+    'BufferedIndexMessenger',
+    'IndexMessenger',
+    'MessageType',
+    'MessagesChunk',
+    'get_worker_index_messenger',
+)
@@ -0,0 +1,255 @@
+'''offline index builds: export index docs to bulk files, and load them into an index later
+
+bulk files are gzipped ndjson in elasticsearch bulk-request format, grouped by index subname,
+with "create" actions that name no index -- so a set of files may be loaded into any index with
+the same mappings (e.g. after a strategy change affecting only index settings) without
+building docs again
+'''
+import collections
+from collections.abc import Callable, Iterable, Iterator
+import concurrent.futures
+import datetime
+import gzip
+import itertools
+import json
+import logging
+import multiprocessing
+import pathlib
+
+from django.db import connections
+from elasticsearch8.serializer import JSONSerializer
+
+from share.models.index_backfill import backfill_target_queryset
+from share.search import messages
+from share.search.exceptions import IndexStrategyError
+from share.search.index_strategy.elastic8 import Elastic8IndexStrategy
+
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_FILENAME = 'manifest.json'
+BULK_FILE_SUFFIX = '.ndjson.gz'
+
+
+def export_bulk_files(
+    index_strategy: Elastic8IndexStrategy,
+    directory: str | pathlib.Path,
+    *,
+    chunk_size: int,
+    processes: int,
+) -> dict:
+    '''build docs for every backfill target and write them to bulk files, with a manifest
+
+    targets are read in pk order (by server-side cursor) and built a chunk at a time,
+    in a pool of processes (or in this process, if `processes` is zero) -- returns the manifest
+    '''
+    if not index_strategy.is_current:
+        raise IndexStrategyError(f'cannot build docs for non-current {index_strategy}')
+    _directory = pathlib.Path(directory)
+    if (_directory / MANIFEST_FILENAME).exists():
+        raise IndexStrategyError(f'already exported to {_directory} (remove it or choose another)')
+    _directory.mkdir(parents=True, exist_ok=True)
+    _doc_counts: collections.Counter[str] = collections.Counter()
+    _target_count = 0
+    for _chunk_target_count, _chunk_doc_counts in _each_chunk_exported(
+        index_strategy,
+        _directory,
+        chunk_size=chunk_size,
+        processes=processes,
+    ):
+        _target_count += _chunk_target_count
+        _doc_counts.update(_chunk_doc_counts)
+        logger.info('exported %d targets (%s docs)', _target_count, dict(_doc_counts))
+    _manifest = {
+        'strategy_name': index_strategy.strategy_name,
+        'strategy_check': index_strategy.strategy_check,
+        'exported': datetime.datetime.now(datetime.UTC).isoformat(),
+        'target_count': _target_count,
+        'indexes': {
+            _index.subname: {
+                'mappings': _index.index_def.mappings,
+                'doc_count': _doc_counts[_index.subname],
+            }
+            for _index in index_strategy.each_subnamed_index()
+        },
+    }
+    # (written last, so an export is complete only with its manifest)
+    (_directory / MANIFEST_FILENAME).write_text(json.dumps(_manifest, indent=2))
+    return _manifest
+
+
+def load_bulk_files(
+    index_strategy: Elastic8IndexStrategy,
+    directory: str | pathlib.Path,
+    *,
+    docs_per_request: int,
+    threads: int,
+    force: bool = False,
+) -> dict[str, collections.Counter[str]]:
+    '''load exported bulk files into the strategy's (existing) indexes, by parallel bulk requests
+
+    docs already in an index (e.g. updated since the export, if kept live) are not replaced;
+    bulk-load index settings are used while loading (see `pls_start_bulk_load`)
+    returns counts ("created", "existing", "error") by index subname
+    '''
+    _directory = pathlib.Path(directory)
+    _manifest = read_manifest(_directory)
+    if _manifest['strategy_name'] != index_strategy.strategy_name:
+        raise IndexStrategyError(f'exported for strategy "{_manifest["strategy_name"]}" (not "{index_strategy.strategy_name}")')
+    _indexes = [index_strategy.get_index(_subname) for _subname in _manifest['indexes']]
+    for _index in _indexes:
+        if not _index.pls_check_exists():
+            raise IndexStrategyError(f'no index {_index.full_index_name} (set up first)')
+        _mappings = json.loads(json.dumps(_index.index_def.mappings))  # (as in the manifest)
+        if (_mappings != _manifest['indexes'][_index.subname]['mappings']) and not force:
+            raise IndexStrategyError(
+                f'mappings for "{_index.subname}" changed since export'
+                ' (docs may not fit; export again, or force)'
+            )
+    if _manifest['strategy_check'] != index_strategy.strategy_check:
+        logger.info('loading docs exported for strategy check %s', _manifest['strategy_check'])
+    _counts_by_subname: dict[str, collections.Counter[str]] = {}
+    index_strategy.pls_start_bulk_load()
+    try:
+        for _index in _indexes:
+            _counts_by_subname[_index.subname] = _load_index(_index, _directory, docs_per_request, threads)
+    except BaseException:
+        try:  # restore settings, without hiding the error that stopped loading
+            index_strategy.pls_stop_bulk_load()
+        except Exception:
+            logger.exception('%s: failed to stop bulk-loading', index_strategy.strategy_name)
+        raise
+    index_strategy.pls_stop_bulk_load()
+    return _counts_by_subname
+
+
+def read_manifest(directory: str | pathlib.Path) -> dict:
+    _manifest_path = pathlib.Path(directory) / MANIFEST_FILENAME
+    if not _manifest_path.exists():
+        raise IndexStrategyError(f'no {MANIFEST_FILENAME} in {directory} (export incomplete?)')
+    return json.loads(_manifest_path.read_text())
+
+
+###
+# local helpers
+
+def _subname_dirname(subname: str) -> str:
+    return subname or '_'  # (an index subname may be empty)
+
+
+def _load_index(index, directory, docs_per_request, threads) -> collections.Counter[str]:
+    _counts: collections.Counter[str] = collections.Counter()
+    _bulk_bodies = (
+        _bulk_body
+        for _filepath in sorted((directory / _subname_dirname(index.subname)).glob(f'*{BULK_FILE_SUFFIX}'))
+        for _bulk_body in _each_bulk_body(_filepath, docs_per_request)
+    )
+    _es8_client = index.index_strategy.es8_client
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as _executor:
+        for _request_counts in _bounded_map(
+            _executor,
+            lambda _body: _send_bulk_body(_es8_client, index.full_index_name, _body),
+            _bulk_bodies,
+            max_in_flight=(2 * threads),
+        ):
+            _counts.update(_request_counts)
+    logger.info('%s: loaded %s', index.full_index_name, dict(_counts))
+    return _counts
+
+
+def _each_chunk_exported(index_strategy, directory, *, chunk_size, processes) -> Iterator[tuple[int, dict[str, int]]]:
+    if not processes:
+        for _chunk_number, _target_ids in _each_target_id_chunk(index_strategy, chunk_size):
+            yield _export_chunk(index_strategy, directory, _chunk_number, _target_ids)
+        return
+    connections.close_all()  # (do not share db connections with forked processes)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('fork'),
+    ) as _executor:
+        # (all processes fork on first submit -- before this process opens its cursor)
+        _executor.submit(int).result()
+        yield from _bounded_map(
+            _executor,
+            lambda _chunk: _executor.submit(_export_chunk, index_strategy, directory, *_chunk),
+            _each_target_id_chunk(index_strategy, chunk_size),
+            max_in_flight=(2 * processes),
+            submitted=True,
+        )
+
+
+def _each_target_id_chunk(index_strategy, chunk_size) -> Iterator[tuple[int, tuple[int, ...]]]:
+    _target_ids = (
+        backfill_target_queryset(index_strategy)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .iterator(chunk_size=chunk_size)  # (server-side cursor)
+    )
+    yield from enumerate(itertools.batched(_target_ids, chunk_size))
+
+
+def _export_chunk(index_strategy, directory, chunk_number, target_ids) -> tuple[int, dict[str, int]]:
+    # (may run in a worker process)
+    _messages_chunk = messages.MessagesChunk(index_strategy.backfill_message_type, target_ids)
+    _serializer = JSONSerializer()
+    _doc_counts: collections.Counter[str] = collections.Counter()
+    _partial_paths: dict[str, pathlib.Path] = {}
+    _files: dict[str, gzip.GzipFile] = {}
+    try:
+        for _actionset in index_strategy.build_elastic_actions(_messages_chunk):
+            for _subname, _actions in _actionset.actions_by_subname.items():
+                for _action in _actions:
+                    if _action['_op_type'] != 'index':
+                        continue  # (nothing to delete or update in a new index)
+                    _file = _files.get(_subname)
+                    if _file is None:
+                        _subdirectory = directory / _subname_dirname(_subname)
+                        _subdirectory.mkdir(exist_ok=True)
+                        _partial_paths[_subname] = _subdirectory / f'{chunk_number:08d}{BULK_FILE_SUFFIX}.partial'
+                        _file = _files[_subname] = gzip.open(_partial_paths[_subname], 'wb')
+                    _file.write(_serializer.dumps({'create': {'_id': _action['_id']}}) + b'\n')
+                    _file.write(_serializer.dumps(_action['_source']) + b'\n')
+                    _doc_counts[_subname] += 1
+    finally:
+        for _file in _files.values():
+            _file.close()
+    for _partial_path in _partial_paths.values():
+        _partial_path.rename(_partial_path.with_suffix(''))  # (complete)
+    return len(target_ids), dict(_doc_counts)
+
+
+def _each_bulk_body(filepath: pathlib.Path, docs_per_request: int) -> Iterator[bytes]:
+    with gzip.open(filepath, 'rb') as _file:
+        # (two lines per doc: action and source)
+        for _lines in itertools.batched(_file, 2 * docs_per_request):
+            yield b''.join(_lines)
+
+
+def _send_bulk_body(es8_client, indexname: str, bulk_body: bytes) -> collections.Counter[str]:
+    _counts: collections.Counter[str] = collections.Counter()
+    _response = es8_client.bulk(index=indexname, operations=bulk_body)
+    for _item in _response['items']:
+        _result = _item['create']
+        if _result['status'] < 300:
+            _counts['created'] += 1
+        elif _result['status'] == 409:  # already exists
+            _counts['existing'] += 1
+        else:
+            _counts['error'] += 1
+            logger.error('%s: error creating %s: %s', indexname, _result['_id'], _result.get('error'))
+    return _counts
+
+
+def _bounded_map(executor, fn: Callable, args: Iterable, *, max_in_flight: int, submitted: bool = False):
+    # like `executor.map`, but reading `args` only as results are taken (and in no order)
+    # (if `submitted`, `fn` returns a future rather than a result)
+    _in_flight: set[concurrent.futures.Future] = set()
+    for _arg in args:
+        if len(_in_flight) >= max_in_flight:
+            _done, _in_flight = concurrent.futures.wait(_in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for _future in _done:
+                yield _future.result()
+        _in_flight.add(fn(_arg) if submitted else executor.submit(fn, _arg))
+    for _future in concurrent.futures.as_completed(_in_flight):
+        yield _future.result()
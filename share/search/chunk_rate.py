@@ -0,0 +1,114 @@
+import dataclasses
+import logging
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# status codes from elasticsearch that mean "slow down"
+PRESSURE_STATUS_CODES = frozenset((
+    429,  # too many requests (incl. es_rejected_execution_exception)
+    503,  # service unavailable
+))
+
+
+@dataclasses.dataclass
+class ChunkOutcome:
+    '''what happened with one chunk of messages (for adjusting the chunk rate)'''
+    doc_count: int = 0
+    error_count: int = 0
+    pressure_count: int = 0  # responses with a PRESSURE_STATUS_CODES status
+    seconds: float = 0.0
+
+    @property
+    def is_pressured(self) -> bool:
+        return bool(self.pressure_count)
+
+
+@dataclasses.dataclass
+class AdaptiveChunkRate:
+    '''chunk size and in-flight chunk count for an indexer daemon, adjusted by AIMD
+
+    additive increase (chunk size, then in-flight chunks) after each healthy chunk;
+    multiplicative decrease after a chunk with rejections or slower than the target
+    '''
+    min_chunk_size: int
+    max_chunk_size: int
+    min_in_flight_chunks: int
+    max_in_flight_chunks: int
+    increase_step: int
+    decrease_factor: float
+    target_seconds_per_chunk: float
+    # current settings:
+    chunk_size: int = 0
+    in_flight_chunks: int = 0
+    # counts since start, for status:
+    chunk_count: int = 0
+    pressured_chunk_count: int = 0
+    slow_chunk_count: int = 0
+    last_chunk_seconds: float = 0.0
+
+    @classmethod
+    def for_strategy(cls, strategy_name: str) -> 'AdaptiveChunkRate':
+        '''from `settings.INDEXER_CHUNK_RATE` (with any overrides for the named strategy)'''
+        _config = {
+            **settings.INDEXER_CHUNK_RATE,
+            **settings.INDEXER_CHUNK_RATE['BY_STRATEGY'].get(strategy_name, {}),
+        }
+        return cls(
+            min_chunk_size=_config['MIN_CHUNK_SIZE'],
+            max_chunk_size=_config['MAX_CHUNK_SIZE'],
+            min_in_flight_chunks=_config['MIN_IN_FLIGHT_CHUNKS'],
+            max_in_flight_chunks=_config['MAX_IN_FLIGHT_CHUNKS'],
+            increase_step=_config['INCREASE_STEP'],
+            decrease_factor=_config['DECREASE_FACTOR'],
+            target_seconds_per_chunk=_config['TARGET_SECONDS_PER_CHUNK'],
+        )
+
+    def __post_init__(self):
+        self.min_chunk_size = max(1, self.min_chunk_size)
+        self.max_chunk_size = max(self.min_chunk_size, self.max_chunk_size)
+        self.min_in_flight_chunks = max(1, self.min_in_flight_chunks)
+        self.max_in_flight_chunks = max(self.min_in_flight_chunks, self.max_in_flight_chunks)
+        # start small; grow while healthy
+        self.chunk_size = self._bounded_chunk_size(self.chunk_size or self.min_chunk_size)
+        self.in_flight_chunks = self._bounded_in_flight(self.in_flight_chunks or self.min_in_flight_chunks)
+
+    def observe(self, outcome: ChunkOutcome) -> None:
+        self.chunk_count += 1
+        self.last_chunk_seconds = outcome.seconds
+        if outcome.is_pressured:
+            self.pressured_chunk_count += 1
+            self._decrease()
+        elif outcome.seconds > self.target_seconds_per_chunk:
+            self.slow_chunk_count += 1
+            self._decrease()
+        elif outcome.doc_count or outcome.error_count:
+            self._increase()
+
+    def as_status(self) -> dict:
+        return dataclasses.asdict(self)
+
+    def _increase(self):
+        if self.chunk_size < self.max_chunk_size:
+            self.chunk_size = self._bounded_chunk_size(self.chunk_size + self.increase_step)
+        else:
+            self.in_flight_chunks = self._bounded_in_flight(self.in_flight_chunks + 1)
+
+    def _decrease(self):
+        _chunk_size = self._bounded_chunk_size(int(self.chunk_size * self.decrease_factor))
+        _in_flight = self._bounded_in_flight(int(self.in_flight_chunks * self.decrease_factor))
+        if (_chunk_size, _in_flight) != (self.chunk_size, self.in_flight_chunks):
+            logger.info(
+                'decreasing chunk rate (chunk size %d => %d; in-flight chunks %d => %d)',
+                self.chunk_size, _chunk_size, self.in_flight_chunks, _in_flight,
+            )
+        self.chunk_size, self.in_flight_chunks = _chunk_size, _in_flight
+
+    def _bounded_chunk_size(self, chunk_size: int) -> int:
+        return min(self.max_chunk_size, max(self.min_chunk_size, chunk_size))
+
+    def _bounded_in_flight(self, in_flight_chunks: int) -> int:
+        return min(self.max_in_flight_chunks, max(self.min_in_flight_chunks, in_flight_chunks))
@@ -1,24 +1,35 @@
+import concurrent.futures
 import contextlib
 import collections
 from collections.abc import Callable
 import dataclasses
 import logging
+import logging.handlers
+import math
+import multiprocessing
+import os
 import queue
 import random
+import signal
+import socket
 import threading
 import time
 
 from django.conf import settings
+from django.db import connections
 import kombu
 from kombu.mixins import ConsumerMixin
 import sentry_sdk
 
+from share.models import IndexerDaemonStatus
 from share.search import (
+    chunk_rate,
     exceptions,
     messages,
     index_strategy,
     IndexMessenger,
 )
+from trove.models.resource_description import parsed_turtle_cache_stats
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +40,8 @@ QUICK_TIMEOUT = 0.1             # seconds
 MINIMUM_BACKOFF_FACTOR = 1.6    # unitless ratio
 MAXIMUM_BACKOFF_FACTOR = 2.0    # unitless ratio
 MAXIMUM_BACKOFF_TIMEOUT = 60    # seconds
+HEALTHY_PROCESS_TIMEOUT = 60    # seconds (a daemon process running this long resets its restart backoff)
+STOP_PROCESS_TIMEOUT = 30       # seconds (to wait for graceful stop before killing)
 
 
 class TooFastSlowDown(Exception):
@@ -36,12 +49,13 @@ class TooFastSlowDown(Exception):
 
 
 class IndexerDaemonControl:
-    def __init__(self, celery_app, *, daemonthread_context=None, stop_event=None):
+    def __init__(self, celery_app, *, daemonthread_context=None, stop_event=None, shards=None):
         self.kombu_connection = kombu.Connection(
             celery_app.conf.broker_url,  # use celery_app.conf for consistent config
             heartbeat=settings.RABBITMQ_HEARTBEAT_TIMEOUT,
         )
         self.daemonthread_context = daemonthread_context
+        self.shards = shards  # message-queue shards to consume (default all)
         self._daemonthreads = []
         # shared stop_event for all threads below
         self.stop_event = stop_event or threading.Event()
@@ -58,6 +72,7 @@ class IndexerDaemonControl:
             stop_event=self.stop_event,
             index_strategy=index_strategy,
             message_callback=_daemon.on_message,
+            shards=self.shards,
         )
         # spin up daemonthreads, ready for messages
         self._daemonthreads.extend(_daemon.start())
@@ -77,16 +92,127 @@ class IndexerDaemonControl:
                 _thread.join()
 
 
+class IndexerDaemonSupervisor:
+    '''run indexer daemons in forked worker processes, each consuming its own message-queue
+    shards (so each owns a consistent shard of target ids) -- restarts any that stop while
+    still supervising, and handles all their logs in this (supervisor) process
+    '''
+    def __init__(self, celery_app, *, process_count: int, stop_event=None):
+        _shard_count = settings.ELASTICSEARCH['MESSAGEQUEUE_SHARD_COUNT']
+        if not (1 <= process_count <= _shard_count):
+            raise exceptions.DaemonSetupError(
+                f'cannot split {_shard_count} message-queue shards among {process_count} processes'
+                ' (may need to set ELASTICSEARCH_MESSAGEQUEUE_SHARD_COUNT)'
+            )
+        self.celery_app = celery_app
+        self.stop_event = stop_event or threading.Event()
+        self.shards_by_process = [
+            tuple(range(_process_index, _shard_count, process_count))
+            for _process_index in range(process_count)
+        ]
+        self._mp_context = multiprocessing.get_context('fork')
+        self._log_queue = self._mp_context.Queue()
+        self._processes: list[multiprocessing.process.BaseProcess | None] = [None] * process_count
+        self._start_times = [0.0] * process_count
+        self._restart_counts = [0] * process_count
+        self._next_start_times = [0.0] * process_count
+
+    def run(self) -> None:
+        _log_listener = logging.handlers.QueueListener(
+            self._log_queue,
+            *logging.getLogger().handlers,
+            respect_handler_level=True,
+        )
+        _log_listener.start()
+        try:
+            while not self.stop_event.is_set():
+                self.start_any_stopped()
+                self.stop_event.wait(timeout=UNPRESSURED_TIMEOUT)
+        finally:
+            self.stop_all()
+            _log_listener.stop()
+
+    def start_any_stopped(self) -> None:
+        _now = time.monotonic()
+        for _process_index, _process in enumerate(self._processes):
+            if _process is not None:
+                if _process.is_alive():
+                    continue
+                logger.error('%s stopped (exitcode %s) -- will restart', _process.name, _process.exitcode)
+                sentry_sdk.capture_message('indexer daemon process stopped', extras={'exitcode': _process.exitcode})
+                self._processes[_process_index] = None
+                if (_now - self._start_times[_process_index]) > HEALTHY_PROCESS_TIMEOUT:
+                    self._restart_counts[_process_index] = 0
+                _restart_count = self._restart_counts[_process_index]
+                self._next_start_times[_process_index] = _now + (
+                    0  # (first restart immediate)
+                    if _restart_count == 0
+                    else min(MAXIMUM_BACKOFF_TIMEOUT, MINIMUM_BACKOFF_FACTOR ** _restart_count)
+                )
+                self._restart_counts[_process_index] += 1
+            if _now >= self._next_start_times[_process_index]:
+                self._processes[_process_index] = self._start_process(_process_index)
+                self._start_times[_process_index] = _now
+
+    def stop_all(self) -> None:
+        _live_processes = [
+            _process
+            for _process in self._processes
+            if (_process is not None) and _process.is_alive()
+        ]
+        for _process in _live_processes:
+            _process.terminate()  # SIGTERM; stops gracefully
+        for _process in _live_processes:
+            _process.join(timeout=STOP_PROCESS_TIMEOUT)
+            if _process.is_alive():
+                logger.warning('%s did not stop gracefully; killing', _process.name)
+                _process.kill()
+
+    def _start_process(self, process_index: int) -> multiprocessing.process.BaseProcess:
+        connections.close_all()  # (do not share db connections with forked processes)
+        _process = self._mp_context.Process(
+            target=_run_daemon_process,
+            name=f'indexer-daemon-{process_index}',
+            kwargs={
+                'celery_app': self.celery_app,
+                'shards': self.shards_by_process[process_index],
+                'log_queue': self._log_queue,
+            },
+        )
+        _process.start()
+        logger.info('started %s (shards %s)', _process.name, self.shards_by_process[process_index])
+        return _process
+
+
+def _run_daemon_process(*, celery_app, shards, log_queue) -> None:
+    # (in a forked process)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # (leave ctrl-c to the supervisor)
+    logging.getLogger().handlers = [logging.handlers.QueueHandler(log_queue)]
+    _daemon_control = IndexerDaemonControl(celery_app, shards=shards)
+    signal.signal(signal.SIGTERM, lambda *_: _daemon_control.stop_event.set())
+    _daemon_control.start_all_daemonthreads()
+    try:
+        _daemon_control.stop_event.wait()
+    finally:
+        _daemon_control.stop_daemonthreads(wait=True)
+
+
 class KombuMessageConsumer(ConsumerMixin):
-    PREFETCH_COUNT = settings.ELASTICSEARCH['CHUNK_SIZE']
+    # (in messages, each of up to MAX_IDS_PER_MESSAGE target ids -- enough to fill the chunks in flight)
+    PREFETCH_COUNT = math.ceil(
+        settings.ELASTICSEARCH['CHUNK_SIZE']
+        * settings.ELASTICSEARCH['MAX_IN_FLIGHT_CHUNKS']
+        / settings.ELASTICSEARCH['MAX_IDS_PER_MESSAGE']
+    )
 
     should_stop: bool  # (from ConsumerMixin)
 
-    def __init__(self, *, kombu_connection, stop_event, message_callback, index_strategy):
+    def __init__(self, *, kombu_connection, stop_event, message_callback, index_strategy, shards=None):
         self.connection = kombu_connection
         self.__stop_event = stop_event
         self.__message_callback = message_callback
         self.__index_strategy = index_strategy
+        self.__shards = shards
 
     # overrides ConsumerMixin.run
     def run(self):
@@ -106,7 +232,7 @@ class KombuMessageConsumer(ConsumerMixin):
     # for ConsumerMixin -- specifies rabbit queues to consume, registers on_message callback
     def get_consumers(self, Consumer, channel):
         index_messenger = IndexMessenger(index_strategys=[self.__index_strategy])
-        queues = tuple(index_messenger.incoming_messagequeue_iter(channel))
+        queues = tuple(index_messenger.incoming_messagequeue_iter(channel, shards=self.__shards))
         logger.debug('%r: Consuming from queues %r', self, queues)
         return [
             Consumer(
@@ -181,13 +307,15 @@ class IndexerDaemon:
                 f' (message: {message})'
                 f' (supported message types: {self.index_strategy.supported_message_types})'
             )
-        # Keep blocking on put() until there's space in the queue or it's time to stop
-        while not self.stop_event.is_set():
-            try:
-                local_message_queue.put(daemon_message, timeout=UNPRESSURED_TIMEOUT)
-                break
-            except queue.Full:
-                continue
+        # one local message per target id (acked together, if packed in one message)
+        for _target_message in daemon_message.each_target_message():
+            # Keep blocking on put() until there's space in the queue or it's time to stop
+            while not self.stop_event.is_set():
+                try:
+                    local_message_queue.put(_target_message, timeout=UNPRESSURED_TIMEOUT)
+                    break
+                except queue.Full:
+                    continue
 
     def __repr__(self):
         return '<{}({})>'.format(self.__class__.__name__, self.index_strategy.strategy_name)
@@ -195,16 +323,37 @@ class IndexerDaemon:
 
 @dataclasses.dataclass
 class MessageHandlingLoop:
+    '''take chunks of messages from the local queue and handle them, a few chunks at a time
+
+    a few chunks are handled concurrently (so one chunk may load from the database while
+    another waits on elasticsearch) -- when enough are in flight, wait for one to finish
+    before taking more messages from the local queue (which in turn fills up and stops
+    taking messages from rabbitmq)
+
+    chunk size and in-flight chunk count adapt to how elasticsearch is coping
+    (see `share.search.chunk_rate.AdaptiveChunkRate`)
+
+    each message is acked only after its response from elasticsearch; messages for a target
+    already in flight wait for that chunk to finish (so docs are not updated out of order)
+    '''
     index_strategy: index_strategy.IndexStrategy
     message_type: messages.MessageType
     stop_event: threading.Event
     local_message_queue: queue.Queue
     log_prefix: str
     daemonthread_context: Callable[[], contextlib.AbstractContextManager]
-    _leftover_daemon_messages_by_target_id = None
 
     def __post_init__(self):
         self._reset_backoff_timeout()
+        self.chunk_rate = chunk_rate.AdaptiveChunkRate.for_strategy(self.index_strategy.strategy_name)
+        self._last_report_time = 0.0
+        self._in_flight_futures: set[concurrent.futures.Future] = set()
+        # state shared with chunk-handling threads (guarded by `_lock`):
+        self._lock = threading.Lock()
+        self._in_flight_target_ids: set[int] = set()
+        self._waiting_daemon_messages_by_target_id = collections.defaultdict(list)
+        self._leftover_daemon_messages_by_target_id = None
+        self._too_fast = False
 
     def start_thread(self):
         _thread = threading.Thread(target=self._the_loop_itself)
@@ -213,20 +362,23 @@ class MessageHandlingLoop:
 
     def _the_loop_itself(self):
         with self.daemonthread_context():
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.chunk_rate.max_in_flight_chunks,
+                thread_name_prefix=f'{self.index_strategy.strategy_name}.{self.message_type.name}',
+            )
             try:
                 while not self.stop_event.is_set():
                     try:
-                        self._handle_some_messages()
+                        self._handle_some_messages(_executor)
                     except TooFastSlowDown:
                         self._back_off()
-                    else:
-                        self._reset_backoff_timeout()
             except Exception as e:
                 sentry_sdk.capture_exception()
                 logger.exception('%sEncountered an unexpected error (%s)', self.log_prefix, e)
                 raise
             finally:
                 self.stop_event.set()
+                _executor.shutdown(wait=True)  # let in-flight chunks finish (and ack)
 
     def _raise_if_backfill_noncurrent(self):
         if self.message_type.is_backfill:
@@ -243,61 +395,163 @@ class MessageHandlingLoop:
                 )
 
     def _get_daemon_messages(self):
-        daemon_messages_by_target_id = self._leftover_daemon_messages_by_target_id
-        if daemon_messages_by_target_id is not None:
-            self._leftover_daemon_messages_by_target_id = None
-            return daemon_messages_by_target_id
-        daemon_messages_by_target_id = collections.defaultdict(list)
-        _chunk_size = settings.ELASTICSEARCH['CHUNK_SIZE']
+        with self._lock:
+            daemon_messages_by_target_id = self._leftover_daemon_messages_by_target_id
+            if daemon_messages_by_target_id is not None:
+                self._leftover_daemon_messages_by_target_id = None
+                return daemon_messages_by_target_id
+            # start with any messages that were waiting on a chunk no longer in flight
+            daemon_messages_by_target_id = collections.defaultdict(list)
+            for _target_id in list(self._waiting_daemon_messages_by_target_id.keys()):
+                if _target_id not in self._in_flight_target_ids:
+                    daemon_messages_by_target_id[_target_id] = (
+                        self._waiting_daemon_messages_by_target_id.pop(_target_id)
+                    )
+        _chunk_size = self.chunk_rate.chunk_size
         while len(daemon_messages_by_target_id) < _chunk_size and not self.stop_event.is_set():
             try:
-                # If we have any messages queued up, push them through ASAP
+                # If we have any messages queued up (or chunks in flight), push them through ASAP
                 daemon_message = self.local_message_queue.get(timeout=(
                     QUICK_TIMEOUT
-                    if daemon_messages_by_target_id
+                    if (daemon_messages_by_target_id or self._in_flight_futures)
                     else UNPRESSURED_TIMEOUT
                 ))
-                daemon_messages_by_target_id[daemon_message.target_id].append(daemon_message)
             except queue.Empty:
                 break
+            with self._lock:
+                if daemon_message.target_id in self._in_flight_target_ids:
+                    self._waiting_daemon_messages_by_target_id[daemon_message.target_id].append(daemon_message)
+                    continue
+            daemon_messages_by_target_id[daemon_message.target_id].append(daemon_message)
         return daemon_messages_by_target_id
 
-    def _handle_some_messages(self):
-        start_time = time.time()
-        doc_count, error_count = 0, 0
+    def _handle_some_messages(self, executor: concurrent.futures.Executor):
+        self._raise_if_any_chunk_failed()
+        self._wait_for_room_in_flight()
         daemon_messages_by_target_id = self._get_daemon_messages()
-        if daemon_messages_by_target_id:
+        # (if stopping, leave any messages unacked, for redelivery)
+        if daemon_messages_by_target_id and not self.stop_event.is_set():
             self._raise_if_backfill_noncurrent()
-            messages_chunk = messages.MessagesChunk(
-                message_type=self.message_type,
-                target_ids_chunk=tuple(daemon_messages_by_target_id.keys()),
+            with self._lock:
+                self._in_flight_target_ids.update(daemon_messages_by_target_id.keys())
+            self._in_flight_futures.add(
+                executor.submit(self._handle_messages_chunk, daemon_messages_by_target_id),
             )
-            for message_response in self.index_strategy.pls_handle_messages_chunk(messages_chunk):
-                if message_response.is_done:
-                    doc_count += 1
-                    logger.debug('%sHandled message: %s', self.log_prefix, message_response)
-                elif message_response.status_code == 429:  # 429 Too Many Requests
-                    self._leftover_daemon_messages_by_target_id = daemon_messages_by_target_id
-                    raise TooFastSlowDown
-                else:
-                    error_count += 1
-                    logger.error('%sEncountered error: %s', self.log_prefix, message_response.error_text)
-                    sentry_sdk.capture_message('error handling message', extras={'message_response': message_response})
-                target_id = message_response.index_message.target_id
-                for daemon_message in daemon_messages_by_target_id.pop(target_id, ()):
-                    daemon_message.ack()  # finally set it free
-            if daemon_messages_by_target_id:  # should be empty by now
-                logger.error('%sUnhandled messages?? %s', self.log_prefix, len(daemon_messages_by_target_id))
-                sentry_sdk.capture_message(
-                    'unhandled daemon messages!',
-                    extras={
-                        'message_type': self.message_type,
-                        'target_ids': tuple(daemon_messages_by_target_id.keys()),
-                    },
+
+    def _wait_for_room_in_flight(self):
+        # backpressure: take no more messages until an in-flight chunk finishes
+        while len(self._in_flight_futures) >= self.chunk_rate.in_flight_chunks and not self.stop_event.is_set():
+            concurrent.futures.wait(
+                self._in_flight_futures,
+                timeout=UNPRESSURED_TIMEOUT,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            self._raise_if_any_chunk_failed()
+
+    def _raise_if_any_chunk_failed(self):
+        _done_futures = {_future for _future in self._in_flight_futures if _future.done()}
+        self._in_flight_futures -= _done_futures
+        for _future in _done_futures:
+            self.chunk_rate.observe(_future.result())  # (raises any unexpected error)
+        if _done_futures:
+            self._maybe_report_chunk_rate()
+        with self._lock:
+            _too_fast, self._too_fast = self._too_fast, False
+        if _too_fast:
+            raise TooFastSlowDown
+        if _done_futures:
+            self._reset_backoff_timeout()
+
+    def _maybe_report_chunk_rate(self):
+        _now = time.monotonic()
+        if _now - self._last_report_time < settings.INDEXER_CHUNK_RATE['REPORT_SECONDS']:
+            return
+        self._last_report_time = _now
+        try:
+            IndexerDaemonStatus.objects.report(
+                index_strategy_name=self.index_strategy.strategy_name,
+                message_type=self.message_type.name,
+                daemon_name=f'{socket.gethostname()}:{os.getpid()}',
+                chunk_rate=self.chunk_rate.as_status(),
+                parsed_turtle_cache=parsed_turtle_cache_stats(),
+            )
+        except Exception as e:  # status is nice-to-have; keep indexing
+            logger.warning('%sCould not report chunk rate (%r)', self.log_prefix, e)
+
+    def _handle_messages_chunk(self, daemon_messages_by_target_id) -> chunk_rate.ChunkOutcome:
+        # (runs in a chunk-handling thread)
+        start_time = time.time()
+        _outcome = chunk_rate.ChunkOutcome()
+        _target_ids = tuple(daemon_messages_by_target_id.keys())
+        _indexed_target_ids: list[int] = []
+        _failed_target_ids: list[int] = []
+        try:
+            with self.daemonthread_context():
+                messages_chunk = messages.MessagesChunk(
+                    message_type=self.message_type,
+                    target_ids_chunk=_target_ids,
                 )
-        time_elapsed = time.time() - start_time
-        if doc_count or error_count:
-            logger.info('%sIndexed %d documents in %.02fs (with %d errors)', self.log_prefix, doc_count, time_elapsed, error_count)
+                for message_response in self.index_strategy.pls_handle_messages_chunk(messages_chunk):
+                    if message_response.is_done:
+                        _outcome.doc_count += 1
+                        logger.debug('%sHandled message: %s', self.log_prefix, message_response)
+                    elif message_response.status_code == 429:  # 429 Too Many Requests
+                        _outcome.pressure_count += 1
+                        self._stash_leftovers(daemon_messages_by_target_id)
+                        break
+                    else:
+                        if message_response.status_code in chunk_rate.PRESSURE_STATUS_CODES:
+                            _outcome.pressure_count += 1
+                        _outcome.error_count += 1
+                        logger.error('%sEncountered error: %s', self.log_prefix, message_response.error_text)
+                        sentry_sdk.capture_message('error handling message', extras={'message_response': message_response})
+                    target_id = message_response.index_message.target_id
+                    (_indexed_target_ids if message_response.is_done else _failed_target_ids).append(target_id)
+                    for daemon_message in daemon_messages_by_target_id.pop(target_id, ()):
+                        if message_response.is_done:
+                            daemon_message.ack()  # finally set it free
+                        else:
+                            daemon_message.ack_failed()
+                else:
+                    self._log_if_unhandled(daemon_messages_by_target_id)
+                if self.message_type.is_backfill and (_indexed_target_ids or _failed_target_ids):
+                    self._note_backfill_progress(_indexed_target_ids, _failed_target_ids)
+        finally:
+            with self._lock:
+                self._in_flight_target_ids.difference_update(_target_ids)
+        _outcome.seconds = time.time() - start_time
+        if _outcome.doc_count or _outcome.error_count:
+            logger.info(
+                '%sIndexed %d documents in %.02fs (with %d errors)',
+                self.log_prefix, _outcome.doc_count, _outcome.seconds, _outcome.error_count,
+            )
+        return _outcome
+
+    def _note_backfill_progress(self, indexed_target_ids, failed_target_ids):
+        try:
+            self.index_strategy.get_or_create_backfill().pls_note_indexed(indexed_target_ids, failed_target_ids)
+        except Exception as e:  # progress is nice-to-have; keep indexing
+            logger.warning('%sCould not note backfill progress (%r)', self.log_prefix, e)
+
+    def _log_if_unhandled(self, daemon_messages_by_target_id):
+        if daemon_messages_by_target_id:  # should be empty by now
+            logger.error('%sUnhandled messages?? %s', self.log_prefix, len(daemon_messages_by_target_id))
+            sentry_sdk.capture_message(
+                'unhandled daemon messages!',
+                extras={
+                    'message_type': self.message_type,
+                    'target_ids': tuple(daemon_messages_by_target_id.keys()),
+                },
+            )
+
+    def _stash_leftovers(self, daemon_messages_by_target_id):
+        # unacked messages to try again, after backing off
+        with self._lock:
+            if self._leftover_daemon_messages_by_target_id is None:
+                self._leftover_daemon_messages_by_target_id = collections.defaultdict(list)
+            for _target_id, _daemon_messages in daemon_messages_by_target_id.items():
+                self._leftover_daemon_messages_by_target_id[_target_id].extend(_daemon_messages)
+            self._too_fast = True
 
     def _reset_backoff_timeout(self):
         self._backoff_timeout = UNPRESSURED_TIMEOUT
@@ -1,9 +1,13 @@
 import contextlib
+import functools
 import logging
+import threading
+import time
 import typing
 import urllib.parse
 
 import celery
+from celery import signals as celery_signals
 from django.conf import settings
 import kombu
 import kombu.simple
@@ -33,6 +37,24 @@ class IndexMessenger:
             else celery_app
         )
         self.index_strategys = index_strategys or tuple(index_strategy.each_strategy())
+        self.shard_count = settings.ELASTICSEARCH['MESSAGEQUEUE_SHARD_COUNT']
+
+    def shard_for_target_id(self, target_id: int) -> int:
+        return target_id % self.shard_count
+
+    def messagequeue_name(self, strategy, *, urgent: bool, shard: int = 0) -> str:
+        _queue_name = (
+            strategy.urgent_messagequeue_name
+            if urgent
+            else strategy.nonurgent_messagequeue_name
+        )
+        # (shard zero keeps the unsharded name)
+        return (f'{_queue_name}.shard{shard}' if shard else _queue_name)
+
+    def each_messagequeue_name(self, strategy, *, shards: typing.Iterable[int] | None = None) -> typing.Iterator[str]:
+        for _shard in (range(self.shard_count) if shards is None else shards):
+            yield self.messagequeue_name(strategy, urgent=True, shard=_shard)
+            yield self.messagequeue_name(strategy, urgent=False, shard=_shard)
 
     def notify_indexcard_update(self, indexcards: list[Indexcard], *, urgent=False) -> None:
         self.send_messages_chunk(
@@ -60,22 +82,46 @@ class IndexMessenger:
             urgent=urgent,
         )
 
-    def incoming_messagequeue_iter(self, channel) -> typing.Iterable[kombu.Queue]:
+    def incoming_messagequeue_iter(self, channel, *, shards: typing.Iterable[int] | None = None) -> typing.Iterable[kombu.Queue]:
+        '''queues to consume from -- all shards, by default'''
         for _index_strategy in self.index_strategys:
-            yield kombu.Queue(channel=channel, name=_index_strategy.urgent_messagequeue_name)
-            yield kombu.Queue(channel=channel, name=_index_strategy.nonurgent_messagequeue_name)
+            for _queue_name in self.each_messagequeue_name(_index_strategy, shards=shards):
+                yield kombu.Queue(channel=channel, name=_queue_name)
 
-    def outgoing_messagequeue_iter(self, connection, message_type: MessageType, urgent: bool) -> typing.Iterable[kombu.simple.SimpleQueue]:
+    def outgoing_messagequeue_iter(
+        self,
+        connection,
+        message_type: MessageType,
+        urgent: bool,
+        shard: int = 0,
+    ) -> typing.Iterable[kombu.simple.SimpleQueue]:
         for _index_strategy in self.index_strategys:
             if message_type in _index_strategy.supported_message_types:
                 yield connection.SimpleQueue(
-                    name=(
-                        _index_strategy.urgent_messagequeue_name
-                        if urgent
-                        else _index_strategy.nonurgent_messagequeue_name
-                    ),
+                    name=self.messagequeue_name(_index_strategy, urgent=urgent, shard=shard),
                 )
 
+    def get_queue_depth(self, message_type: MessageType, *, urgent: bool) -> int:
+        '''count messages waiting in queues (all shards) for the given message type
+
+        (asks the broker by passive declare; unlike `get_queue_stats`, needs no management api)
+        '''
+        _queue_depth = 0
+        with self.celery_app.pool.acquire(block=True) as connection:
+            for _index_strategy in self.index_strategys:
+                if message_type not in _index_strategy.supported_message_types:
+                    continue
+                for _shard in range(self.shard_count):
+                    _queue_name = self.messagequeue_name(_index_strategy, urgent=urgent, shard=_shard)
+                    # (new channel for each, as a failed passive declare closes its channel)
+                    with connection.channel() as _channel:
+                        try:
+                            _declared = _channel.queue_declare(queue=_queue_name, passive=True)
+                        except connection.channel_errors:
+                            continue  # no such queue (yet) -- nothing waiting
+                        _queue_depth += _declared.message_count
+        return _queue_depth
+
     def get_queue_stats(self, queue_name: str):
         try:
             rabbitmqueuerl = urllib.parse.urlunsplit((
@@ -134,14 +180,166 @@ class IndexMessenger:
     @contextlib.contextmanager
     def _open_message_queues(self, message_type, urgent):
         with self.celery_app.pool.acquire(block=True) as connection:
-            with contextlib.ExitStack() as queue_stack:
-                yield tuple(
+            with self._message_queues_on(connection, message_type, urgent) as message_queues:
+                yield message_queues
+
+    @contextlib.contextmanager
+    def _message_queues_on(self, connection, message_type, urgent):
+        # yields a function from shard to message queues (opened as needed)
+        with contextlib.ExitStack() as queue_stack:
+            @functools.cache
+            def _message_queues_for_shard(shard: int) -> tuple[kombu.simple.SimpleQueue, ...]:
+                return tuple(
                     queue_stack.enter_context(messagequeue)
-                    for messagequeue in self.outgoing_messagequeue_iter(connection, message_type, urgent)
+                    for messagequeue in self.outgoing_messagequeue_iter(connection, message_type, urgent, shard)
                 )
+            yield _message_queues_for_shard
+
+    def _put_messages_chunk(self, messages_chunk, message_queues_for_shard):
+        # (many target ids per message, so group by shard first)
+        _target_ids_by_shard: dict[int, list[int]] = {}
+        for _target_id in messages_chunk.target_ids_chunk:
+            _target_ids_by_shard.setdefault(self.shard_for_target_id(_target_id), []).append(_target_id)
+        for _shard, _target_ids in _target_ids_by_shard.items():
+            _shard_chunk = MessagesChunk(messages_chunk.message_type, _target_ids)
+            for message_dict in _shard_chunk.as_dicts():
+                for message_queue in message_queues_for_shard(_shard):
+                    logger.debug('putting %s into %s', message_dict, message_queue.queue)
+                    message_queue.put(message_dict, retry=True, retry_policy=self.retry_policy)
+
+
+class BufferedIndexMessenger(IndexMessenger):
+    '''IndexMessenger that accumulates target ids (de-duplicated, per message type and urgency)
+    and publishes them together -- when the buffer is full or old enough, or on `flush()`
+
+    ids that fail to publish stay buffered for the next flush (and the error is raised to
+    whatever sent the ids that filled the buffer); with `flush_when_idle`, a buffer not
+    filled in time is flushed from a timer thread (so ids wait no longer than
+    `max_buffer_seconds`, even with nothing more sent) and failed flushes are only logged
+    (the buffer is shared, so not charged to whatever sent the last ids; tried again later)
+    '''
+    def __init__(
+        self, *,
+        max_buffer_size=None,
+        max_buffer_seconds=None,
+        flush_when_idle: bool = False,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.max_buffer_size = (
+            settings.INDEX_MESSENGER_BUFFER['MAX_SIZE']
+            if max_buffer_size is None
+            else max_buffer_size
+        )
+        self.max_buffer_seconds = (
+            settings.INDEX_MESSENGER_BUFFER['MAX_SECONDS']
+            if max_buffer_seconds is None
+            else max_buffer_seconds
+        )
+        # (dicts as ordered sets)
+        self._buffer: dict[tuple[MessageType, bool], dict[int, None]] = {}
+        self._buffer_size = 0
+        self._buffer_started: float | None = None
+        self._lock = threading.Lock()
+        self._flush_when_idle = flush_when_idle
+        self._flush_timer: threading.Timer | None = None
+
+    def __enter__(self) -> typing.Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size
 
-    def _put_messages_chunk(self, messages_chunk, message_queues):
-        for message_dict in messages_chunk.as_dicts():
-            for message_queue in message_queues:
-                logger.debug('putting %s into %s', message_dict, message_queue.queue)
-                message_queue.put(message_dict, retry=True, retry_policy=self.retry_policy)
+    # override IndexMessenger
+    def send_messages_chunk(self, messages_chunk: MessagesChunk, *, urgent=False):
+        with self._lock:
+            self._add_to_buffer({
+                (messages_chunk.message_type, urgent): messages_chunk.target_ids_chunk,
+            })
+            _should_flush = (
+                self._buffer_size >= self.max_buffer_size
+                or (time.monotonic() - self._buffer_started) >= self.max_buffer_seconds
+            )
+        if _should_flush:
+            if self._flush_when_idle:
+                self._flush_quietly()
+            else:
+                self.flush()
+
+    def flush(self) -> None:
+        '''publish all buffered messages, in one broker session'''
+        with self._lock:
+            _buffer = self._buffer
+            self._buffer = {}
+            self._buffer_size = 0
+            self._buffer_started = None
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        if not _buffer:
+            return
+        try:
+            with self.celery_app.pool.acquire(block=True) as connection:
+                for (_message_type, _urgent), _target_ids in _buffer.items():
+                    with self._message_queues_on(connection, _message_type, _urgent) as _message_queues:
+                        self._put_messages_chunk(MessagesChunk(_message_type, list(_target_ids)), _message_queues)
+        except Exception:
+            with self._lock:  # keep for the next flush
+                self._add_to_buffer(_buffer)
+            raise
+
+    def _add_to_buffer(self, target_ids_by_key) -> None:
+        # (call with lock held)
+        for _key, _target_ids in target_ids_by_key.items():
+            _buffered_ids = self._buffer.setdefault(_key, {})
+            _prior_count = len(_buffered_ids)
+            _buffered_ids.update(dict.fromkeys(_target_ids))
+            self._buffer_size += len(_buffered_ids) - _prior_count
+        if self._buffer_started is None:
+            self._buffer_started = time.monotonic()
+            if self._flush_when_idle and self._buffer:
+                self._flush_timer = threading.Timer(self.max_buffer_seconds, self._flush_quietly)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_quietly(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            # (still buffered, with a new timer -- see `flush`)
+            sentry_sdk.capture_exception()
+            logger.exception('failed to flush buffered index messages (will try again)')
+
+
+_WORKER_INDEX_MESSENGER: BufferedIndexMessenger | None = None
+
+
+def get_worker_index_messenger(celery_app=None) -> IndexMessenger:
+    '''get this (worker) process's IndexMessenger -- unbuffered, unless enabled in settings
+
+    unbuffered (by default), ids are published before the sending task is acked; buffered
+    (opt-in), target ids sent from many celery tasks are coalesced in one shared buffer,
+    flushed when full or old enough and at worker shutdown -- so a task may be acked while
+    its ids wait, up to `MAX_SECONDS`, in the buffer (and lost, if the worker is killed)
+    '''
+    global _WORKER_INDEX_MESSENGER
+    if not settings.INDEX_MESSENGER_BUFFER['ENABLED']:
+        return IndexMessenger(celery_app=celery_app)
+    if _WORKER_INDEX_MESSENGER is None:
+        _WORKER_INDEX_MESSENGER = BufferedIndexMessenger(celery_app=celery_app, flush_when_idle=True)
+    return _WORKER_INDEX_MESSENGER
+
+
+@celery_signals.worker_process_shutdown.connect
+def _flush_worker_index_messenger(**kwargs) -> None:
+    if _WORKER_INDEX_MESSENGER is not None:
+        try:
+            _WORKER_INDEX_MESSENGER.flush()
+        except Exception:
+            # (shutting down -- nothing more to try)
+            sentry_sdk.capture_exception()
+            logger.exception('failed to flush buffered index messages at shutdown')
@@ -146,9 +146,13 @@ If you made these changes on purpose, pls update {self.__class__.__qualname__} w
         return index_backfill
 
     def pls_start_backfill(self):
-        self.get_or_create_backfill().pls_start(self)
+        _index_backfill = self.get_or_create_backfill()
+        _index_backfill.pls_start(self)
+        if _index_backfill.backfill_status != IndexBackfill.ERROR:
+            self.pls_start_bulk_load()  # (only once started, so a failed start leaves settings alone)
 
     def pls_mark_backfill_complete(self):
+        self.pls_stop_bulk_load()
         self.get_or_create_backfill().pls_mark_complete()
         self.pls_refresh()  # explicit refresh after backfill
 
@@ -260,6 +264,12 @@ If you made these changes on purpose, pls update {self.__class__.__qualname__} w
     def pls_handle_search__passthru(self, request_body=None, request_queryparams=None) -> dict:
         raise NotImplementedError(f'{self.__class__.__name__} does not implement pls_handle_search__passthru (either implement it or don\'t use this strategy for that)')
 
+    def pls_start_bulk_load(self) -> None:
+        '''prepare indexes (not yet searched) for faster backfill (by default, do nothing)'''
+
+    def pls_stop_bulk_load(self) -> None:
+        '''undo `pls_start_bulk_load`, ready for searching (by default, do nothing)'''
+
     # IndexStrategy.SpecificIndex must be implemented by subclasses
     # in their own `class SpecificIndex(IndexStrategy.SpecificIndex)`
     @dataclasses.dataclass
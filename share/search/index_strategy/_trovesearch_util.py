@@ -1,7 +1,6 @@
 from __future__ import annotations
 import base64
 from collections import defaultdict
-import contextlib
 import dataclasses
 import datetime
 import functools
@@ -9,10 +8,8 @@ import json
 import logging
 import typing
 
-from django.db.models import Exists, OuterRef
 from primitive_metadata import primitive_rdf as rdf
 
-from trove import models as trove_db
 from trove.trovesearch.search_params import (
     is_globpath,
     Propertypath,
@@ -21,7 +18,6 @@ from trove.util.iris import get_sufficiently_unique_iri, is_worthwhile_iri
 from trove.vocab.namespaces import (
     OWL,
     RDF,
-    TROVE,
     XSD,
 )
 from trove.vocab import osfmap
@@ -46,25 +42,6 @@ TEXT_MAPPING = {
 ###
 # utilities
 
-def latest_resource_description_for_indexcard_pks(indexcard_pks):
-    return (
-        trove_db.LatestResourceDescription.objects
-        .filter(indexcard_id__in=indexcard_pks)
-        .filter(Exists(  # only index items that have an osfmap_json representation
-            trove_db.DerivedIndexcard.objects
-            .filter(upriver_indexcard_id=OuterRef('indexcard_id'))
-            .filter(deriver_identifier__in=(
-                trove_db.ResourceIdentifier.objects
-                .queryset_for_iri(TROVE['derive/osfmap_json'])
-            ))
-        ))
-        .exclude(indexcard__deleted__isnull=False)
-        .select_related('indexcard__source_record_suid__source_config')
-        .prefetch_related('indexcard__focus_identifier_set')
-        .prefetch_related('indexcard__supplementary_description_set')
-    )
-
-
 def iri_synonyms(iri: str, rdfdoc: rdf.RdfGraph) -> set[str]:
     # note: extremely limited inference -- assumes objects of owl:sameAs are not used as subjects
     _synonyms = (
@@ -121,6 +98,11 @@ class GraphWalk:
     - `text_values`, `date_values`, and `integer_values` contain literal values encountered
       "close to" the focus (meaning no IRI-identified resources along the path), with special
       exception to include more distant paths from osfmap.EXTRA_INDEXED_LITERAL_PATHS
+
+    each graph edge is traversed once per `memo` (shared by `shortwalk_from`), so getting
+    a shortwalk from every IRI value is O(edges) in traversal, instead of O(IRIs * edges)
+    -- reading the values out is still proportional to the values read
+    (resources on a cycle are the exception: walked again for each path that reaches them)
     '''
     rdfdoc: rdf.RdfGraph
     focus_iri: str
@@ -138,8 +120,13 @@ class GraphWalk:
         default_factory=_dict_of_sets,
     )
     paths_walked: set[Propertypath] = dataclasses.field(default_factory=set)
+    memo: GraphWalkMemo | None = dataclasses.field(default=None, kw_only=True, repr=False)
 
     def __post_init__(self):
+        # (the focus is on the path of every step, so walks the same whether excluded or not)
+        _excluded = frozenset((*self.already_visiting, self.focus_iri))
+        if (self.memo is None) or (self.memo.excluded_iris | {self.focus_iri} != _excluded):
+            self.memo = GraphWalkMemo(self.rdfdoc, _excluded)
         for _walk_path, _walk_obj in self._walk_from_subject(self.focus_iri):
             self.paths_walked.add(_walk_path)
             if isinstance(_walk_obj, datetime.date):
@@ -172,8 +159,14 @@ class GraphWalk:
             self.rdfdoc,
             from_iri,
             already_visiting={*self.already_visiting, self.focus_iri},
+            memo=self.memo,
         )
 
+    def suffuniq_synonyms(self, iris: typing.Iterable[str]) -> list[str]:
+        '''sufficiently-unique iris for the given iris and their synonyms (deduplicated, may reorder)'''
+        assert self.memo is not None
+        return self.memo.suffuniq_synonyms(iris)
+
     def _should_keep_literal(
         self,
         path: Propertypath,
@@ -189,36 +182,31 @@ class GraphWalk:
             and path[-1] not in osfmap.SKIPPABLE_PROPERTIES  # note: osfmap-specific
         )
 
-    def _should_keep_related_resource(
-        self,
-        path: Propertypath,
-        obj: rdf.RdfObject,
-    ) -> bool:
-        assert path
-        return (path[-1] not in osfmap.SKIPPABLE_PROPERTIES)  # note: osfmap-specific
-
-    def _walk_from_subject(
-        self,
-        iri: str,
-        path_so_far: tuple[str, ...] = (),
-    ) -> typing.Iterator[tuple[Propertypath, rdf.RdfObject]]:
+    def _walk_from_subject(self, iri: str) -> typing.Iterator[tuple[Propertypath, rdf.RdfObject]]:
         '''walk the graph from the given subject, yielding (pathkey, obj) for every reachable object
 
-        if `path_so_far` is non-empty then only IRIs will be yielded, not literal values
-        (recommend value-search to find the IRIs you need)
+        only IRIs will be yielded from beyond the subject, not literal values
+        (recommend value-search to find the IRIs you need), with exceptions for
+        osfmap.EXTRA_INDEXED_LITERAL_PATHS
         '''
+        assert self.memo is not None
         if iri in self.already_visiting:
             return
-        with self._visit(iri):
-            _twoples = self.rdfdoc.tripledict.get(iri, {})
-            for _next_steps, _obj in walk_twoples(_twoples):
-                _path = (*path_so_far, *_next_steps)
-                if isinstance(_obj, str):  # IRI
-                    if self._should_keep_related_resource(_path, _obj):
-                        yield (_path, _obj)
-                        yield from self._walk_from_subject(_obj, path_so_far=_path)
-                elif self._should_keep_literal(_path, _obj, close_to_focus=(not path_so_far)):
-                    yield (_path, _obj)
+        yield from self._read_subwalk(self.memo.subwalk(iri))
+
+    def _read_subwalk(
+        self,
+        subwalk: Subwalk,
+        path_so_far: tuple[str, ...] = (),
+    ) -> typing.Iterator[tuple[Propertypath, rdf.RdfObject]]:
+        for _next_steps, _obj, _next_subwalk in subwalk.steps:
+            _path = (*path_so_far, *_next_steps)
+            if isinstance(_obj, str):  # IRI
+                yield (_path, _obj)
+                if _next_subwalk is not None:
+                    yield from self._read_subwalk(_next_subwalk, path_so_far=_path)
+            elif self._should_keep_literal(_path, _obj, close_to_focus=(not path_so_far)):
+                yield (_path, _obj)
 
     @functools.cached_property
     def paths_by_iri(self) -> dict[str, set[Propertypath]]:
@@ -229,12 +217,106 @@ class GraphWalk:
         _paths_by_iri.default_factory = None  # now behave as a normal dictionary
         return _paths_by_iri
 
-    @contextlib.contextmanager
-    def _visit(self, focus_obj):
-        assert focus_obj not in self.already_visiting
-        self.already_visiting.add(focus_obj)
-        yield
-        self.already_visiting.discard(focus_obj)
+
+@dataclasses.dataclass(frozen=True)
+class Subwalk:
+    '''Subwalk: one resource's steps in a GraphWalk, each with the subwalk from its IRI object
+
+    (`next_subwalk` is None for literals, for IRIs excluded from the walk, and for IRIs
+    already being visited along the path -- nothing more to walk from there)
+    '''
+    iri: str
+    steps: tuple[tuple[Propertypath, rdf.RdfObject, Subwalk | None], ...]
+
+
+@dataclasses.dataclass
+class GraphWalkMemo:
+    '''GraphWalkMemo: subwalks (and iri synonyms) for one RDF document, built once each
+
+    subwalks are shared by every walk that reaches them, as long as that can't change
+    the result -- any resource on a cycle (which would be cut short differently depending
+    on the path taken) is walked again each time
+    '''
+    rdfdoc: rdf.RdfGraph
+    excluded_iris: frozenset[str]  # not walked from (tho may be reached)
+    _acyclic_subwalks: dict[str, Subwalk] = dataclasses.field(default_factory=dict)
+    _depth_by_visiting_iri: dict[str, int] = dataclasses.field(default_factory=dict)
+    _synonyms: dict[str, frozenset[str]] = dataclasses.field(default_factory=dict)
+    _suffuniq: dict[str, str] = dataclasses.field(default_factory=dict)
+
+    def subwalk(self, iri: str) -> Subwalk:
+        try:
+            return self._acyclic_subwalks[iri]
+        except KeyError:
+            _subwalk, _ = self._build_subwalk(iri)
+            return _subwalk
+
+    def iri_synonyms(self, iri: str) -> frozenset[str]:
+        try:
+            return self._synonyms[iri]
+        except KeyError:
+            _synonyms = self._synonyms[iri] = frozenset(iri_synonyms(iri, self.rdfdoc))
+            return _synonyms
+
+    def suffuniq_iri(self, iri: str) -> str:
+        try:
+            return self._suffuniq[iri]
+        except KeyError:
+            _suffuniq = self._suffuniq[iri] = get_sufficiently_unique_iri(iri)
+            return _suffuniq
+
+    def suffuniq_synonyms(self, iris: typing.Iterable[str]) -> list[str]:
+        _synonyms = {
+            _synonym
+            for _iri in iris
+            for _synonym in self.iri_synonyms(_iri)
+        }
+        return list({self.suffuniq_iri(_synonym) for _synonym in _synonyms})
+
+    def _build_subwalk(self, iri: str) -> tuple[Subwalk, int | None]:
+        '''walk from the given iri, recording steps (memoized, if not on a cycle)
+
+        returns the subwalk and the shallowest depth (on the current path) where the walk
+        was cut short by reaching an iri already being visited, or None if never
+        '''
+        _depth = len(self._depth_by_visiting_iri)
+        self._depth_by_visiting_iri[iri] = _depth
+        _shallowest_cut: int | None = None
+        _steps = []
+        try:
+            for _next_steps, _obj in walk_twoples(self.rdfdoc.tripledict.get(iri, {})):
+                _next_subwalk = None
+                if isinstance(_obj, str):  # IRI
+                    if not self._should_keep_related_resource(_next_steps, _obj):
+                        continue
+                    _cut = None
+                    if _obj in self.excluded_iris:
+                        pass  # cut short the same on every path
+                    elif _obj in self._depth_by_visiting_iri:
+                        _cut = self._depth_by_visiting_iri[_obj]
+                    elif _obj in self._acyclic_subwalks:
+                        _next_subwalk = self._acyclic_subwalks[_obj]
+                    else:
+                        _next_subwalk, _cut = self._build_subwalk(_obj)
+                    if (_cut is not None) and (_shallowest_cut is None or _cut < _shallowest_cut):
+                        _shallowest_cut = _cut
+                _steps.append((_next_steps, _obj, _next_subwalk))
+        finally:
+            del self._depth_by_visiting_iri[iri]
+        _subwalk = Subwalk(iri, tuple(_steps))
+        # if never cut short at this iri or any before it on the path, it's on no cycle,
+        # so walking from it gets the same steps regardless of the path taken to get here
+        if (_shallowest_cut is None) or (_shallowest_cut > _depth):
+            self._acyclic_subwalks[iri] = _subwalk
+        return _subwalk, _shallowest_cut
+
+    def _should_keep_related_resource(
+        self,
+        steps: Propertypath,
+        obj: rdf.RdfObject,
+    ) -> bool:
+        assert steps
+        return (steps[-1] not in osfmap.SKIPPABLE_PROPERTIES)  # note: osfmap-specific
 
 
 def walk_twoples(
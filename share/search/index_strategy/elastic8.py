@@ -4,7 +4,10 @@ import collections
 from collections.abc import Mapping
 import dataclasses
 import functools
+import hashlib
 from http import HTTPStatus
+import itertools
+import json
 import logging
 import types
 import typing
@@ -12,7 +15,15 @@ import typing
 from django.conf import settings
 import elasticsearch8
 from elasticsearch8.helpers import streaming_bulk
+from elasticsearch8.serializer import JsonSerializer, NdjsonSerializer
 
+try:
+    from elasticsearch8.serializer import OrjsonSerializer
+except ImportError:  # optional (with "orjson"); fall back to stdlib json
+    OrjsonSerializer = None
+
+from share.models.indexed_sourcehashes import IndexedSourcehashes
+from share.search.exceptions import IndexStrategyError
 from share.search.index_strategy._base import IndexStrategy
 from share.search.index_status import IndexStatus
 from share.search import messages
@@ -27,10 +38,26 @@ from ._indexnames import (
 logger = logging.getLogger(__name__)
 
 
+SOURCEHASH_BATCH_SIZE = 100  # message targets per sourcehash query
+
+JSON = 'json'
+ORJSON = 'orjson'
+
+
 class Elastic8IndexStrategy(IndexStrategy):
     '''abstract base class for index strategies using elasticsearch 8
     '''
     index_definitions: typing.ClassVar[dict[str, IndexDefinition]]
+    # to skip unchanged docs (when `ELASTICSEARCH['SKIP_UNCHANGED_DOCS']`), set to the
+    # top-level `_source` fields to ignore when comparing (None for "never skip")
+    SOURCEHASH_EXCLUDED_FIELDS: typing.ClassVar[frozenset[str] | None] = None
+    # index settings while backfilling an index not yet searched (restored from the
+    # index definition -- or elasticsearch defaults -- when the backfill is complete)
+    BULK_LOAD_SETTINGS: typing.ClassVar[Mapping[str, typing.Any]] = types.MappingProxyType({
+        'number_of_replicas': 0,
+        'refresh_interval': '-1',
+        'translog.durability': 'async',
+    })
 
     ###
     # for use when defining abstract methods in subclasses
@@ -64,7 +91,11 @@ class Elastic8IndexStrategy(IndexStrategy):
         self,
         messages_chunk: messages.MessagesChunk,
         affected_indexnames: typing.Iterable[str],
+        *,
+        scrapless_keys: typing.Collection[tuple[str, int]] = (),
     ) -> None:
+        # (`scrapless_keys`: (indexname, message_target_id) pairs with all docs no longer
+        # built already deleted by id -- see SOURCEHASH_EXCLUDED_FIELDS)
         ...  # implement when needed
 
     ###
@@ -142,6 +173,10 @@ class Elastic8IndexStrategy(IndexStrategy):
             sniff_on_node_failure=should_sniff,
             sniff_timeout=timeout,
             min_delay_between_sniffing=timeout,
+            # throughput:
+            http_compress=settings.ELASTICSEARCH['HTTP_COMPRESS'],
+            connections_per_node=settings.ELASTICSEARCH['CONNECTIONS_PER_NODE'],
+            serializers=get_es8_serializers(settings.ELASTICSEARCH['SERIALIZER']),
         )
 
     @property
@@ -175,9 +210,14 @@ class Elastic8IndexStrategy(IndexStrategy):
     def pls_handle_messages_chunk(self, messages_chunk):
         self.assert_message_type(messages_chunk.message_type)
         _action_tracker = _ActionTracker()
+        _sourcehash_tracker = (
+            _SourcehashTracker(self.SOURCEHASH_EXCLUDED_FIELDS)
+            if self.skips_unchanged_docs
+            else None
+        )
         _bulk_stream = streaming_bulk(
             self.es8_client,
-            self._elastic_actions_with_index(messages_chunk, _action_tracker),
+            self._elastic_actions_with_index(messages_chunk, _action_tracker, _sourcehash_tracker),
             raise_on_error=False,
             max_retries=settings.ELASTICSEARCH['MAX_RETRIES'],
         )
@@ -201,6 +241,8 @@ class Elastic8IndexStrategy(IndexStrategy):
                     _action_tracker.forget_message(_finished_message_id)
             else:
                 _action_tracker.action_errored(_indexname, _docid)
+                if _sourcehash_tracker is not None:
+                    _sourcehash_tracker.action_errored(_indexname, _action_tracker.get_message_id(_docid))
                 yield messages.IndexMessageResponse(
                     is_done=False,
                     index_message=messages.IndexMessage(
@@ -217,10 +259,31 @@ class Elastic8IndexStrategy(IndexStrategy):
                 status_code=HTTPStatus.OK.value,
                 error_text=None,
             )
-        self.after_chunk(messages_chunk, _affected_indexnames)
+        if _sourcehash_tracker is None:
+            self.after_chunk(messages_chunk, _affected_indexnames)
+        else:
+            _sourcehash_tracker.save()
+            self.after_chunk(
+                messages_chunk,
+                _affected_indexnames,
+                scrapless_keys=_sourcehash_tracker.scrapless_keys,
+            )
+
+    @property
+    def skips_unchanged_docs(self) -> bool:
+        return (
+            settings.ELASTICSEARCH['SKIP_UNCHANGED_DOCS']
+            and (self.SOURCEHASH_EXCLUDED_FIELDS is not None)
+        )
 
     # abstract method from IndexStrategy
     def pls_make_default_for_searching(self):
+        for _index in self.each_subnamed_index():
+            if _index.is_bulk_loading():
+                raise IndexStrategyError(
+                    f'{_index.full_index_name} still has bulk-load settings'
+                    ' (mark backfill complete before making default for searching)'
+                )
         self._set_indexnames_for_alias(
             self._alias_for_searching,
             {self.indexname_wildcard},
@@ -256,6 +319,34 @@ class Elastic8IndexStrategy(IndexStrategy):
             params=(request_queryparams or {}),
         )
 
+    # override from IndexStrategy
+    def pls_start_bulk_load(self):
+        if self.pls_get_default_for_searching() == self:
+            logger.warning('%s: already default for searching; not bulk-loading', self.strategy_name)
+            return
+        for _index in self.each_subnamed_index():
+            _index.pls_start_bulk_load()
+
+    # override from IndexStrategy
+    def pls_stop_bulk_load(self):
+        _indexnames = []
+        for _index in self.each_subnamed_index():
+            _index.pls_stop_bulk_load()
+            _indexnames.append(_index.full_index_name)
+        _wait_for_status = settings.ELASTICSEARCH['BULK_LOAD_WAIT_FOR_STATUS']
+        logger.info('%s: Waiting for %s status', self.strategy_name, _wait_for_status)
+        _wait_seconds = settings.ELASTICSEARCH['BULK_LOAD_WAIT_SECONDS']
+        _health = (
+            self.es8_client
+            .options(request_timeout=_wait_seconds + 10, ignore_status=HTTPStatus.REQUEST_TIMEOUT)
+            .cluster.health(index=_indexnames, wait_for_status=_wait_for_status, timeout=f'{_wait_seconds}s')
+        )
+        if _health['timed_out']:
+            raise IndexStrategyError(
+                f'{self.strategy_name}: status still "{_health["status"]}" after {_wait_seconds}s'
+                f' (waiting for "{_wait_for_status}" -- try again later)'
+            )
+
     # override from IndexStrategy
     def pls_refresh(self):
         super().pls_refresh()  # refreshes each index
@@ -274,24 +365,37 @@ class Elastic8IndexStrategy(IndexStrategy):
         self,
         messages_chunk: messages.MessagesChunk,
         action_tracker: _ActionTracker,
+        sourcehash_tracker: _SourcehashTracker | None = None,
     ):
-        for _actionset in self.build_elastic_actions(messages_chunk):
-            for _index_subname, _elastic_actions in _actionset.actions_by_subname.items():
-                _indexnames = self._get_indexnames_for_action(
-                    index_subname=_index_subname,
-                    is_backfill_action=messages_chunk.message_type.is_backfill,
-                )
-                for _elastic_action in _elastic_actions:
-                    _docid = _elastic_action['_id']
-                    for _indexname in _indexnames:
-                        action_tracker.add_action(_actionset.message_target_id, _indexname, _docid)
-                        _elastic_action_with_index = {
-                            **_elastic_action,
-                            '_index': _indexname,
-                        }
-                        logger.debug('%s: elastic action: %r', self, _elastic_action_with_index)
-                        yield _elastic_action_with_index
-            action_tracker.done_scheduling(_actionset.message_target_id)
+        _actionsets = iter(self.build_elastic_actions(messages_chunk))
+        _batch_size = (1 if sourcehash_tracker is None else SOURCEHASH_BATCH_SIZE)
+        for _actionset_batch in itertools.batched(_actionsets, _batch_size):
+            _keys: set[tuple[str, int]] = set()
+            _indexed_actions: list[tuple[int, str, dict]] = []
+            for _actionset in _actionset_batch:
+                for _index_subname, _elastic_actions in _actionset.actions_by_subname.items():
+                    _indexnames = self._get_indexnames_for_action(
+                        index_subname=_index_subname,
+                        is_backfill_action=messages_chunk.message_type.is_backfill,
+                    )
+                    _keys.update((_indexname, _actionset.message_target_id) for _indexname in _indexnames)
+                    _indexed_actions.extend(
+                        (_actionset.message_target_id, _indexname, _elastic_action)
+                        for _elastic_action in _elastic_actions
+                        for _indexname in _indexnames
+                    )
+            if sourcehash_tracker is not None:
+                _indexed_actions = sourcehash_tracker.skip_unchanged(_keys, _indexed_actions)
+            for _target_id, _indexname, _elastic_action in _indexed_actions:
+                action_tracker.add_action(_target_id, _indexname, _elastic_action['_id'])
+                _elastic_action_with_index = {
+                    **_elastic_action,
+                    '_index': _indexname,
+                }
+                logger.debug('%s: elastic action: %r', self, _elastic_action_with_index)
+                yield _elastic_action_with_index
+            for _actionset in _actionset_batch:
+                action_tracker.done_scheduling(_actionset.message_target_id)
 
     def _get_indexnames_for_action(
         self,
@@ -446,6 +550,8 @@ class Elastic8IndexStrategy(IndexStrategy):
                 self.index_strategy.es8_client.indices
                 .delete(index=_indexname, ignore=[400, 404])
             )
+            if self.index_strategy.SOURCEHASH_EXCLUDED_FIELDS is not None:
+                IndexedSourcehashes.objects.filter(indexname=_indexname).delete()
             logger.warning('%s: deleted', _indexname)
 
         # abstract method from IndexStrategy.SpecificIndex
@@ -467,6 +573,63 @@ class Elastic8IndexStrategy(IndexStrategy):
         def pls_get_mappings(self):
             return self.index_strategy.es8_client.indices.get_mapping(index=self.full_index_name).body
 
+        def is_bulk_loading(self) -> bool:
+            _indexname = self.full_index_name
+            _settings = (
+                self.index_strategy.es8_client.indices
+                .get_settings(index=_indexname, name='index.refresh_interval', flat_settings=True)
+            )
+            return _settings[_indexname]['settings'].get('index.refresh_interval') == '-1'
+
+        def pls_start_bulk_load(self):
+            _indexname = self.full_index_name
+            self.index_strategy.es8_client.indices.put_settings(
+                index=_indexname,
+                settings={
+                    f'index.{_key}': _value
+                    for _key, _value in self.index_strategy.BULK_LOAD_SETTINGS.items()
+                },
+            )
+            logger.info('%s: bulk-loading', _indexname)
+
+        def pls_stop_bulk_load(self):
+            _indexname = self.full_index_name
+            _index_settings = self.index_def.settings
+            self.index_strategy.es8_client.indices.put_settings(
+                index=_indexname,
+                settings={  # (none for the elasticsearch default)
+                    f'index.{_key}': _get_setting(_index_settings, _key)
+                    for _key in self.index_strategy.BULK_LOAD_SETTINGS
+                },
+            )
+            self.pls_refresh()
+            # merge segments left by bulk-loading (in the background)
+            self.index_strategy.es8_client.indices.forcemerge(index=_indexname, wait_for_completion=False)
+            logger.info('%s: no longer bulk-loading', _indexname)
+
+
+def get_es8_serializers(serializer_name: str) -> dict[str, JsonSerializer]:
+    '''serializers for the elasticsearch transport, by mimetype (json and ndjson, e.g. bulk bodies)
+
+    "orjson" is faster (if installed -- otherwise, quietly "json")
+    '''
+    if serializer_name == ORJSON and OrjsonSerializer is not None:
+        return {
+            OrjsonSerializer.mimetype: OrjsonSerializer(),
+            _OrjsonNdjsonSerializer.mimetype: _OrjsonNdjsonSerializer(),
+        }
+    if serializer_name in (JSON, ORJSON):
+        return {
+            JsonSerializer.mimetype: JsonSerializer(),
+            NdjsonSerializer.mimetype: NdjsonSerializer(),
+        }
+    raise IndexStrategyError(f'unknown elasticsearch serializer "{serializer_name}" (expected "{JSON}" or "{ORJSON}")')
+
+
+if OrjsonSerializer is not None:
+    class _OrjsonNdjsonSerializer(NdjsonSerializer, OrjsonSerializer):
+        pass  # ndjson lines by orjson
+
 
 @dataclasses.dataclass
 class _ActionTracker:
@@ -498,6 +661,7 @@ class _ActionTracker:
 
     def done_scheduling(self, message_id: int):
         self.fully_scheduled_messageids.add(message_id)
+        self.actions_by_messageid[message_id]  # (touch, in case of no actions)
 
     def forget_message(self, message_id: int):
         del self.actions_by_messageid[message_id]
@@ -510,3 +674,101 @@ class _ActionTracker:
             if _messageid not in self.errored_messageids:
                 assert not _actions
                 yield _messageid
+
+
+@dataclasses.dataclass
+class _SourcehashTracker:
+    '''skip index actions for docs unchanged since last indexed, and delete by id
+    docs no longer built (given a record of each doc's sourcehash, by index and target)
+
+    records are forgotten before sending any changes, and saved only after
+    elasticsearch confirms every action for that index and target
+    '''
+    excluded_fields: frozenset[str]
+    # (indexname, target_id) => (docid => sourcehash)
+    previous_sourcehashes: dict[tuple[str, int], dict[str, str]] = dataclasses.field(default_factory=dict)
+    built_sourcehashes: dict[tuple[str, int], dict[str, str | None]] = dataclasses.field(
+        default_factory=lambda: collections.defaultdict(dict),
+    )
+    changed_keys: set[tuple[str, int]] = dataclasses.field(default_factory=set)
+    errored_keys: set[tuple[str, int]] = dataclasses.field(default_factory=set)
+
+    @property
+    def scrapless_keys(self) -> set[tuple[str, int]]:
+        # (any scraps deleted by id, if there was a previous record)
+        return {
+            _key
+            for _key in self.built_sourcehashes.keys()
+            if _key in self.previous_sourcehashes
+        }
+
+    def sourcehash(self, doc_source: dict) -> str:
+        _json = json.dumps(
+            {_k: _v for _k, _v in doc_source.items() if _k not in self.excluded_fields},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(_json.encode(), digest_size=16).hexdigest()
+
+    def skip_unchanged(
+        self,
+        keys: set[tuple[str, int]],
+        indexed_actions: list[tuple[int, str, dict]],
+    ) -> list[tuple[int, str, dict]]:
+        _previous = IndexedSourcehashes.objects.get_sourcehashes(
+            indexnames={_indexname for _indexname, _ in keys},
+            target_ids={_target_id for _, _target_id in keys},
+        )
+        self.previous_sourcehashes.update(_previous)
+        _changed_actions = []
+        _sourcehash_by_action_id: dict[int, str] = {}  # (same action for each index)
+        for _key in keys:
+            self.built_sourcehashes[_key]  # (touch, in case of no actions)
+        for _target_id, _indexname, _elastic_action in indexed_actions:
+            _key = (_indexname, _target_id)
+            _docid = _elastic_action['_id']
+            _sourcehash = None
+            if _elastic_action['_op_type'] == 'index':
+                _sourcehash = _sourcehash_by_action_id.get(id(_elastic_action))
+                if _sourcehash is None:
+                    _sourcehash = self.sourcehash(_elastic_action['_source'])
+                    _sourcehash_by_action_id[id(_elastic_action)] = _sourcehash
+            self.built_sourcehashes[_key][_docid] = _sourcehash
+            if (_sourcehash is None) or (_previous.get(_key, {}).get(_docid) != _sourcehash):
+                self.changed_keys.add(_key)
+                _changed_actions.append((_target_id, _indexname, _elastic_action))
+        for _key, _previous_sourcehash_by_docid in _previous.items():
+            (_indexname, _target_id) = _key
+            for _scrap_docid in _previous_sourcehash_by_docid.keys() - self.built_sourcehashes[_key].keys():
+                self.changed_keys.add(_key)
+                _changed_actions.append((_target_id, _indexname, {'_op_type': 'delete', '_id': _scrap_docid}))
+        # forget before sending changes (in case of failure before `save`)
+        IndexedSourcehashes.objects.forget_sourcehashes(self.changed_keys & _previous.keys())
+        return _changed_actions
+
+    def action_errored(self, indexname: str, target_id: int) -> None:
+        self.errored_keys.add((indexname, target_id))
+
+    def save(self) -> None:
+        IndexedSourcehashes.objects.save_sourcehashes({
+            _key: {
+                _docid: _sourcehash
+                for _docid, _sourcehash in self.built_sourcehashes[_key].items()
+                if _sourcehash is not None
+            }
+            for _key in (self.changed_keys - self.errored_keys)
+        })
+
+
+def _get_setting(index_settings: Mapping, dotted_key: str):
+    # (index settings may be flat or nested, with or without "index." prefix)
+    _flat_settings = dict(_each_flat_setting(index_settings))
+    return _flat_settings.get(dotted_key, _flat_settings.get(f'index.{dotted_key}'))
+
+
+def _each_flat_setting(index_settings: Mapping, key_prefix: str = ''):
+    for _key, _value in index_settings.items():
+        if isinstance(_value, Mapping):
+            yield from _each_flat_setting(_value, f'{key_prefix}{_key}.')
+        else:
+            yield (f'{key_prefix}{_key}', _value)
@@ -1,8 +1,8 @@
+import itertools
 import json
 import logging
 import typing
 
-from django.db.models import F
 import elasticsearch8
 
 from share.models import SourceUniqueIdentifier
@@ -11,13 +11,16 @@ from share.search import messages
 from share.search.index_strategy.elastic8 import Elastic8IndexStrategy
 from share.util import IDObfuscator
 from share.util.checksum_iri import ChecksumIri
-from trove.models import DerivedIndexcard, ResourceIdentifier
+from trove.models import ContentBlob, DerivedIndexcard, ResourceIdentifier
 from trove.vocab.namespaces import SHAREv2
 
 
 logger = logging.getLogger(__name__)
 
 
+LOAD_DOCS_BATCH_SIZE = 500  # derived docs per blob query
+
+
 class Sharev2Elastic8IndexStrategy(Elastic8IndexStrategy):
     CURRENT_STRATEGY_CHECKSUM = ChecksumIri(
         checksumalgorithm_name='sha-256',
@@ -139,15 +142,18 @@ class Sharev2Elastic8IndexStrategy(Elastic8IndexStrategy):
             return self.MessageActionSet(suid_id, {'': actions})
 
         _suid_ids = set(messages_chunk.target_ids_chunk)
-        for _suid_id, _serialized_doc in self._load_docs(_suid_ids):
-            _source_doc = json.loads(_serialized_doc)
-            _doc_id = _source_doc['id']
+        for _suid_id, _doc_id, _serialized_doc in self._load_docs(_suid_ids):
             _suid_ids.discard(_suid_id)
-            yield _make_actionset(_suid_id, (
-                self.build_delete_action(_doc_id)
-                if _source_doc.pop('is_deleted', False)
-                else self.build_index_action(_doc_id, _source_doc)
-            ))
+            if _doc_id:  # the derived json is the doc, as-is (serialized already)
+                yield _make_actionset(_suid_id, self.build_index_action(_doc_id, _serialized_doc))
+            else:  # derived without a doc id (before `DerivedIndexcard.derived_id`)
+                _source_doc = json.loads(_serialized_doc)
+                _doc_id = _source_doc['id']
+                yield _make_actionset(_suid_id, (
+                    self.build_delete_action(_doc_id)
+                    if _source_doc.pop('is_deleted', False)
+                    else self.build_index_action(_doc_id, _source_doc)
+                ))
         # delete any leftovers
         for _leftover_suid in SourceUniqueIdentifier.objects.filter(id__in=_suid_ids):
             _suid_ids.discard(_leftover_suid.id)
@@ -167,15 +173,28 @@ class Sharev2Elastic8IndexStrategy(Elastic8IndexStrategy):
     def _get_doc_id(self, suid_id: int):
         return IDObfuscator.encode_id(suid_id, SourceUniqueIdentifier)
 
-    def _load_docs(self, suid_ids) -> typing.Iterable[tuple[int, str]]:
-        _card_qs = (
+    def _load_docs(self, suid_ids) -> typing.Iterator[tuple[int, str, str]]:
+        # (suid id, doc id, serialized doc) for each derived doc, streamed without model instances
+        _rows = (
             DerivedIndexcard.objects
             .filter(upriver_indexcard__source_record_suid_id__in=suid_ids)
             .filter(deriver_identifier__in=ResourceIdentifier.objects.queryset_for_iri(SHAREv2.sharev2_elastic))
-            .annotate(suid_id=F('upriver_indexcard__source_record_suid_id'))
+            .values_list(
+                'upriver_indexcard__source_record_suid_id',
+                'derived_id',
+                'derived_checksum_iri',
+                'derived_text',  # (inline column value; empty if blobbed)
+            )
+            .iterator(chunk_size=LOAD_DOCS_BATCH_SIZE)
         )
-        for _card in _card_qs:
-            yield (_card.suid_id, _card.derived_text)
+        for _batch in itertools.batched(_rows, LOAD_DOCS_BATCH_SIZE):
+            _blobbed_texts = ContentBlob.objects.get_texts(
+                _checksum_iri
+                for _, _, _checksum_iri, _inline_text in _batch
+                if not _inline_text
+            )
+            for _suid_id, _doc_id, _checksum_iri, _inline_text in _batch:
+                yield (_suid_id, _doc_id, (_inline_text or _blobbed_texts[_checksum_iri]))
 
     # optional method from IndexStrategy
     def pls_handle_search__passthru(self, request_body=None, request_queryparams=None) -> dict:
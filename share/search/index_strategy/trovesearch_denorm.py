@@ -6,6 +6,7 @@ import itertools
 import json
 import logging
 import re
+import time
 from typing import (
     Iterable,
     Iterator,
@@ -17,11 +18,13 @@ from django.conf import settings
 import elasticsearch8
 from primitive_metadata import primitive_rdf as rdf
 
+from share.models.pending_scraps import PendingScraps
 from share.search import exceptions
 from share.search import messages
 from share.search.index_strategy._base import IndexStrategy
 from share.search.index_strategy.elastic8 import Elastic8IndexStrategy
 from share.util.checksum_iri import ChecksumIri
+from trove import exceptions as trove_exceptions
 from trove import models as trove_db
 from trove.trovesearch.page_cursor import (
     MANY_MORE,
@@ -62,18 +65,37 @@ _PRIOR_UNSPLIT_STRATEGY_CHECKSUM = ChecksumIri(
     hexdigest='8a87bb51d46af9794496e798f033e8ba1ea0251fa7a8ffa5d037e90fb0c602c8',
 )
 _UNSPLIT_INDEX_SUBNAME = ''
+_PRIOR_FULLCARD_STRATEGY_CHECKSUM = ChecksumIri(
+    checksumalgorithm_name='sha-256',
+    salt='TrovesearchDenormIndexStrategy',
+    hexdigest='ef44d5bc272589754b3b0753e5ee61719349fd96284b62ecafab1d0cb043bde9',
+)
+
+# for card-search text in a valuesearch (see `_each_prefiltered_card_pk`)
+VALUESEARCH_CARD_PREFILTER_PAGE_SIZE = 10_000  # card pks per prefilter request
+VALUESEARCH_CARD_PKS_PER_TERMS_QUERY = 65_536  # (elasticsearch's default `index.max_terms_count`)
 
 
 def _is_unsplit_strat(strategy: TrovesearchDenormIndexStrategy) -> bool:
     return (strategy.strategy_check == _PRIOR_UNSPLIT_STRATEGY_CHECKSUM.hexdigest)
 
 
+def _has_full_card_in_values(strategy: TrovesearchDenormIndexStrategy) -> bool:
+    # prior layouts repeat the full card subdoc (incl. all text) in each iri-value doc
+    return strategy.strategy_check in (
+        _PRIOR_UNSPLIT_STRATEGY_CHECKSUM.hexdigest,
+        _PRIOR_FULLCARD_STRATEGY_CHECKSUM.hexdigest,
+    )
+
+
 class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
     CURRENT_STRATEGY_CHECKSUM = ChecksumIri(
         checksumalgorithm_name='sha-256',
         salt='TrovesearchDenormIndexStrategy',
-        hexdigest='ef44d5bc272589754b3b0753e5ee61719349fd96284b62ecafab1d0cb043bde9',
+        hexdigest='89b2785960953dddf6a90eeb7163abbb2fe59715bafcd5ecb72b8181e18e7d52',
     )
+    # override Elastic8IndexStrategy (chunk_timestamp is only for deleting scraps)
+    SOURCEHASH_EXCLUDED_FIELDS = frozenset({'chunk_timestamp'})
 
     # abstract method from Elastic8IndexStrategy
     @classmethod
@@ -128,12 +150,17 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
         }
 
     @classmethod
-    def _iri_values_index_mappings(cls):
+    def _iri_values_index_mappings(cls, *, full_card=False):
+        # (`full_card` for the prior layout; see `_has_full_card_in_values`)
         return {
             'dynamic': 'false',
             'dynamic_templates': cls._dynamic_templates(),
             'properties': {
-                'card': {'properties': cls._card_mappings()},
+                'card': {'properties': (
+                    cls._card_mappings()
+                    if full_card
+                    else cls._card_in_values_mappings()
+                )},
                 'iri_value': {'properties': cls._iri_value_mappings()},
                 'chunk_timestamp': {'type': 'unsigned_long'},
             },
@@ -179,6 +206,20 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
             **cls._paths_and_values_mappings(),
         }
 
+    @classmethod
+    def _card_in_values_mappings(cls):
+        # only what valuesearch filters on (card text via `_prefilter_card_pks`)
+        return {
+            'card_iri': ts.KEYWORD_MAPPING,
+            'card_pk': ts.KEYWORD_MAPPING,
+            'single_focus_iri': ts.KEYWORD_MAPPING,
+            'focus_iri_synonyms': ts.KEYWORD_MAPPING,
+            'propertypaths_present': ts.KEYWORD_MAPPING,
+            'iri_by_propertypath': ts.FLATTENED_MAPPING,
+            'iri_by_depth': ts.FLATTENED_MAPPING,
+            'date_by_propertypath': {'type': 'object', 'dynamic': True},
+        }
+
     @classmethod
     def _iri_value_mappings(cls):
         return {
@@ -209,29 +250,46 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
     # receiving and acting on chunks of messages
 
     # override method from Elastic8IndexStrategy
-    def after_chunk(self, messages_chunk: messages.MessagesChunk, affected_indexnames: Iterable[str]):
+    def after_chunk(
+        self,
+        messages_chunk: messages.MessagesChunk,
+        affected_indexnames: Iterable[str],
+        *,
+        scrapless_keys: abc.Collection[tuple[str, int]] = (),
+    ):
         _strategy_checks = {
             self.parse_full_index_name(_indexname).index_strategy.strategy_check
             for _indexname in affected_indexnames
         }
-        task__delete_iri_value_scraps.apply_async(
-            kwargs={
-                'index_strategy_name': self.strategy_name,
-                'index_strategy_checks': list(_strategy_checks),
-                'card_pks': messages_chunk.target_ids_chunk,
-                'timestamp': messages_chunk.timestamp,
-            },
-            countdown=settings.ELASTICSEARCH['POST_INDEX_DELAY'],
-        )
+        for _strategy_check in _strategy_checks:
+            _irivalue_indexname = (
+                self.with_strategy_check(_strategy_check)
+                .irivaluesearch_index()
+                .full_index_name
+            )
+            # (skip cards with scraps already deleted by id -- docs unchanged since
+            # last indexed have an older chunk_timestamp, but are not scraps)
+            _card_pks = [
+                _card_pk
+                for _card_pk in messages_chunk.target_ids_chunk
+                if (_irivalue_indexname, _card_pk) not in scrapless_keys
+            ]
+            if _card_pks:
+                # (collected, to delete with others in `task__delete_pending_iri_value_scraps`)
+                PendingScraps.objects.add_pending(_irivalue_indexname, _card_pks, messages_chunk.timestamp)
 
     # abstract method from Elastic8IndexStrategy
     def build_elastic_actions(self, messages_chunk: messages.MessagesChunk):
-        _resource_description_qs = ts.latest_resource_description_for_indexcard_pks(messages_chunk.target_ids_chunk)
+        _indexable_cards = trove_db.IndexableCard.objects.for_indexing(messages_chunk.target_ids_chunk)
         _remaining_indexcard_pks = set(messages_chunk.target_ids_chunk)
-        for _resource_description in _resource_description_qs:
-            _docbuilder = self._SourcedocBuilder(_resource_description, messages_chunk.timestamp)
+        for _indexable_card in _indexable_cards:
+            _docbuilder = self._SourcedocBuilder(
+                _indexable_card,
+                messages_chunk.timestamp,
+                full_card_in_values=_has_full_card_in_values(self),
+            )
             if not _docbuilder.should_skip():  # if skipped, will be deleted
-                _indexcard_pk = _resource_description.indexcard_id
+                _indexcard_pk = _indexable_card.indexcard_id
                 _cardsearch_actions = (
                     self.build_index_action(_doc_id, _doc)
                     for _doc_id, _doc in _docbuilder.build_cardsearch_docs()
@@ -255,10 +313,16 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
                 _remaining_indexcard_pks.discard(_indexcard_pk)
         # delete any that were skipped for any reason
         for _indexcard_pk in _remaining_indexcard_pks:
-            _subname = (_UNSPLIT_INDEX_SUBNAME if _is_unsplit_strat(self) else 'cards')
-            yield self.MessageActionSet(_indexcard_pk, {
-                _subname: [self.build_delete_action(_indexcard_pk)],
-            })
+            if _is_unsplit_strat(self):
+                _actions_by_index = {
+                    _UNSPLIT_INDEX_SUBNAME: [self.build_delete_action(_indexcard_pk)],
+                }
+            else:
+                _actions_by_index = {
+                    'cards': [self.build_delete_action(_indexcard_pk)],
+                    'iri_values': [],  # (value-docs deleted as scraps)
+                }
+            yield self.MessageActionSet(_indexcard_pk, _actions_by_index)
 
     ###
     # handling searches
@@ -310,9 +374,16 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
         if _is_date_search:
             _index = self.cardsearch_index()
             _query = _build_date_valuesearch(valuesearch_params)
-        else:
+        elif _has_full_card_in_values(self):
             _index = self.irivaluesearch_index()
             _query = _build_iri_valuesearch(valuesearch_params, _cursor)
+        else:
+            _index = self.irivaluesearch_index()
+            _query = _build_iri_valuesearch(
+                valuesearch_params,
+                _cursor,
+                card_pks=self._prefilter_card_pks(valuesearch_params),
+            )
         if settings.DEBUG:
             logger.info(json.dumps(_query, indent=2))
         try:
@@ -328,6 +399,32 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
             else self._valuesearch_iris_response(valuesearch_params, _es8_response, _cursor)
         )
 
+    def _prefilter_card_pks(self, valuesearch_params: ValuesearchParams) -> list[str] | None:
+        '''for card-search text in a valuesearch: get pks of all matching cards (from the cards index)
+
+        (iri-value docs include only the card fields needed for filtering, not text)
+        returns None if there's no card-search text (so no need to prefilter)
+        raises InvalidSearchText if the text matches too many cards to filter by pk
+        '''
+        if not valuesearch_params.cardsearch_searchtext:
+            return None
+        _max_count = settings.ELASTICSEARCH['VALUESEARCH_CARD_PREFILTER_MAX']
+        try:
+            _card_pks = list(_each_prefiltered_card_pk(
+                self.es8_client,
+                self.cardsearch_index().full_index_name,
+                valuesearch_params,
+                max_count=_max_count,
+            ))
+        except elasticsearch8.TransportError as error:
+            raise exceptions.IndexStrategyError() from error  # TODO: error messaging
+        if len(_card_pks) > _max_count:
+            raise trove_exceptions.InvalidSearchText(
+                f'cardSearchText matches too many cards for a value-search (over {_max_count});'
+                ' narrow it with more words or filters'
+            )
+        return _card_pks
+
     ###
     # building sourcedocs
 
@@ -335,25 +432,21 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
     class _SourcedocBuilder:
         '''build elasticsearch sourcedocs for an rdf document
         '''
-        resource_description: trove_db.ResourceDescription
+        indexable_card: trove_db.IndexableCard
         chunk_timestamp: int
-        indexcard: trove_db.Indexcard = dataclasses.field(init=False)
+        full_card_in_values: bool = False  # (for prior layouts)
         focus_iri: str = dataclasses.field(init=False)
         rdfdoc: rdf.RdfTripleDictionary = dataclasses.field(init=False)
 
         def __post_init__(self) -> None:
-            self.indexcard = self.resource_description.indexcard
-            self.focus_iri = self.resource_description.focus_iri
-            self.rdfdoc = self.resource_description.as_rdfdoc_with_supplements()
+            self.focus_iri = self.indexable_card.focus_iri
+            self.rdfdoc = self.indexable_card.as_rdfdoc_with_supplements()
 
         def should_skip(self) -> bool:
-            _suid = self.indexcard.source_record_suid
-            return (
-                # skip cards that belong to an obsolete suid with a later duplicate
-                _suid.has_forecompat_replacement()
-                # ...or that are without some value for name/title/label
-                or not any(self.rdfdoc.q(self.focus_iri, osfmap.NAMELIKE_PROPERTIES))
-            )
+            # skip cards without some value for name/title/label
+            # (cards that belong to an obsolete suid with a later duplicate already omitted;
+            # see `IndexableCardManager.for_indexing`)
+            return not any(self.rdfdoc.q(self.focus_iri, osfmap.NAMELIKE_PROPERTIES))
 
         def build_cardsearch_docs(self) -> Iterator[tuple[str, dict]]:
             yield self._doc_id(), {
@@ -362,15 +455,20 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
             }
 
         def build_valuesearch_docs(self) -> Iterator[tuple[str, dict]]:
+            _card_subdoc = (
+                self._card_subdoc
+                if self.full_card_in_values
+                else self._card_subdoc_for_values
+            )
             for _iri in self._fullwalk.paths_by_iri:
                 yield self._doc_id(_iri), {
-                    'card': self._card_subdoc,
+                    'card': _card_subdoc,
                     'iri_value': self._iri_value_subdoc(_iri),
                     'chunk_timestamp': self.chunk_timestamp,
                 }
 
         def _doc_id(self, value_iri=None) -> str:
-            _card_pk = str(self.indexcard.pk)
+            _card_pk = str(self.indexable_card.indexcard_id)
             return (
                 _card_pk
                 if value_iri is None
@@ -384,15 +482,23 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
         @functools.cached_property
         def _card_subdoc(self) -> dict:
             return {
-                'card_iri': self.indexcard.get_iri(),
-                'card_pk': str(self.indexcard.pk),
+                'card_iri': self.indexable_card.get_iri(),
+                'card_pk': str(self.indexable_card.indexcard_id),
                 'suid': {
-                    'source_record_identifier': self.indexcard.source_record_suid.identifier,
-                    'source_config_label': self.indexcard.source_record_suid.source_config.label,
+                    'source_record_identifier': self.indexable_card.suid_identifier,
+                    'source_config_label': self.indexable_card.source_config_label,
                 },
                 **self._paths_and_values(self._fullwalk),
             }
 
+        @functools.cached_property
+        def _card_subdoc_for_values(self) -> dict:
+            _card_subdoc = self._card_subdoc
+            return {
+                _fieldname: _card_subdoc[_fieldname]
+                for _fieldname in TrovesearchDenormIndexStrategy._card_in_values_mappings()
+            }
+
         def _iri_value_subdoc(self, iri: str) -> dict:
             _shortwalk = self._fullwalk.shortwalk_from(iri)
             return {
@@ -409,10 +515,7 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
         def _paths_and_values(self, walk: ts.GraphWalk):
             return {
                 'single_focus_iri': walk.focus_iri.rstrip('/'),  # remove trailing slash, but keep the scheme
-                'focus_iri_synonyms': ts.suffuniq_iris(ts.iri_synonyms(
-                    walk.focus_iri,
-                    self.rdfdoc,
-                )),
+                'focus_iri_synonyms': walk.suffuniq_synonyms((walk.focus_iri,)),
                 'propertypaths_present': self._propertypaths_present(walk),
                 'iri_by_propertypath': self._iris_by_propertypath(walk),
                 'iri_by_depth': self._iris_by_depth(walk),
@@ -430,7 +533,7 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
 
         def _iris_by_propertypath(self, walk: ts.GraphWalk):
             return {
-                _path_field_name(_path): ts.suffuniq_iris(ts.iris_synonyms(_iris, self.rdfdoc))
+                _path_field_name(_path): walk.suffuniq_synonyms(_iris)
                 for _path, _iris in walk.iri_values.items()
             }
 
@@ -439,7 +542,7 @@ class TrovesearchDenormIndexStrategy(Elastic8IndexStrategy):
             for _path, _iris in walk.iri_values.items():
                 _by_depth[len(_path)].update(_iris)
             return {
-                _depth_field_name(_depth): ts.suffuniq_iris(ts.iris_synonyms(_iris, self.rdfdoc))
+                _depth_field_name(_depth): walk.suffuniq_synonyms(_iris)
                 for _depth, _iris in _by_depth.items()
             }
 
@@ -835,16 +938,24 @@ class _CardsearchQueryBuilder:
             }}
 
 
-def _build_iri_valuesearch(params: ValuesearchParams, cursor: OffsetCursor) -> dict:
+def _build_iri_valuesearch(
+    params: ValuesearchParams,
+    cursor: OffsetCursor,
+    *,
+    card_pks: list[str] | None = None,
+) -> dict:
+    # (if `card_pks` given, filter on those instead of card-search text)
     _path = params.valuesearch_propertypath
     _bool = _BoolBuilder()
     _bool.add_boolpart('filter', {'term': {
         'iri_value.at_card_propertypaths': ts.propertypath_as_keyword(_path),
     }})
+    if card_pks is not None:
+        _bool.add_boolpart('filter', _card_pks_filter(card_pks))
     _bool.add_boolparts(
         _QueryHelper(
             base_field='card',
-            searchtext=params.cardsearch_searchtext,
+            searchtext=(params.cardsearch_searchtext if card_pks is None else frozenset()),
             filter_set=params.cardsearch_filter_set,
             relevance_matters=False,
         ).boolparts(),
@@ -880,6 +991,81 @@ def _build_iri_valuesearch(params: ValuesearchParams, cursor: OffsetCursor) -> d
     }
 
 
+def _each_prefiltered_card_pk(
+    es8_client,
+    cards_indexname: str,
+    params: ValuesearchParams,
+    *,
+    max_count: int,
+) -> Iterator[str]:
+    # cards matching card-search text and filters, a page at a time (in card_pk order)
+    # -- stops after `max_count + 1` (so the caller can tell there are too many)
+    _remaining = max_count + 1
+    _search_after = None
+    while _remaining > 0:
+        _size = min(_remaining, VALUESEARCH_CARD_PREFILTER_PAGE_SIZE)
+        _es8_response = es8_client.search(
+            index=cards_indexname,
+            **_build_card_prefilter(params, size=_size, search_after=_search_after),
+        )
+        _card_pks = _card_pks_from_prefilter(_es8_response)
+        yield from _card_pks[:_remaining]
+        _remaining -= len(_card_pks)
+        _hits = _es8_response['hits']['hits']
+        if len(_hits) < _size:
+            return
+        _search_after = _hits[-1]['sort']
+
+
+def _build_card_prefilter(
+    params: ValuesearchParams,
+    *,
+    size: int = VALUESEARCH_CARD_PREFILTER_PAGE_SIZE,
+    search_after: list | None = None,
+) -> dict:
+    _bool = _BoolBuilder()
+    _bool.add_boolparts(
+        _QueryHelper(
+            base_field='card',
+            searchtext=params.cardsearch_searchtext,
+            filter_set=params.cardsearch_filter_set,
+            relevance_matters=False,
+        ).boolparts(),
+    )
+    _prefilter = {
+        'query': _bool.as_query(),
+        'source': False,
+        'docvalue_fields': ['card.card_pk'],
+        'size': size,
+        'sort': [{'card.card_pk': 'asc'}],
+        'track_total_hits': False,
+    }
+    if search_after is not None:
+        _prefilter['search_after'] = search_after
+    return _prefilter
+
+
+def _card_pks_from_prefilter(es8_response) -> list[str]:
+    return [
+        _card_pk
+        for _hit in es8_response['hits']['hits']
+        for _card_pk in _hit['fields']['card.card_pk']
+    ]
+
+
+def _card_pks_filter(card_pks: list[str]) -> dict:
+    # (split into terms queries small enough for `index.max_terms_count`)
+    _terms_queries = [
+        {'terms': {'card.card_pk': list(_card_pks)}}
+        for _card_pks in itertools.batched(card_pks, VALUESEARCH_CARD_PKS_PER_TERMS_QUERY)
+    ]
+    if len(_terms_queries) == 1:
+        return _terms_queries[0]
+    if not _terms_queries:
+        return {'terms': {'card.card_pk': []}}  # (matches nothing)
+    return {'bool': {'should': _terms_queries, 'minimum_should_match': 1}}
+
+
 def _build_date_valuesearch(params: ValuesearchParams) -> dict:
     assert not params.valuesearch_searchtext
     assert not params.valuesearch_filter_set
@@ -967,12 +1153,8 @@ def task__delete_iri_value_scraps(
 ):
     '''followup task to delete value-docs no longer present
 
-    each time an index-card is updated, value-docs are created (or updated) for each iri value
-    present in the card's contents -- if some values are absent from a later update, the
-    corresponding docs will remain untouched
-
-    this task deletes those untouched value-docs after the index has refreshed at its own pace
-    (allowing a slightly longer delay for items to _stop_ matching queries for removed values)
+    (no longer scheduled -- see `task__delete_pending_iri_value_scraps` -- but kept for any
+    tasks already queued)
     '''
     from share.search.index_strategy import get_strategy
     _index_strategy = get_strategy(index_strategy_name)
@@ -997,3 +1179,71 @@ def task__delete_iri_value_scraps(
     _conflict_count = _delete_resp.get('version_conflicts', 0)
     if _conflict_count > 0:
         raise task.retry()
+
+
+@celery.shared_task(
+    name='share.search.index_strategy.trovesearch_denorm.task__delete_pending_iri_value_scraps',
+)
+def task__delete_pending_iri_value_scraps():
+    '''periodic task to delete value-docs no longer present
+
+    each time an index-card is updated, value-docs are created (or updated) for each iri value
+    present in the card's contents -- if some values are absent from a later update, the
+    corresponding docs will remain untouched
+
+    this task deletes those untouched value-docs after the index has refreshed at its own pace
+    (allowing a slightly longer delay for items to _stop_ matching queries for removed values)
+    -- collected from every chunk since last run, with one delete-by-query per index
+    '''
+    from share.search.index_strategy import parse_specific_index_name
+    _batch_size = settings.ELASTICSEARCH['SCRAP_DELETE_BATCH_SIZE']
+    _ripe_before = time.time_ns() - (settings.ELASTICSEARCH['POST_INDEX_DELAY'] * 1_000_000_000)
+    while True:
+        _ripe_by_indexname = PendingScraps.objects.ripe_by_indexname(
+            before_timestamp=_ripe_before,
+            limit=_batch_size,
+        )
+        _deleted_any = False
+        for _indexname, _pendings in _ripe_by_indexname.items():
+            try:
+                _index = parse_specific_index_name(_indexname)
+            except exceptions.IndexStrategyError:
+                logger.warning('forgetting scraps for unknown index "%s"', _indexname)
+                PendingScraps.objects.forget(_pendings)
+                continue
+            if _delete_scraps(_index.index_strategy.es8_client, _indexname, _pendings):
+                PendingScraps.objects.forget(_pendings)
+                _deleted_any = True
+        _pending_count = sum(len(_pendings) for _pendings in _ripe_by_indexname.values())
+        if (_pending_count < _batch_size) or not _deleted_any:
+            break  # (any left will wait for the next run)
+
+
+def _delete_scraps(es8_client, indexname: str, pendings: abc.Collection[PendingScraps]) -> bool:
+    '''delete (by query) value-docs older than pending for each card; return True if done'''
+    _card_pks_by_timestamp: defaultdict[int, list[int]] = defaultdict(list)
+    for _pending in pendings:
+        _card_pks_by_timestamp[_pending.before_timestamp].append(_pending.target_id)
+    try:
+        _delete_resp = es8_client.delete_by_query(
+            index=indexname,
+            query=_any_query([
+                {'bool': {'must': [
+                    {'terms': {'card.card_pk': _card_pks}},
+                    {'range': {'chunk_timestamp': {'lt': _timestamp}}},
+                ]}}
+                for _timestamp, _card_pks in _card_pks_by_timestamp.items()
+            ]),
+            params={
+                'slices': 'auto',
+                'conflicts': 'proceed',  # count conflicts instead of halting
+                'request_cache': False,
+            },
+        )
+    except elasticsearch8.NotFoundError:
+        return True  # no index, no scraps
+    except elasticsearch8.TransportError:
+        logger.exception('failed deleting scraps from "%s" (will try again)', indexname)
+        return False
+    # on conflicts or failures, try again next run
+    return not (_delete_resp.get('version_conflicts', 0) or _delete_resp.get('failures'))
@@ -1,11 +1,17 @@
 import abc
+import base64
 import dataclasses
 import enum
 import functools
+import itertools
 import logging
+import threading
 import time
 import typing
 
+import celery
+from django.conf import settings
+
 from share.search import exceptions
 
 
@@ -72,10 +78,10 @@ class MessagesChunk:
     message_type: MessageType
     target_ids_chunk: typing.Iterable[int]
 
-    def as_dicts(self):
-        int_message_type = int(self.message_type)
-        for target_id in self.target_ids_chunk:
-            yield DaemonMessage.compose_however(int_message_type, target_id)
+    def as_dicts(self, *, max_ids_per_message: int | None = None):
+        _max_ids = max_ids_per_message or settings.ELASTICSEARCH['MAX_IDS_PER_MESSAGE']
+        for _target_ids in itertools.batched(self.target_ids_chunk, _max_ids):
+            yield DaemonMessage.compose_chunk_however(self.message_type, _target_ids)
 
     def as_tuples(self):
         for target_id in self.target_ids_chunk:
@@ -103,6 +109,12 @@ class DaemonMessage(abc.ABC):
             else message_type
         ), target_id)
 
+    @staticmethod
+    def compose_chunk_however(message_type: MessageType, target_ids: typing.Iterable[int]) -> dict:
+        '''pass-thru to PreferedDaemonMessageSubclass.compose_chunk (many target ids in one message)
+        '''
+        return V4Message.compose_chunk(message_type, target_ids)
+
     @classmethod
     def from_received_message(cls, kombu_message):
         try:
@@ -132,11 +144,19 @@ class DaemonMessage(abc.ABC):
     def __init__(self, *, kombu_message=None):
         self.kombu_message = kombu_message
 
+    def each_target_message(self) -> typing.Iterator['DaemonMessage']:
+        '''one message per target id (to handle and ack separately)'''
+        yield self
+
     def ack(self):
         if self.kombu_message is None:
             raise exceptions.DaemonMessageError('ack! called DaemonMessage.ack() but there is nothing to ack')
         self.kombu_message.ack()
 
+    def ack_failed(self):
+        '''ack a message that could not be handled (retried later, if the protocol allows)'''
+        self.ack()  # (errors logged elsewhere, not retried)
+
     def requeue(self):
         if self.kombu_message is None:
             raise exceptions.DaemonMessageError('called DaemonMessage.requeue() but there is nothing to requeue')
@@ -219,3 +239,175 @@ class V3Message(DaemonMessage):
         if not isinstance(target_id, int):
             raise ValueError(self.kombu_message.payload)
         return target_id
+
+
+class V4Message(DaemonMessage):
+    """
+    the message has an int_message_type and many target ids, packed (see `pack_target_ids`)
+    -- for fewer messages (and acks), with any target ids that fail sent again in a new
+    message (with attempt count "a"), until `ELASTICSEARCH['MAX_MESSAGE_ATTEMPTS']`
+    {
+        "v": 4,
+        "m": 7,
+        "ids": "AQID",
+    }
+    """
+    PROTOCOL_VERSION = 4
+
+    @classmethod
+    def compose(cls, message_type: MessageType, target_id: int) -> dict:
+        return cls.compose_chunk(message_type, [target_id])
+
+    @classmethod
+    def compose_chunk(cls, message_type: MessageType, target_ids: typing.Iterable[int], *, attempt: int = 0) -> dict:
+        _message = {
+            'v': 4,
+            'm': int(message_type),
+            'ids': pack_target_ids(target_ids),
+        }
+        if attempt:
+            _message['a'] = attempt
+        return _message
+
+    @property
+    def message_type(self) -> MessageType:
+        return MessageType.from_int(self.kombu_message.payload['m'])
+
+    @property
+    def target_id(self) -> int:
+        raise exceptions.DaemonMessageError(f'{self} has many target ids (see `each_target_message`)')
+
+    @functools.cached_property
+    def target_ids(self) -> tuple[int, ...]:
+        return unpack_target_ids(self.kombu_message.payload['ids'])
+
+    @property
+    def attempt(self) -> int:
+        return self.kombu_message.payload.get('a', 0)
+
+    def each_target_message(self) -> typing.Iterator[DaemonMessage]:
+        _settlement = _V4Settlement(self)
+        for _target_id in self.target_ids:
+            yield V4TargetMessage(_settlement, _target_id)
+
+    def republish_chunk(self, target_ids: typing.Collection[int]) -> None:
+        '''send the given target ids again, in a new message to the same queue
+
+        (on a pooled connection of its own -- may be called from any chunk-handling thread,
+        and the consumer's channel is not safe to share between threads)
+        '''
+        _delivery_info = self.kombu_message.delivery_info
+        with celery.current_app.pool.acquire(block=True) as _connection:
+            _connection.Producer().publish(
+                self.compose_chunk(self.message_type, target_ids, attempt=self.attempt + 1),
+                exchange=_delivery_info.get('exchange', ''),
+                routing_key=_delivery_info['routing_key'],
+                serializer='json',
+                retry=True,
+            )
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}({self.message_type}, {len(self.target_ids)} target ids)>'
+
+    def __hash__(self):
+        return hash((self.message_type, self.target_ids))
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, V4Message)
+            and self.message_type == other.message_type
+            and self.target_ids == other.target_ids
+        )
+
+
+class V4TargetMessage(DaemonMessage):
+    '''one target id from a V4Message (acked once every target id from that message is)'''
+    def __init__(self, settlement: '_V4Settlement', target_id: int):
+        super().__init__(kombu_message=settlement.v4_message.kombu_message)
+        self._settlement = settlement
+        self._target_id = target_id
+
+    @classmethod
+    def compose(cls, message_type: MessageType, target_id: int) -> dict:
+        return V4Message.compose(message_type, target_id)
+
+    @property
+    def message_type(self) -> MessageType:
+        return self._settlement.v4_message.message_type
+
+    @property
+    def target_id(self) -> int:
+        return self._target_id
+
+    def ack(self):
+        self._settlement.settle(self._target_id, failed=False)
+
+    def ack_failed(self):
+        self._settlement.settle(self._target_id, failed=True)
+
+    def requeue(self):
+        self.ack_failed()  # (can't requeue only part of a message)
+
+
+class _V4Settlement:
+    '''which target ids from a V4Message are yet unsettled, and which failed'''
+    def __init__(self, v4_message: V4Message):
+        self.v4_message = v4_message
+        self._lock = threading.Lock()
+        self._unsettled_ids = set(v4_message.target_ids)
+        self._failed_ids: list[int] = []
+
+    def settle(self, target_id: int, *, failed: bool) -> None:
+        with self._lock:
+            self._unsettled_ids.discard(target_id)
+            if failed:
+                self._failed_ids.append(target_id)
+            if self._unsettled_ids:
+                return  # wait for the rest
+            _failed_ids = tuple(self._failed_ids)
+        if _failed_ids:
+            if self.v4_message.attempt + 1 < settings.ELASTICSEARCH['MAX_MESSAGE_ATTEMPTS']:
+                # (if this fails, the whole message is left unacked, to be redelivered)
+                self.v4_message.republish_chunk(_failed_ids)
+            else:
+                logger.error(
+                    'giving up on %d target ids after %d attempts (%s)',
+                    len(_failed_ids), self.v4_message.attempt + 1, self.v4_message.message_type,
+                )
+        self.v4_message.ack()
+
+
+def pack_target_ids(target_ids: typing.Iterable[int]) -> str:
+    '''pack target ids (deduplicated, sorted) as base64 of varint-encoded differences
+
+    >>> pack_target_ids([3, 1, 2, 300])
+    'AQEBqQI='
+    >>> unpack_target_ids(_)
+    (1, 2, 3, 300)
+    '''
+    _bytes = bytearray()
+    _previous = 0
+    for _target_id in sorted(set(target_ids)):
+        if not isinstance(_target_id, int) or _target_id < 0:
+            raise ValueError(_target_id)
+        _delta = _target_id - _previous
+        _previous = _target_id
+        while _delta >= 0x80:
+            _bytes.append((_delta & 0x7f) | 0x80)
+            _delta >>= 7
+        _bytes.append(_delta)
+    return base64.b64encode(_bytes).decode()
+
+
+def unpack_target_ids(packed: str) -> tuple[int, ...]:
+    _target_ids = []
+    _previous = _delta = _shift = 0
+    for _byte in base64.b64decode(packed):
+        _delta |= (_byte & 0x7f) << _shift
+        if _byte & 0x80:
+            _shift += 7
+        else:
+            _previous += _delta
+            _target_ids.append(_previous)
+            _delta = _shift = 0
+    return tuple(_target_ids)
@@ -2,6 +2,11 @@ import io
 from unittest import mock
 import pytest
 from django.core.management import call_command
+from primitive_metadata import primitive_rdf as rdf
+
+from share.search.index_strategy.trovesearch_denorm import TrovesearchDenormIndexStrategy
+from tests.trove.factories import create_indexcard, create_supplement
+from trove.vocab.namespaces import BLARG, DCTERMS, TROVE
 
 
 def run_command(*args):
@@ -50,3 +55,58 @@ class TestCommandSearch:
         with mock.patch('share.search.daemon.IndexerDaemonControl') as mock_daemon_control:
             run_command('shtrove_indexer_run')
             mock_daemon_control.return_value.start_all_daemonthreads.assert_called_once()
+
+    def test_daemon_processes(self):
+        with mock.patch('share.management.commands.shtrove_indexer_run.IndexerDaemonSupervisor') as mock_supervisor:
+            run_command('shtrove_indexer_run', '--processes', '3')
+        assert mock_supervisor.call_args.kwargs == {'process_count': 3}
+        mock_supervisor.return_value.run.assert_called_once_with()
+
+    @pytest.mark.django_db
+    def test_valuesearch_benchmark(self):
+        create_indexcard(BLARG.hello, {
+            DCTERMS.title: {rdf.literal('hello')},
+            DCTERMS.subject: {BLARG.subj_a, BLARG.subj_b},
+        }, deriver_iris=(TROVE['derive/osfmap_json'],))
+        _output = run_command('shtrove_valuesearch_benchmark', '--sample-size', '5')
+        assert 'sampled 1 index-cards' in _output
+        assert 'full_card: 2 docs' in _output
+        assert 'slim_card: 2 docs' in _output
+
+    @pytest.mark.django_db
+    def test_indexable_card_benchmark(self):
+        for _focus_iri in (BLARG.hello, BLARG.hullo):
+            _indexcard = create_indexcard(_focus_iri, {
+                DCTERMS.title: {rdf.literal('hello')},
+            }, deriver_iris=(TROVE['derive/osfmap_json'],))
+            create_supplement(_indexcard, _focus_iri, {DCTERMS.subject: {BLARG.subj_a}})
+        _output = run_command('shtrove_indexable_card_benchmark', '--repeat', '1', '--cold')
+        assert 'descriptions: 2 cards, ' in _output
+        assert 'projection: 2 cards, 2 queries' in _output
+
+    @pytest.mark.django_db
+    def test_es_serializer_benchmark(self):
+        create_indexcard(BLARG.hello, {
+            DCTERMS.title: {rdf.literal('hello')},
+            DCTERMS.subject: {BLARG.subj_a, BLARG.subj_b},
+        }, deriver_iris=(TROVE['derive/osfmap_json'],))
+        with mock.patch(
+            'share.search.index_strategy.get_strategy',
+            return_value=TrovesearchDenormIndexStrategy('trovesearch_denorm'),
+        ):
+            _output = run_command('shtrove_es_serializer_benchmark', '--repeat', '1')
+        assert 'built 3 docs' in _output
+        assert 'json: ' in _output
+        assert 'json+gzip: ' in _output
+
+    def test_graphwalk_benchmark(self):
+        _output = run_command(
+            'shtrove_graphwalk_benchmark',
+            '--components', '2',
+            '--files', '2',
+            '--people', '3',
+            '--repeat', '1',
+        )
+        assert 'project graph: ' in _output
+        assert 'fresh: ' in _output
+        assert 'memoized: ' in _output
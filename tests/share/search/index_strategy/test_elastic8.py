@@ -3,7 +3,9 @@ from unittest import mock
 
 import pytest
 
-from share.search.index_strategy.elastic8 import Elastic8IndexStrategy
+from share.search.exceptions import IndexStrategyError
+from share.search.index_strategy import elastic8
+from share.search.index_strategy.elastic8 import Elastic8IndexStrategy, _get_setting
 from share.search import messages
 from share.util.checksum_iri import ChecksumIri
 
@@ -88,3 +90,193 @@ class TestIndexStrategy:
             index=fake_specific_index.full_index_name,
             ignore=[400, 404],
         )
+
+    def test_bulk_load(self, fake_strategy, fake_specific_index, mock_es_client):
+        _indexname = fake_specific_index.full_index_name
+        mock_es_client.indices.get_alias.return_value = {'fake_es8__anothercheck': {}}
+        fake_strategy.pls_start_bulk_load()
+        mock_es_client.indices.put_settings.assert_called_once_with(
+            index=_indexname,
+            settings={
+                'index.number_of_replicas': 0,
+                'index.refresh_interval': '-1',
+                'index.translog.durability': 'async',
+            },
+        )
+        # make default only after restoring settings
+        mock_es_client.indices.get_settings.return_value = {
+            _indexname: {'settings': {'index.refresh_interval': '-1'}},
+        }
+        with pytest.raises(IndexStrategyError):
+            fake_strategy.pls_make_default_for_searching()
+        mock_es_client.indices.update_aliases.assert_not_called()
+        mock_es_client.reset_mock()
+        mock_es_client.options.return_value.cluster.health.return_value = {'timed_out': False, 'status': 'green'}
+        fake_strategy.pls_stop_bulk_load()
+        mock_es_client.indices.put_settings.assert_called_once_with(
+            index=_indexname,
+            settings={
+                'index.number_of_replicas': None,
+                'index.refresh_interval': None,
+                'index.translog.durability': None,
+            },
+        )
+        mock_es_client.indices.forcemerge.assert_called_once_with(index=_indexname, wait_for_completion=False)
+        mock_es_client.options.return_value.cluster.health.assert_called_once_with(
+            index=[_indexname],
+            wait_for_status='green',
+            timeout=mock.ANY,
+        )
+        mock_es_client.indices.get_settings.return_value = {_indexname: {'settings': {}}}
+        fake_strategy.pls_make_default_for_searching()
+        mock_es_client.indices.update_aliases.assert_called_once()
+
+    def test_bulk_load_not_default(self, fake_strategy, mock_es_client):
+        mock_es_client.indices.get_alias.return_value = {f'{fake_strategy.indexname_prefix}*': {}}
+        fake_strategy.pls_start_bulk_load()
+        mock_es_client.indices.put_settings.assert_not_called()
+
+    @pytest.mark.django_db
+    def test_start_backfill_failed(self, fake_strategy, mock_es_client):
+        mock_es_client.indices.get_alias.return_value = {'fake_es8__anothercheck': {}}
+        with mock.patch(
+            'share.models.index_backfill.task__schedule_index_backfill.apply_async',
+            side_effect=ValueError('no broker'),
+        ):
+            fake_strategy.pls_start_backfill()
+        assert fake_strategy.get_or_create_backfill().backfill_status == 'error'
+        mock_es_client.indices.put_settings.assert_not_called()  # (no bulk-load settings left behind)
+
+    def test_stop_bulk_load_not_yet_green(self, fake_strategy, mock_es_client):
+        mock_es_client.options.return_value.cluster.health.return_value = {'timed_out': True, 'status': 'yellow'}
+        with pytest.raises(IndexStrategyError):
+            fake_strategy.pls_stop_bulk_load()
+
+    def test_get_setting(self):
+        for _index_settings in (
+            {'number_of_replicas': 2},
+            {'index': {'number_of_replicas': 2}},
+            {'index.number_of_replicas': 2},
+        ):
+            assert _get_setting(_index_settings, 'number_of_replicas') == 2
+        assert _get_setting({'translog': {'durability': 'request'}}, 'translog.durability') == 'request'
+        assert _get_setting({'translog.durability': 'request'}, 'translog.durability') == 'request'
+        assert _get_setting({'number_of_shards': 5}, 'refresh_interval') is None
+
+    def test_client_options(self, settings):
+        settings.ELASTICSEARCH = {
+            **settings.ELASTICSEARCH,
+            'HTTP_COMPRESS': True,
+            'CONNECTIONS_PER_NODE': 17,
+            'SERIALIZER': 'json',
+        }
+        Elastic8IndexStrategy._get_elastic8_client.cache_clear()
+        try:
+            with mock.patch('elasticsearch8.Elasticsearch') as _mock_elasticsearch:
+                Elastic8IndexStrategy._get_elastic8_client()
+        finally:
+            Elastic8IndexStrategy._get_elastic8_client.cache_clear()
+        _kwargs = _mock_elasticsearch.call_args.kwargs
+        assert _kwargs['http_compress'] is True
+        assert _kwargs['connections_per_node'] == 17
+        assert set(_kwargs['serializers'].keys()) == {'application/json', 'application/x-ndjson'}
+
+    def test_get_es8_serializers(self):
+        _doc = {'hello': ['good', 'day'], 'n': 7}
+        for _serializer_name in ('json', 'orjson'):
+            _serializers = elastic8.get_es8_serializers(_serializer_name)
+            assert _serializers['application/json'].dumps(_doc) == b'{"hello":["good","day"],"n":7}'
+            assert _serializers['application/x-ndjson'].dumps([_doc, _doc]) == (
+                b'{"hello":["good","day"],"n":7}\n{"hello":["good","day"],"n":7}\n'
+            )
+        with mock.patch.object(elastic8, 'OrjsonSerializer', None):  # (as if not installed)
+            _serializers = elastic8.get_es8_serializers('orjson')
+        assert type(_serializers['application/json']) is elastic8.JsonSerializer
+        with pytest.raises(IndexStrategyError):
+            elastic8.get_es8_serializers('pickle')
+
+
+class FakeSourcehashingIndexStrategy(FakeElastic8IndexStrategy):
+    SOURCEHASH_EXCLUDED_FIELDS = frozenset({'chunk_timestamp'})
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.docs_by_target_id = {}
+        self.after_chunk_calls = []
+
+    def build_elastic_actions(self, messages_chunk):
+        for _target_id in messages_chunk.target_ids_chunk:
+            yield self.MessageActionSet(_target_id, {'': [
+                self.build_index_action(_doc_id, {**_doc, 'chunk_timestamp': messages_chunk.timestamp})
+                for _doc_id, _doc in self.docs_by_target_id[_target_id].items()
+            ]})
+
+    def after_chunk(self, messages_chunk, affected_indexnames, *, scrapless_keys=()):
+        self.after_chunk_calls.append(set(scrapless_keys))
+
+
+@pytest.mark.django_db
+class TestSkipUnchangedDocs:
+    @pytest.fixture
+    def fake_strategy(self, settings):
+        settings.ELASTICSEARCH8_URL = 'http://nowhere.example:12345/'
+        settings.ELASTICSEARCH = {**settings.ELASTICSEARCH, 'SKIP_UNCHANGED_DOCS': True}
+        _strategy = FakeSourcehashingIndexStrategy('fake_es8')
+        with mock.patch.object(_strategy, '_get_indexnames_for_action', return_value={'idx'}):
+            yield _strategy
+
+    @pytest.fixture
+    def sent_actions(self):
+        _sent_actions = []
+        self.error_docids = set()
+
+        def _fake_streaming_bulk(client, actions, **kwargs):
+            for _action in actions:
+                _sent_actions.append((_action['_op_type'], _action['_id']))
+                _ok = _action['_id'] not in self.error_docids
+                yield (_ok, {_action['_op_type']: {
+                    '_id': _action['_id'],
+                    '_index': _action['_index'],
+                    'status': (200 if _ok else 400),
+                }})
+        with mock.patch('share.search.index_strategy.elastic8.streaming_bulk', new=_fake_streaming_bulk):
+            yield _sent_actions
+
+    def _handle(self, strategy, *target_ids):
+        _responses = list(strategy.pls_handle_messages_chunk(
+            messages.MessagesChunk(messages.MessageType.INDEX_SUID, target_ids),
+        ))
+        return {_response.index_message.target_id: _response.is_done for _response in _responses}
+
+    def test_skip_unchanged(self, fake_strategy, sent_actions):
+        fake_strategy.docs_by_target_id = {
+            1: {'a': {'foo': 1}, 'b': {'foo': 2}},
+            2: {'c': {'foo': 3}},
+        }
+        assert self._handle(fake_strategy, 1, 2) == {1: True, 2: True}
+        assert sent_actions == [('index', 'a'), ('index', 'b'), ('index', 'c')]
+        assert fake_strategy.after_chunk_calls == [set()]
+        # no changes (but chunk_timestamp): nothing sent
+        sent_actions.clear()
+        assert self._handle(fake_strategy, 1, 2) == {1: True, 2: True}
+        assert sent_actions == []
+        assert fake_strategy.after_chunk_calls[-1] == {('idx', 1), ('idx', 2)}
+        # changed doc sent, scrap deleted by id
+        fake_strategy.docs_by_target_id[1] = {'a': {'foo': 1}, 'd': {'foo': 4}}
+        fake_strategy.docs_by_target_id[2] = {'c': {'foo': 33}}
+        assert self._handle(fake_strategy, 1, 2) == {1: True, 2: True}
+        assert sorted(sent_actions) == [('delete', 'b'), ('index', 'c'), ('index', 'd')]
+
+    def test_forget_on_error(self, fake_strategy, sent_actions):
+        fake_strategy.docs_by_target_id = {1: {'a': {'foo': 1}}}
+        self._handle(fake_strategy, 1)
+        fake_strategy.docs_by_target_id = {1: {'a': {'foo': 2}}}
+        self.error_docids.add('a')
+        assert self._handle(fake_strategy, 1) == {1: False}
+        # (unknown state -- send everything, and no longer scrapless)
+        self.error_docids.clear()
+        fake_strategy.docs_by_target_id = {1: {'a': {'foo': 1}}}
+        sent_actions.clear()
+        assert self._handle(fake_strategy, 1) == {1: True}
+        assert sent_actions == [('index', 'a')]
+        assert fake_strategy.after_chunk_calls[-1] == set()
@@ -1,8 +1,12 @@
+import json
+
+from django.test import TestCase
 from primitive_metadata import primitive_rdf as rdf
 
 from share.search import messages
 from share.search.index_strategy.sharev2_elastic8 import Sharev2Elastic8IndexStrategy
 from trove.vocab.namespaces import DCTERMS, SHAREv2, RDF, BLARG
+from trove.models import DerivedIndexcard
 from tests.trove.factories import create_indexcard
 from ._with_real_services import RealElasticTestCase
 
@@ -42,3 +46,43 @@ class TestSharev2Elastic8(RealElasticTestCase):
             _messages_chunk,
             expected_doc_count=1,
         )
+
+
+class TestSharev2Elastic8Actions(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.index_strategy = Sharev2Elastic8IndexStrategy('test_sharev2_elastic8')
+        self.indexcard = create_indexcard(
+            BLARG.hello,
+            {
+                RDF.type: {SHAREv2.CreativeWork},
+                DCTERMS.title: {rdf.literal('hello', language='en')},
+            },
+            deriver_iris=[SHAREv2.sharev2_elastic],
+        )
+        self.derived = DerivedIndexcard.objects.get(upriver_indexcard=self.indexcard)
+
+    def _build_actions(self):
+        _messages_chunk = messages.MessagesChunk(
+            messages.MessageType.INDEX_SUID,
+            [self.indexcard.source_record_suid_id],
+        )
+        return [
+            _action
+            for _actionset in self.index_strategy.build_elastic_actions(_messages_chunk)
+            for _action in _actionset.actions_by_subname['']
+        ]
+
+    def test_derived_json_as_is(self):
+        self.assertTrue(self.derived.derived_id)
+        (_action,) = self._build_actions()
+        self.assertEqual(_action['_op_type'], 'index')
+        self.assertEqual(_action['_id'], self.derived.derived_id)
+        self.assertEqual(_action['_source'], self.derived.derived_text)  # (not parsed)
+
+    def test_derived_without_doc_id(self):
+        _doc = {**json.loads(self.derived.derived_text), 'is_deleted': True}
+        DerivedIndexcard.objects.filter(pk=self.derived.pk).update(derived_id='', derived_text=json.dumps(_doc))
+        (_action,) = self._build_actions()
+        self.assertEqual(_action['_op_type'], 'delete')
+        self.assertEqual(_action['_id'], _doc['id'])
@@ -1,9 +1,26 @@
+import json
 from unittest import mock
+from urllib.parse import urlencode
 
+from django.conf import settings
+from django.test import TestCase, override_settings
+from primitive_metadata import primitive_rdf as rdf
+
+from share.models import PendingScraps
+from share.search import messages
 from share.search.index_strategy.trovesearch_denorm import (
     TrovesearchDenormIndexStrategy,
-    task__delete_iri_value_scraps,
+    _build_iri_valuesearch,
+    _each_prefiltered_card_pk,
+    task__delete_pending_iri_value_scraps,
 )
+from tests.share.search import patch_index_strategies
+from tests.trove.factories import create_indexcard
+from trove import exceptions as trove_exceptions
+from trove.trovesearch.page_cursor import OffsetCursor
+from trove.trovesearch.search_params import ValuesearchParams
+from trove.models import IndexableCard
+from trove.vocab.namespaces import BLARG, DCTERMS, RDF, TROVE
 
 from . import _common_trovesearch_tests
 
@@ -12,19 +29,199 @@ class TestTrovesearchDenorm(_common_trovesearch_tests.CommonTrovesearchTests):
     def setUp(self):
         super().setUp()
 
-        # make the followup delete task eager
-        def _fake_apply_async(*args, **kwargs):
-            self.index_strategy.pls_refresh()
-            kwargs['countdown'] = 0  # don't wait
-            task__delete_iri_value_scraps.apply(*args, **kwargs)
+        # make the followup scrap deletion eager
+        _original_after_chunk = TrovesearchDenormIndexStrategy.after_chunk
+
+        def _after_chunk_and_delete_scraps(index_strategy, *args, **kwargs):
+            _original_after_chunk(index_strategy, *args, **kwargs)
+            index_strategy.pls_refresh()
+            task__delete_pending_iri_value_scraps.apply()
         self.enterContext(
             mock.patch.object(
-                task__delete_iri_value_scraps,
-                'apply_async',
-                new=_fake_apply_async,
+                TrovesearchDenormIndexStrategy,
+                'after_chunk',
+                new=_after_chunk_and_delete_scraps,
             )
         )
+        self.enterContext(override_settings(ELASTICSEARCH={
+            **settings.ELASTICSEARCH,
+            'POST_INDEX_DELAY': 0,  # don't wait
+        }))
 
     # for RealElasticTestCase
     def get_index_strategy(self):
         return TrovesearchDenormIndexStrategy('test_trovesearch_denorm')
+
+
+class TestTrovesearchDenormSourcedocs(TestCase):
+    def setUp(self):
+        super().setUp()
+        _indexcard = create_indexcard(BLARG.hello, {
+            RDF.type: {BLARG.Thing},
+            DCTERMS.title: {rdf.literal('hello, and such', language='en')},
+            DCTERMS.description: {rdf.literal('long words ' * 99, language='en')},
+            DCTERMS.subject: {BLARG.subj_a, BLARG.subj_b},
+            DCTERMS.creator: {BLARG.someone},
+        }, deriver_iris=[TROVE['derive/osfmap_json']])
+        (self.indexable_card,) = IndexableCard.objects.for_indexing([_indexcard.pk])
+
+    def _valuesearch_docs(self, **kwargs):
+        _docbuilder = TrovesearchDenormIndexStrategy._SourcedocBuilder(self.indexable_card, 7, **kwargs)
+        return dict(_docbuilder.build_valuesearch_docs())
+
+    def test_card_in_values(self):
+        _full_docs = self._valuesearch_docs(full_card_in_values=True)
+        _docs = self._valuesearch_docs()
+        self.assertEqual(_docs.keys(), _full_docs.keys())
+        self.assertEqual(len(_docs), 4)  # Thing, subj_a, subj_b, someone
+        for _doc_id, _doc in _docs.items():
+            _full_doc = _full_docs[_doc_id]
+            self.assertEqual(_doc['iri_value'], _full_doc['iri_value'])
+            self.assertEqual(
+                set(_doc['card'].keys()),
+                set(TrovesearchDenormIndexStrategy._card_in_values_mappings().keys()),
+            )
+            self.assertNotIn('text_by_propertypath', _doc['card'])
+            self.assertEqual(_doc['card']['iri_by_propertypath'], _full_doc['card']['iri_by_propertypath'])
+            self.assertLess(len(json.dumps(_doc)), len(json.dumps(_full_doc)))
+
+    def test_valuesearch_prefilter(self):
+        _params = ValuesearchParams.from_querystring(urlencode({
+            'valueSearchPropertyPath': 'subject',
+            'cardSearchText': 'hello',
+        }))
+        _with_text = _build_iri_valuesearch(_params, OffsetCursor())
+        _prefiltered = _build_iri_valuesearch(_params, OffsetCursor(), card_pks=['7', '8'])
+        self.assertIn('simple_query_string', json.dumps(_with_text['query']))
+        self.assertNotIn('simple_query_string', json.dumps(_prefiltered['query']))
+        self.assertIn({'terms': {'card.card_pk': ['7', '8']}}, _prefiltered['query']['bool']['filter'])
+        # many card pks split among terms queries
+        with mock.patch(f'{_build_iri_valuesearch.__module__}.VALUESEARCH_CARD_PKS_PER_TERMS_QUERY', 2):
+            _prefiltered = _build_iri_valuesearch(_params, OffsetCursor(), card_pks=['7', '8', '9'])
+        self.assertIn(
+            {'bool': {'should': [
+                {'terms': {'card.card_pk': ['7', '8']}},
+                {'terms': {'card.card_pk': ['9']}},
+            ], 'minimum_should_match': 1}},
+            _prefiltered['query']['bool']['filter'],
+        )
+
+    def test_valuesearch_prefilter_pages(self):
+        _params = ValuesearchParams.from_querystring(urlencode({
+            'valueSearchPropertyPath': 'subject',
+            'cardSearchText': 'hello',
+        }))
+        _mock_es8_client = mock.Mock()
+        _mock_es8_client.search.side_effect = [_fake_page('1', '2'), _fake_page('3', '4'), _fake_page('5')]
+        with mock.patch(f'{_build_iri_valuesearch.__module__}.VALUESEARCH_CARD_PREFILTER_PAGE_SIZE', 2):
+            _card_pks = list(_each_prefiltered_card_pk(_mock_es8_client, 'cards', _params, max_count=10))
+        self.assertEqual(_card_pks, ['1', '2', '3', '4', '5'])  # (all, not only the first page)
+        self.assertEqual(
+            [_call.kwargs.get('search_after') for _call in _mock_es8_client.search.call_args_list],
+            [None, ['2'], ['4']],
+        )
+
+    def test_valuesearch_prefilter_max(self):
+        _params = ValuesearchParams.from_querystring(urlencode({
+            'valueSearchPropertyPath': 'subject',
+            'cardSearchText': 'data',
+        }))
+        _mock_es8_client = mock.Mock()
+        _mock_es8_client.search.side_effect = [_fake_page('1', '2'), _fake_page('3', '4')]
+        with (
+            mock.patch(f'{_build_iri_valuesearch.__module__}.VALUESEARCH_CARD_PREFILTER_PAGE_SIZE', 2),
+            mock.patch.object(TrovesearchDenormIndexStrategy, 'es8_client', new=_mock_es8_client),
+            override_settings(ELASTICSEARCH={**settings.ELASTICSEARCH, 'VALUESEARCH_CARD_PREFILTER_MAX': 3}),
+        ):
+            _strategy = TrovesearchDenormIndexStrategy('test_trovesearch_denorm')
+            with self.assertRaises(trove_exceptions.InvalidSearchText):
+                _strategy._prefilter_card_pks(_params)
+        # stops after one more than the max, without paging through every match
+        self.assertEqual(
+            [_call.kwargs['size'] for _call in _mock_es8_client.search.call_args_list],
+            [2, 2],
+        )
+
+
+def _fake_page(*card_pks):
+    return {'hits': {'hits': [
+        {'fields': {'card.card_pk': [_card_pk]}, 'sort': [_card_pk]}
+        for _card_pk in card_pks
+    ]}}
+
+
+class TestPendingScraps(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.index_strategy = TrovesearchDenormIndexStrategy('test_trovesearch_denorm')
+        self.enterContext(patch_index_strategies([self.index_strategy]))
+        self.indexname = self.index_strategy.irivaluesearch_index().full_index_name
+        self.mock_es8_client = mock.Mock()
+        self.mock_es8_client.delete_by_query.return_value = {'deleted': 3, 'version_conflicts': 0}
+        self.enterContext(mock.patch.object(
+            TrovesearchDenormIndexStrategy,
+            'es8_client',
+            new=self.mock_es8_client,
+        ))
+        self.enterContext(override_settings(ELASTICSEARCH={
+            **settings.ELASTICSEARCH,
+            'POST_INDEX_DELAY': 0,
+            'SCRAP_DELETE_BATCH_SIZE': 2,
+        }))
+
+    def _pending(self):
+        return set(PendingScraps.objects.values_list('indexname', 'target_id', 'before_timestamp'))
+
+    def test_collect_scraps(self):
+        _chunk_a = messages.MessagesChunk(messages.MessageType.UPDATE_INDEXCARD, [1, 2])
+        _chunk_b = messages.MessagesChunk(messages.MessageType.UPDATE_INDEXCARD, [2, 3])
+        self.index_strategy.after_chunk(_chunk_a, [self.indexname])
+        self.index_strategy.after_chunk(_chunk_b, [self.indexname], scrapless_keys={(self.indexname, 3)})
+        self.assertEqual(self._pending(), {
+            (self.indexname, 1, _chunk_a.timestamp),
+            (self.indexname, 2, _chunk_b.timestamp),  # (replaced by later chunk)
+        })
+        self.mock_es8_client.delete_by_query.assert_not_called()
+
+    def test_delete_collected(self):
+        PendingScraps.objects.add_pending(self.indexname, [1, 2], 5)
+        PendingScraps.objects.add_pending(self.indexname, [3], 7)
+        task__delete_pending_iri_value_scraps.apply()
+        self.assertEqual(self._pending(), set())
+        # one delete per index per batch (batch size 2)
+        self.assertEqual(
+            [_call.kwargs['query'] for _call in self.mock_es8_client.delete_by_query.call_args_list],
+            [
+                {'bool': {'must': [
+                    {'terms': {'card.card_pk': [1, 2]}},
+                    {'range': {'chunk_timestamp': {'lt': 5}}},
+                ]}},
+                {'bool': {'must': [
+                    {'terms': {'card.card_pk': [3]}},
+                    {'range': {'chunk_timestamp': {'lt': 7}}},
+                ]}},
+            ],
+        )
+
+    def test_keep_on_conflict(self):
+        self.mock_es8_client.delete_by_query.return_value = {'deleted': 1, 'version_conflicts': 2}
+        PendingScraps.objects.add_pending(self.indexname, [1, 2], 5)
+        task__delete_pending_iri_value_scraps.apply()
+        self.mock_es8_client.delete_by_query.assert_called_once()  # (waits for next run)
+        self.assertEqual(self._pending(), {(self.indexname, 1, 5), (self.indexname, 2, 5)})
+
+    def test_keep_if_replaced(self):
+        PendingScraps.objects.add_pending(self.indexname, [1], 5)
+        _pendings = PendingScraps.objects.ripe_by_indexname(before_timestamp=10, limit=10)[self.indexname]
+        PendingScraps.objects.add_pending(self.indexname, [1], 9)
+        PendingScraps.objects.forget(_pendings)
+        self.assertEqual(self._pending(), {(self.indexname, 1, 9)})
+
+    def test_keep_later_timestamp(self):
+        PendingScraps.objects.add_pending(self.indexname, [1, 2], 9)
+        PendingScraps.objects.add_pending(self.indexname, [2, 3], 5)  # (earlier chunk, finished later)
+        self.assertEqual(self._pending(), {
+            (self.indexname, 1, 9),
+            (self.indexname, 2, 9),
+            (self.indexname, 3, 5),
+        })
@@ -0,0 +1,93 @@
+from django.test import SimpleTestCase
+from primitive_metadata import primitive_rdf as rdf
+
+from share.search.index_strategy import _trovesearch_util as ts
+from trove.vocab.namespaces import BLARG, DCTERMS, FOAF, OWL
+
+
+def _walk_values(walk: ts.GraphWalk):
+    return (
+        dict(walk.iri_values),
+        dict(walk.text_values),
+        dict(walk.date_values),
+        dict(walk.integer_values),
+        walk.paths_walked,
+    )
+
+
+class TestGraphWalk(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rdfdoc = rdf.RdfGraph({
+            BLARG.project: {
+                DCTERMS.title: {rdf.literal('project', language='en')},
+                DCTERMS.creator: {BLARG.alice},
+                DCTERMS.hasPart: {BLARG.part_a, BLARG.part_b},
+            },
+            BLARG.part_a: {
+                DCTERMS.isPartOf: {BLARG.project},
+                DCTERMS.creator: {BLARG.alice, BLARG.bob},
+                DCTERMS.references: {BLARG.part_b},
+            },
+            BLARG.part_b: {
+                DCTERMS.isPartOf: {BLARG.project},
+                DCTERMS.references: {BLARG.part_a},  # a cycle (not thru the focus)
+            },
+            BLARG.alice: {
+                FOAF.name: {rdf.literal('alice', language='en')},
+                OWL.sameAs: {BLARG.alice_elsewhere},
+            },
+            BLARG.bob: {
+                FOAF.name: {rdf.literal('bob', language='en')},
+            },
+        })
+
+    def test_fullwalk(self):
+        _walk = ts.GraphWalk(self.rdfdoc, BLARG.project)
+        self.assertEqual(_walk.iri_values[(DCTERMS.hasPart,)], {BLARG.part_a, BLARG.part_b})
+        self.assertEqual(
+            _walk.iri_values[(DCTERMS.hasPart, DCTERMS.references, DCTERMS.creator)],
+            {BLARG.alice, BLARG.bob},  # from part_b to part_a
+        )
+        # reached again, but not walked from again
+        self.assertEqual(
+            _walk.iri_values[(DCTERMS.hasPart, DCTERMS.references, DCTERMS.references)],
+            {BLARG.part_a, BLARG.part_b},
+        )
+        self.assertNotIn(
+            (DCTERMS.hasPart, DCTERMS.references, DCTERMS.references, DCTERMS.creator),
+            _walk.iri_values,
+        )
+        self.assertEqual(
+            _walk.text_values,
+            {
+                (DCTERMS.title,): {rdf.literal('project', language='en')},
+                (DCTERMS.creator, FOAF.name): {rdf.literal('alice', language='en')},
+            },
+        )
+
+    def test_shortwalks_same_as_fresh_walks(self):
+        _fullwalk = ts.GraphWalk(self.rdfdoc, BLARG.project)
+        for _iri in _fullwalk.paths_by_iri:
+            _shortwalk = _fullwalk.shortwalk_from(_iri)
+            self.assertIs(_shortwalk.memo, _fullwalk.memo)
+            _freshwalk = ts.GraphWalk(self.rdfdoc, _iri, already_visiting={BLARG.project})
+            self.assertIsNot(_freshwalk.memo, _fullwalk.memo)
+            self.assertEqual(_walk_values(_shortwalk), _walk_values(_freshwalk), _iri)
+
+    def test_memoized_subwalks(self):
+        _fullwalk = ts.GraphWalk(self.rdfdoc, BLARG.project)
+        _memo = _fullwalk.memo
+        # not on a cycle: walked once
+        self.assertIs(_memo.subwalk(BLARG.alice), _memo.subwalk(BLARG.alice))
+        # on a cycle: depends on the path taken, so walked each time
+        self.assertIsNot(_memo.subwalk(BLARG.part_a), _memo.subwalk(BLARG.part_a))
+        self.assertEqual(_fullwalk.shortwalk_from(BLARG.project).paths_walked, set())
+
+    def test_suffuniq_synonyms(self):
+        _walk = ts.GraphWalk(self.rdfdoc, BLARG.project)
+        self.assertEqual(
+            set(_walk.suffuniq_synonyms([BLARG.alice, BLARG.bob])),
+            set(ts.suffuniq_iris([BLARG.alice, BLARG.alice_elsewhere, BLARG.bob])),
+        )
+        self.assertEqual(_walk.memo.iri_synonyms(BLARG.alice), {BLARG.alice, BLARG.alice_elsewhere})
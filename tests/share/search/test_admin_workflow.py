@@ -1,8 +1,10 @@
 from django.test.client import Client
 import pytest
 
-from share.models import ShareUser
+from share.models import IndexBackfill, IndexBackfillPartition, IndexerDaemonStatus, ShareUser
 from share.search import index_strategy
+from share.search.index_strategy.trovesearch_denorm import TrovesearchDenormIndexStrategy
+from tests.share.search import patch_index_strategies
 
 
 @pytest.mark.django_db
@@ -11,11 +13,45 @@ def test_admin_search_indexes_view(mock_elastic_clients):
     ShareUser.objects.create_superuser(**credentials)
     client = Client()
     client.login(**credentials)
+    for strategy_name in index_strategy.all_strategy_names():
+        IndexerDaemonStatus.objects.report(
+            index_strategy_name=strategy_name,
+            message_type='INDEX_SUID',
+            daemon_name=f'daemonhost:{strategy_name}',
+            chunk_rate={'chunk_size': 123},
+        )
     resp = client.get('/admin/search-indexes')
     for strategy_name in index_strategy.all_strategy_names():
         _index_strategy = index_strategy.get_strategy(strategy_name)
         expected_header = f'<h2 id="{_index_strategy.strategy_name}">'
         assert expected_header.encode() in resp.content
+        assert f'daemonhost:{strategy_name}'.encode() in resp.content
         for _index in _index_strategy.each_subnamed_index():
             expected_row = f'<tr id="{_index.full_index_name}">'
             assert expected_row.encode() in resp.content
+
+
+@pytest.mark.django_db
+def test_admin_backfill_progress(mock_elastic_clients):
+    credentials = {'username': 'test-test-test', 'password': 'password-password'}
+    ShareUser.objects.create_superuser(**credentials)
+    client = Client()
+    client.login(**credentials)
+    _strategy = TrovesearchDenormIndexStrategy('trovesearch_denorm')
+    _index_backfill = IndexBackfill.objects.create(
+        index_strategy_name=_strategy.strategy_name,
+        specific_indexname=str(_strategy.CURRENT_STRATEGY_CHECKSUM),
+        backfill_status=IndexBackfill.SCHEDULING,
+    )
+    IndexBackfillPartition.objects.create(
+        index_backfill=_index_backfill,
+        partition_index=0,
+        start_pk=1,
+        target_count=10,
+        indexed_count=4,
+        error_message='ValueError: oh no',
+    )
+    with patch_index_strategies([_strategy]):
+        resp = client.get('/admin/search-indexes')
+    assert b'40.0%' in resp.content
+    assert b'ValueError: oh no' in resp.content
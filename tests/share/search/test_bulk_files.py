@@ -0,0 +1,112 @@
+import gzip
+import json
+from unittest import mock
+
+import pytest
+
+from share.search.bulk_files import MANIFEST_FILENAME, export_bulk_files, load_bulk_files
+from share.search.exceptions import IndexStrategyError
+from tests.factories import SourceUniqueIdentifierFactory
+from tests.share.search.index_strategy.test_elastic8 import FakeElastic8IndexStrategy
+
+
+class FakeBuildingIndexStrategy(FakeElastic8IndexStrategy):
+    def build_elastic_actions(self, messages_chunk):
+        for _target_id in messages_chunk.target_ids_chunk:
+            yield self.MessageActionSet(_target_id, {
+                '': [
+                    self.build_index_action(_target_id, {'target': _target_id}),
+                    self.build_delete_action(f'scrap-{_target_id}'),
+                ],
+            })
+
+
+def _read_bulk_lines(filepath):
+    with gzip.open(filepath, 'rt') as _file:
+        return [json.loads(_line) for _line in _file]
+
+
+def _fake_bulk(*, index, operations):
+    _lines = operations.splitlines()
+    return {'items': [
+        {'create': {'_id': json.loads(_action_line)['create']['_id'], 'status': 201}}
+        for _action_line in _lines[::2]
+    ]}
+
+
+@pytest.mark.django_db
+class TestBulkFiles:
+    @pytest.fixture
+    def fake_strategy(self, settings):
+        settings.ELASTICSEARCH8_URL = 'http://nowhere.example:12345/'
+        return FakeBuildingIndexStrategy('fake_es8')
+
+    @pytest.fixture
+    def suids(self):
+        return sorted(SourceUniqueIdentifierFactory.create_batch(3), key=lambda _suid: _suid.pk)
+
+    def test_roundtrip(self, fake_strategy, suids, tmp_path):
+        _manifest = export_bulk_files(fake_strategy, tmp_path, chunk_size=2, processes=0)
+        assert _manifest['target_count'] == 3
+        assert _manifest['indexes'] == {'': {'mappings': {'my-mappings': 'lol'}, 'doc_count': 3}}
+        assert json.loads((tmp_path / MANIFEST_FILENAME).read_text()) == _manifest
+        _filepaths = sorted((tmp_path / '_').iterdir())
+        assert [_path.name for _path in _filepaths] == ['00000000.ndjson.gz', '00000001.ndjson.gz']
+        _suid_pks = [_suid.pk for _suid in suids]
+        assert _read_bulk_lines(_filepaths[0]) == [
+            {'create': {'_id': str(_suid_pks[0])}},
+            {'target': _suid_pks[0]},
+            {'create': {'_id': str(_suid_pks[1])}},
+            {'target': _suid_pks[1]},
+        ]
+        # not again into the same directory
+        with pytest.raises(IndexStrategyError):
+            export_bulk_files(fake_strategy, tmp_path, chunk_size=2, processes=0)
+        # load
+        _es8_client = fake_strategy.es8_client
+        _es8_client.indices.exists.return_value = True
+        _es8_client.bulk.side_effect = _fake_bulk
+        with (
+            mock.patch.object(fake_strategy, 'pls_start_bulk_load') as _mock_start,
+            mock.patch.object(fake_strategy, 'pls_stop_bulk_load') as _mock_stop,
+        ):
+            _counts = load_bulk_files(fake_strategy, tmp_path, docs_per_request=2, threads=2)
+        _mock_start.assert_called_once_with()
+        _mock_stop.assert_called_once_with()
+        assert _counts == {'': {'created': 3}}
+        _indexname = fake_strategy.get_index('').full_index_name
+        assert sorted(
+            len(_call.kwargs['operations'].splitlines())
+            for _call in _es8_client.bulk.call_args_list
+        ) == [2, 4]
+        assert {_call.kwargs['index'] for _call in _es8_client.bulk.call_args_list} == {_indexname}
+
+    def test_load_error_not_hidden(self, fake_strategy, suids, tmp_path):
+        export_bulk_files(fake_strategy, tmp_path, chunk_size=2, processes=0)
+        fake_strategy.es8_client.indices.exists.return_value = True
+        fake_strategy.es8_client.bulk.side_effect = ValueError('oh no')
+        with (
+            mock.patch.object(fake_strategy, 'pls_start_bulk_load'),
+            mock.patch.object(
+                fake_strategy,
+                'pls_stop_bulk_load',
+                side_effect=IndexStrategyError('not yet green'),
+            ) as _mock_stop,
+            pytest.raises(ValueError),
+        ):
+            load_bulk_files(fake_strategy, tmp_path, docs_per_request=2, threads=2)
+        _mock_stop.assert_called_once_with()
+
+    def test_load_refuses_changed_mappings(self, fake_strategy, suids, tmp_path):
+        export_bulk_files(fake_strategy, tmp_path, chunk_size=2, processes=0)
+        _manifest = json.loads((tmp_path / MANIFEST_FILENAME).read_text())
+        _manifest['indexes']['']['mappings'] = {'other-mappings': 'lol'}
+        (tmp_path / MANIFEST_FILENAME).write_text(json.dumps(_manifest))
+        fake_strategy.es8_client.indices.exists.return_value = True
+        with pytest.raises(IndexStrategyError):
+            load_bulk_files(fake_strategy, tmp_path, docs_per_request=2, threads=2)
+        fake_strategy.es8_client.bulk.assert_not_called()
+
+    def test_load_incomplete_export(self, fake_strategy, tmp_path):
+        with pytest.raises(IndexStrategyError):
+            load_bulk_files(fake_strategy, tmp_path, docs_per_request=2, threads=2)
@@ -0,0 +1,107 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from share.models import IndexerDaemonStatus
+from share.search.chunk_rate import AdaptiveChunkRate, ChunkOutcome
+
+
+def _new_chunk_rate(**kwargs):
+    return AdaptiveChunkRate(**{
+        'min_chunk_size': 100,
+        'max_chunk_size': 300,
+        'min_in_flight_chunks': 1,
+        'max_in_flight_chunks': 3,
+        'increase_step': 100,
+        'decrease_factor': 0.5,
+        'target_seconds_per_chunk': 10,
+        **kwargs,
+    })
+
+
+HEALTHY = ChunkOutcome(doc_count=100, seconds=1)
+PRESSURED = ChunkOutcome(doc_count=50, pressure_count=1, seconds=1)
+SLOW = ChunkOutcome(doc_count=100, seconds=11)
+
+
+class TestAdaptiveChunkRate(SimpleTestCase):
+    def _settings(self, chunk_rate):
+        return (chunk_rate.chunk_size, chunk_rate.in_flight_chunks)
+
+    def test_additive_increase(self):
+        _chunk_rate = _new_chunk_rate()
+        self.assertEqual(self._settings(_chunk_rate), (100, 1))
+        _observed = []
+        for _ in range(5):
+            _chunk_rate.observe(HEALTHY)
+            _observed.append(self._settings(_chunk_rate))
+        self.assertEqual(_observed, [
+            (200, 1),
+            (300, 1),
+            (300, 2),  # chunk size at max; more in flight
+            (300, 3),
+            (300, 3),  # all at max
+        ])
+
+    def test_multiplicative_decrease(self):
+        _chunk_rate = _new_chunk_rate(chunk_size=300, in_flight_chunks=3)
+        _chunk_rate.observe(PRESSURED)
+        self.assertEqual(self._settings(_chunk_rate), (150, 1))
+        _chunk_rate.observe(PRESSURED)
+        self.assertEqual(self._settings(_chunk_rate), (100, 1))  # (at min)
+        self.assertEqual(_chunk_rate.pressured_chunk_count, 2)
+
+    def test_slow_chunk(self):
+        _chunk_rate = _new_chunk_rate(chunk_size=300)
+        _chunk_rate.observe(SLOW)
+        self.assertEqual(self._settings(_chunk_rate), (150, 1))
+        self.assertEqual(_chunk_rate.slow_chunk_count, 1)
+        self.assertEqual(_chunk_rate.last_chunk_seconds, 11)
+
+    def test_empty_chunk(self):
+        _chunk_rate = _new_chunk_rate()
+        _chunk_rate.observe(ChunkOutcome())
+        self.assertEqual(self._settings(_chunk_rate), (100, 1))
+
+    @override_settings(INDEXER_CHUNK_RATE={
+        'MIN_CHUNK_SIZE': 10,
+        'MAX_CHUNK_SIZE': 1000,
+        'MIN_IN_FLIGHT_CHUNKS': 1,
+        'MAX_IN_FLIGHT_CHUNKS': 2,
+        'INCREASE_STEP': 10,
+        'DECREASE_FACTOR': 0.5,
+        'TARGET_SECONDS_PER_CHUNK': 5,
+        'REPORT_SECONDS': 1,
+        'BY_STRATEGY': {'slowpoke': {'MAX_CHUNK_SIZE': 20}},
+    })
+    def test_for_strategy(self):
+        self.assertEqual(AdaptiveChunkRate.for_strategy('anything').max_chunk_size, 1000)
+        _slowpoke = AdaptiveChunkRate.for_strategy('slowpoke')
+        self.assertEqual(_slowpoke.max_chunk_size, 20)
+        self.assertEqual(_slowpoke.min_chunk_size, 10)
+
+
+class TestIndexerDaemonStatus(TestCase):
+    def test_report(self):
+        _chunk_rate = _new_chunk_rate()
+        for _ in range(2):
+            IndexerDaemonStatus.objects.report(
+                index_strategy_name='foo',
+                message_type='INDEX_SUID',
+                daemon_name='host:123',
+                chunk_rate=_chunk_rate.as_status(),
+            )
+            _chunk_rate.observe(HEALTHY)
+        (_status,) = IndexerDaemonStatus.objects.recent()
+        self.assertEqual(_status.chunk_rate['chunk_size'], 200)
+        self.assertEqual(_status.chunk_rate['chunk_count'], 1)
+        self.assertEqual(_status.parsed_turtle_cache, {})
+
+    def test_report_parsed_turtle_cache(self):
+        IndexerDaemonStatus.objects.report(
+            index_strategy_name='foo',
+            message_type='INDEX_SUID',
+            daemon_name='host:123',
+            chunk_rate=_new_chunk_rate().as_status(),
+            parsed_turtle_cache={'hits': 7, 'misses': 3},
+        )
+        (_status,) = IndexerDaemonStatus.objects.recent()
+        self.assertEqual(_status.parsed_turtle_cache, {'hits': 7, 'misses': 3})
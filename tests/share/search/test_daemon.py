@@ -6,6 +6,7 @@ from unittest import mock
 from project.celery import app as celery_app
 from share.search.daemon import (
     IndexerDaemonControl,
+    IndexerDaemonSupervisor,
     MINIMUM_BACKOFF_FACTOR,
     MAXIMUM_BACKOFF_FACTOR,
     UNPRESSURED_TIMEOUT,
@@ -103,6 +104,20 @@ class TestIndexerDaemon:
             assert message_1.acked
             assert message_2.acked
 
+    def test_packed_message_ack_after_all(self):
+        index_strategy = FakeIndexStrategyWithBlockingEvents()
+        with _daemon_running(index_strategy) as daemon:
+            message = FakeCeleryMessage(messages.MessageType.INDEX_SUID, 1)
+            message.payload = messages.V4Message.compose_chunk(messages.MessageType.INDEX_SUID, [1, 2])
+            daemon.on_message(message.payload, message)
+            wait_for(index_strategy.next_message_ready)
+            index_strategy.next_message_released.set()  # daemon may continue
+            wait_for(index_strategy.next_message_ready)  # wait for daemon
+            assert not message.acked  # (one of two done)
+            index_strategy.next_message_released.set()  # daemon may continue
+            wait_for(index_strategy.message_stream_done)  # wait for daemon
+            assert message.acked
+
     def test_unsupported_message_type(self):
         with _daemon_running(FakeIndexStrategyForSetupOnly()) as daemon:
             unsupported_message = FakeCeleryMessage(
@@ -159,6 +174,40 @@ class TestIndexerDaemon:
                 'daemon should have stopped'
             )
 
+    def test_backfill_progress(self):
+        _progress_noted = threading.Event()
+        _mock_backfill = mock.Mock(strategy_checksum='checksum')
+        _mock_backfill.pls_note_indexed.side_effect = lambda *args: _progress_noted.set()
+
+        class FakeIndexStrategyWithBackfill:
+            CURRENT_STRATEGY_CHECKSUM = 'checksum'
+            strategy_name = 'fakefake-with-backfill-progress'
+            supported_message_types = {messages.MessageType.BACKFILL_SUID}
+            nonurgent_messagequeue_name = 'fake.nonurgent'
+            urgent_messagequeue_name = 'fake.urgent'
+
+            def get_or_create_backfill(self):
+                return _mock_backfill
+
+            def pls_handle_messages_chunk(self, messages_chunk):
+                for target_id in messages_chunk.target_ids_chunk:
+                    yield messages.IndexMessageResponse(
+                        is_done=(target_id != 2),
+                        index_message=messages.IndexMessage(messages_chunk.message_type, target_id),
+                        status_code=(200 if target_id != 2 else 418),
+                        error_text=None,
+                    )
+
+        with mock.patch('share.search.daemon.sentry_sdk'), mock.patch('share.search.messages.celery'):
+            with _daemon_running(FakeIndexStrategyWithBackfill()) as daemon:
+                message = FakeCeleryMessage(messages.MessageType.BACKFILL_SUID, 1)
+                message.payload = messages.V4Message.compose_chunk(messages.MessageType.BACKFILL_SUID, [1, 2, 3])
+                message.channel = mock.Mock()
+                message.delivery_info = {'exchange': '', 'routing_key': 'fake.nonurgent'}
+                daemon.on_message(message.payload, message)
+                wait_for(_progress_noted)
+        _mock_backfill.pls_note_indexed.assert_called_once_with([1, 3], [2])
+
     def test_message_error(self):
         class FakeIndexStrategyWithMessageError:
             strategy_name = 'fakefake_with_msg_error'
@@ -190,6 +239,69 @@ class TestIndexerDaemon:
                     # but the message acked
                     assert message.acked
 
+    def test_chunks_in_flight(self, settings):
+        settings.INDEXER_CHUNK_RATE = {
+            **settings.INDEXER_CHUNK_RATE,
+            'MIN_CHUNK_SIZE': 1,
+            'MAX_CHUNK_SIZE': 1,
+            'MIN_IN_FLIGHT_CHUNKS': 2,
+            'MAX_IN_FLIGHT_CHUNKS': 2,
+        }
+
+        class FakeIndexStrategyWithSlowChunks:
+            strategy_name = 'fakefake_with_slow_chunks'
+            supported_message_types = {messages.MessageType.INDEX_SUID}
+            nonurgent_messagequeue_name = 'fake.nonurgent'
+            urgent_messagequeue_name = 'fake.urgent'
+
+            def __init__(self):
+                self.lock = threading.Lock()
+                self.started_target_ids = []
+                self.in_flight_count = 0
+                self.max_in_flight_count = 0
+                self.two_in_flight = threading.Event()
+                self.release_chunks = threading.Event()
+
+            def pls_handle_messages_chunk(self, messages_chunk):
+                with self.lock:
+                    self.started_target_ids.extend(messages_chunk.target_ids_chunk)
+                    self.in_flight_count += 1
+                    self.max_in_flight_count = max(self.max_in_flight_count, self.in_flight_count)
+                    if self.in_flight_count == 2:
+                        self.two_in_flight.set()
+                wait_for(self.release_chunks)
+                for target_id in messages_chunk.target_ids_chunk:
+                    yield messages.IndexMessageResponse(
+                        is_done=True,
+                        index_message=messages.IndexMessage(messages_chunk.message_type, target_id),
+                        status_code=200,
+                    )
+                with self.lock:
+                    self.in_flight_count -= 1
+
+        index_strategy = FakeIndexStrategyWithSlowChunks()
+        with _daemon_running(index_strategy) as daemon:
+            message_list = [
+                FakeCeleryMessage(messages.MessageType.INDEX_SUID, i)
+                for i in range(1, 4)
+            ]
+            for message in message_list:
+                daemon.on_message(message.payload, message)
+            wait_for(index_strategy.two_in_flight)
+            assert not index_strategy.release_chunks.wait(timeout=0.5)
+            assert sorted(index_strategy.started_target_ids) == [1, 2], (
+                'third chunk should wait until one of the first two is done'
+            )
+            assert not any(message.acked for message in message_list)
+            index_strategy.release_chunks.set()
+            for message in message_list:
+                for _ in range(TIMEOUT * 10):
+                    if message.acked:
+                        break
+                    daemon.stop_event.wait(timeout=0.1)
+                assert message.acked
+            assert index_strategy.max_in_flight_count == 2
+
     @mock.patch('share.search.daemon._backoff_wait', wraps=_backoff_wait)
     def test_backoff(self, mock_backoff_wait):
         class FakeIndexStrategyWith429:
@@ -253,3 +365,46 @@ class TestIndexerDaemon:
             )
             for message in message_list:
                 assert message.acked
+
+
+class TestIndexerDaemonSupervisor:
+    def test_shards_by_process(self, settings):
+        settings.ELASTICSEARCH = {**settings.ELASTICSEARCH, 'MESSAGEQUEUE_SHARD_COUNT': 5}
+        _supervisor = IndexerDaemonSupervisor(celery_app, process_count=2)
+        assert _supervisor.shards_by_process == [(0, 2, 4), (1, 3)]
+        with pytest.raises(exceptions.DaemonSetupError):
+            IndexerDaemonSupervisor(celery_app, process_count=6)
+
+    def test_restart_stopped(self, settings):
+        settings.ELASTICSEARCH = {**settings.ELASTICSEARCH, 'MESSAGEQUEUE_SHARD_COUNT': 2}
+        _supervisor = IndexerDaemonSupervisor(celery_app, process_count=2)
+        _started = []
+
+        def _fake_start_process(process_index):
+            _process = mock.Mock(name=f'process-{process_index}')
+            _process.is_alive.return_value = True
+            _started.append((process_index, _process))
+            return _process
+
+        with (
+            mock.patch.object(_supervisor, '_start_process', side_effect=_fake_start_process),
+            mock.patch('share.search.daemon.time.monotonic') as _mock_monotonic,
+        ):
+            _mock_monotonic.return_value = 100.0
+            _supervisor.start_any_stopped()
+            assert [_index for _index, _ in _started] == [0, 1]
+            _supervisor.start_any_stopped()  # all alive; nothing to do
+            assert len(_started) == 2
+            _started[1][1].is_alive.return_value = False
+            _supervisor.start_any_stopped()  # restarts immediately
+            assert [_index for _index, _ in _started] == [0, 1, 1]
+            _started[2][1].is_alive.return_value = False
+            _supervisor.start_any_stopped()  # died quickly again; backs off
+            assert len(_started) == 3
+            _mock_monotonic.return_value = 100.0 + MINIMUM_BACKOFF_FACTOR
+            _supervisor.start_any_stopped()
+            assert [_index for _index, _ in _started] == [0, 1, 1, 1]
+        _supervisor.stop_all()
+        for _, _process in _started:
+            if _process.is_alive.return_value:
+                _process.terminate.assert_called_once_with()
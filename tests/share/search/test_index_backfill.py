@@ -1,8 +1,16 @@
 from unittest import mock
 
+import kombu
 import pytest
 
-from share.models import IndexBackfill
+from share.models import IndexBackfill, IndexBackfillPartition
+from share.models.index_backfill import (
+    task__schedule_index_backfill,
+    task__schedule_index_backfill_partition,
+)
+from share.search.index_messenger import IndexMessenger
+from share.search.messages import MessageType
+from tests.factories import SourceUniqueIdentifierFactory
 
 
 @pytest.mark.django_db
@@ -50,3 +58,178 @@ class TestIndexBackfillMethods:
         assert index_backfill.error_type == ''
         assert index_backfill.error_message == ''
         assert index_backfill.error_context == ''
+
+
+@pytest.mark.django_db
+class TestScheduleIndexBackfill:
+    @pytest.fixture
+    def suid_pks(self):
+        return sorted(_suid.pk for _suid in SourceUniqueIdentifierFactory.create_batch(5))
+
+    @pytest.fixture
+    def index_backfill(self):
+        return IndexBackfill.objects.create(
+            index_strategy_name='foo',
+            backfill_status=IndexBackfill.WAITING,
+        )
+
+    @pytest.fixture
+    def mock_messenger(self):
+        _fake_strategy = mock.Mock(
+            backfill_message_type=MessageType.BACKFILL_SUID,
+            supported_message_types={MessageType.BACKFILL_SUID},
+        )
+        with (
+            mock.patch('share.search.index_strategy.get_strategy', return_value=_fake_strategy),
+            mock.patch('share.search.index_messenger.IndexMessenger') as _mock_messenger_class,
+        ):
+            _mock_messenger_class.return_value.get_queue_depth.return_value = 0
+            yield _mock_messenger_class.return_value
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, settings):
+        settings.ELASTICSEARCH = {
+            **settings.ELASTICSEARCH,
+            'CHUNK_SIZE': 2,
+            'BACKFILL_PARTITION_COUNT': 2,
+            'BACKFILL_QUEUE_HIGH_WATER': 10,
+        }
+
+    def _sent_target_ids(self, mock_messenger):
+        return [
+            list(_call.args[0].target_ids_chunk)
+            for _call in mock_messenger.send_messages_chunk.call_args_list
+        ]
+
+    def _split(self, index_backfill) -> list[IndexBackfillPartition]:
+        with mock.patch.object(task__schedule_index_backfill_partition, 'apply_async') as _mock_apply_async:
+            task__schedule_index_backfill(index_backfill.pk)
+        _partitions = list(index_backfill.partitions.order_by('partition_index'))
+        assert _mock_apply_async.call_args_list == [
+            mock.call((_partition.pk,))
+            for _partition in _partitions
+        ]
+        return _partitions
+
+    def test_split_and_schedule(self, suid_pks, index_backfill, mock_messenger):
+        _partitions = self._split(index_backfill)
+        index_backfill.refresh_from_db()
+        assert index_backfill.backfill_status == IndexBackfill.SCHEDULING
+        assert len(_partitions) == 2
+        assert _partitions[0].start_pk == suid_pks[0]
+        assert _partitions[1].end_pk is None
+        assert sum(_partition.target_count for _partition in _partitions) == 5
+        _pks_by_partition = [
+            [_pk for _pk in suid_pks if _partition.has_target_id(_pk)]
+            for _partition in _partitions
+        ]
+        for _partition, _pks in zip(_partitions, _pks_by_partition):
+            assert _partition.target_count == len(_pks)
+            mock_messenger.send_messages_chunk.reset_mock()
+            task__schedule_index_backfill_partition(_partition.pk)
+            assert [_pk for _chunk in self._sent_target_ids(mock_messenger) for _pk in _chunk] == _pks
+            _partition.refresh_from_db()
+            assert _partition.is_scheduled
+            assert _partition.scheduled_count == len(_pks)
+        index_backfill.refresh_from_db()
+        assert index_backfill.backfill_status == IndexBackfill.INDEXING
+        # again, without effect
+        task__schedule_index_backfill(index_backfill.pk)
+        assert list(index_backfill.partitions.order_by('partition_index')) == _partitions
+
+    def test_nothing_to_backfill(self, index_backfill, mock_messenger):
+        assert self._split(index_backfill) == []
+        index_backfill.refresh_from_db()
+        assert index_backfill.backfill_status == IndexBackfill.INDEXING
+
+    def test_pause_and_resume(self, suid_pks, index_backfill, mock_messenger, settings):
+        settings.ELASTICSEARCH = {**settings.ELASTICSEARCH, 'BACKFILL_PARTITION_COUNT': 1}
+        (_partition,) = self._split(index_backfill)
+        mock_messenger.get_queue_depth.side_effect = [0, 10]
+        with mock.patch.object(task__schedule_index_backfill_partition, 'apply_async') as _mock_apply_async:
+            task__schedule_index_backfill_partition(_partition.pk)
+            _mock_apply_async.assert_called_once_with((_partition.pk,), countdown=mock.ANY)
+        assert self._sent_target_ids(mock_messenger) == [suid_pks[:2]]
+        _partition.refresh_from_db()
+        assert not _partition.is_scheduled
+        assert _partition.last_scheduled_pk == suid_pks[1]
+        # resume from the checkpoint
+        mock_messenger.send_messages_chunk.reset_mock()
+        mock_messenger.get_queue_depth.side_effect = None
+        mock_messenger.get_queue_depth.return_value = 9
+        task__schedule_index_backfill_partition(_partition.pk)
+        assert self._sent_target_ids(mock_messenger) == [suid_pks[2:4], suid_pks[4:]]
+        _partition.refresh_from_db()
+        assert _partition.is_scheduled
+        assert _partition.last_scheduled_pk == suid_pks[4]
+
+    def test_high_water_shared_by_partitions(self, suid_pks, index_backfill, mock_messenger):
+        (_partition, _other_partition) = self._split(index_backfill)
+        # room left for a chunk from the other partition (one message each)
+        mock_messenger.get_queue_depth.return_value = 9
+        with mock.patch.object(task__schedule_index_backfill_partition, 'apply_async') as _mock_apply_async:
+            task__schedule_index_backfill_partition(_partition.pk)
+            _mock_apply_async.assert_called_once_with((_partition.pk,), countdown=mock.ANY)
+        mock_messenger.send_messages_chunk.assert_not_called()
+        mock_messenger.get_queue_depth.return_value = 8
+        task__schedule_index_backfill_partition(_partition.pk)
+        assert self._sent_target_ids(mock_messenger)
+
+    def test_checkpoint_taken(self, suid_pks, index_backfill, mock_messenger):
+        (_partition, *_) = self._split(index_backfill)
+        _other = IndexBackfillPartition.objects.get(pk=_partition.pk)
+        assert _partition.pls_note_scheduled([7])
+        assert not _other.pls_note_scheduled([3])  # (another task checkpointed since)
+        _partition.refresh_from_db()
+        assert _partition.last_scheduled_pk == 7
+        assert _partition.scheduled_count == 1
+
+    def test_stale_task(self, suid_pks, index_backfill, mock_messenger):
+        (_partition, *_) = self._split(index_backfill)
+        index_backfill.pls_mark_error(ValueError('stop'))
+        task__schedule_index_backfill_partition(_partition.pk)
+        mock_messenger.send_messages_chunk.assert_not_called()
+
+    def test_partition_error_and_retry(self, suid_pks, index_backfill, mock_messenger):
+        (_partition, _other_partition) = self._split(index_backfill)
+        mock_messenger.send_messages_chunk.side_effect = [None, ValueError('oh no')]
+        with pytest.raises(ValueError):
+            task__schedule_index_backfill_partition(_partition.pk)
+        _partition.refresh_from_db()
+        assert _partition.error_message == 'ValueError: oh no'
+        assert _partition.last_scheduled_pk == suid_pks[1]
+        index_backfill.refresh_from_db()
+        assert index_backfill.backfill_status == IndexBackfill.SCHEDULING  # (other partitions continue)
+        with mock.patch.object(task__schedule_index_backfill_partition, 'apply_async') as _mock_apply_async:
+            assert index_backfill.pls_retry_partitions() == 1
+            _mock_apply_async.assert_called_once_with((_partition.pk,))
+        _partition.refresh_from_db()
+        assert _partition.error_message == ''
+
+    def test_note_indexed(self, suid_pks, index_backfill, mock_messenger):
+        (_partition, _other_partition) = self._split(index_backfill)
+        index_backfill.pls_note_indexed(suid_pks, [suid_pks[0]])
+        _partition.refresh_from_db()
+        _other_partition.refresh_from_db()
+        assert _partition.indexed_count + _other_partition.indexed_count == 5
+        assert (_partition.error_count, _other_partition.error_count) == (1, 0)
+
+
+class TestQueueDepth:
+    def test_get_queue_depth(self):
+        _mock_celery_app = mock.MagicMock()
+        _strategy = mock.Mock(
+            supported_message_types={MessageType.BACKFILL_SUID},
+            urgent_messagequeue_name='urgent_q',
+            nonurgent_messagequeue_name='nonurgent_q',
+        )
+        _messenger = IndexMessenger(celery_app=_mock_celery_app, index_strategys=[_strategy])
+        with kombu.Connection('memory://') as _connection:
+            _mock_celery_app.pool.acquire.return_value.__enter__.return_value = _connection
+            assert _messenger.get_queue_depth(MessageType.BACKFILL_SUID, urgent=False) == 0
+            with _connection.SimpleQueue('nonurgent_q') as _queue:
+                _queue.put({'a': 1})
+                _queue.put({'a': 2})
+            assert _messenger.get_queue_depth(MessageType.BACKFILL_SUID, urgent=False) == 2
+            assert _messenger.get_queue_depth(MessageType.BACKFILL_SUID, urgent=True) == 0
+            assert _messenger.get_queue_depth(MessageType.INDEX_SUID, urgent=False) == 0
@@ -0,0 +1,156 @@
+from unittest import mock
+
+from celery import signals as celery_signals
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from share.search import index_messenger
+from share.search.messages import DaemonMessage, MessagesChunk, MessageType
+
+
+class TestBufferedIndexMessenger(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mock_celery_app = mock.MagicMock()
+        self.mock_connection = self.mock_celery_app.pool.acquire.return_value.__enter__.return_value
+        self.mock_strategy = mock.Mock(
+            supported_message_types={MessageType.UPDATE_INDEXCARD, MessageType.INDEX_SUID},
+            urgent_messagequeue_name='urgent_q',
+            nonurgent_messagequeue_name='nonurgent_q',
+        )
+
+    def _messenger(self, **kwargs):
+        return index_messenger.BufferedIndexMessenger(
+            celery_app=self.mock_celery_app,
+            index_strategys=[self.mock_strategy],
+            **{'max_buffer_size': 100, 'max_buffer_seconds': 100, **kwargs},
+        )
+
+    def _put_messages(self):
+        _mock_queue = self.mock_connection.SimpleQueue.return_value.__enter__.return_value
+        return [_call.args[0] for _call in _mock_queue.put.call_args_list]
+
+    def _expected_messages(self, message_type, target_ids):
+        return [DaemonMessage.compose_chunk_however(message_type, target_ids)]
+
+    def test_coalesce_and_flush(self):
+        _messenger = self._messenger()
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1, 2, 3]))
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [2, 3, 4]))
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.INDEX_SUID, [7]), urgent=True)
+        self.assertEqual(_messenger.buffer_size, 5)
+        self.mock_celery_app.pool.acquire.assert_not_called()
+        _messenger.flush()
+        self.assertEqual(_messenger.buffer_size, 0)
+        self.mock_celery_app.pool.acquire.assert_called_once()  # one session
+        self.assertEqual(self._put_messages(), [
+            *self._expected_messages(MessageType.UPDATE_INDEXCARD, [1, 2, 3, 4]),
+            *self._expected_messages(MessageType.INDEX_SUID, [7]),
+        ])
+        self.assertEqual(
+            [_call.kwargs['name'] for _call in self.mock_connection.SimpleQueue.call_args_list],
+            ['nonurgent_q', 'urgent_q'],
+        )
+        _messenger.flush()  # nothing more
+        self.mock_celery_app.pool.acquire.assert_called_once()
+
+    def test_flush_when_full(self):
+        _messenger = self._messenger(max_buffer_size=3)
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1, 2]))
+        self.mock_celery_app.pool.acquire.assert_not_called()
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [3]))
+        self.assertEqual(self._put_messages(), self._expected_messages(MessageType.UPDATE_INDEXCARD, [1, 2, 3]))
+
+    def test_flush_when_old(self):
+        _messenger = self._messenger(max_buffer_seconds=0)
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1]))
+        self.assertEqual(self._put_messages(), self._expected_messages(MessageType.UPDATE_INDEXCARD, [1]))
+
+    def test_flush_on_exit(self):
+        with self._messenger() as _messenger:
+            _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1]))
+            self.mock_celery_app.pool.acquire.assert_not_called()
+        self.assertEqual(self._put_messages(), self._expected_messages(MessageType.UPDATE_INDEXCARD, [1]))
+
+    def test_failed_flush_keeps_buffer(self):
+        _messenger = self._messenger()
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1, 2]))
+        self.mock_celery_app.pool.acquire.side_effect = ConnectionError
+        with self.assertRaises(ConnectionError):
+            _messenger.flush()
+        self.assertEqual(_messenger.buffer_size, 2)
+        self.mock_celery_app.pool.acquire.side_effect = None
+        _messenger.flush()
+        self.assertEqual(self._put_messages(), self._expected_messages(MessageType.UPDATE_INDEXCARD, [1, 2]))
+
+    def test_failed_flush_when_full_raises(self):
+        _messenger = self._messenger(max_buffer_size=2)
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1]))
+        self.mock_celery_app.pool.acquire.side_effect = ConnectionError
+        with self.assertRaises(ConnectionError):  # (to whatever filled the buffer)
+            _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [2]))
+        self.assertEqual(_messenger.buffer_size, 2)
+
+    def test_flush_when_idle(self):
+        _messenger = self._messenger(max_buffer_seconds=0.5, flush_when_idle=True)
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1]))
+        self.mock_celery_app.pool.acquire.assert_not_called()
+        _messenger._flush_timer.join(timeout=5)  # (nothing more sent)
+        self.assertEqual(self._put_messages(), self._expected_messages(MessageType.UPDATE_INDEXCARD, [1]))
+
+    def test_failed_idle_flush_not_raised(self):
+        _messenger = self._messenger(max_buffer_size=2, flush_when_idle=True)
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1]))
+        self.mock_celery_app.pool.acquire.side_effect = ConnectionError
+        # (shared buffer -- not charged to whatever sent the last ids)
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [2]))
+        self.assertEqual(_messenger.buffer_size, 2)
+        self.mock_celery_app.pool.acquire.side_effect = None
+        _messenger._flush_timer.cancel()
+        _messenger.flush()
+        self.assertEqual(self._put_messages(), self._expected_messages(MessageType.UPDATE_INDEXCARD, [1, 2]))
+
+    @override_settings(INDEX_MESSENGER_BUFFER={'ENABLED': True, 'MAX_SIZE': 100, 'MAX_SECONDS': 100})
+    def test_worker_messenger_coalesces_across_tasks(self):
+        _messenger = self._messenger()
+        with mock.patch.object(index_messenger, '_WORKER_INDEX_MESSENGER', _messenger):
+            self.assertIs(index_messenger.get_worker_index_messenger(self.mock_celery_app), _messenger)
+            _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1, 2]))
+            celery_signals.task_postrun.send(sender=None)
+            _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [2, 3]))
+            celery_signals.task_postrun.send(sender=None)
+            self.mock_celery_app.pool.acquire.assert_not_called()
+            celery_signals.worker_process_shutdown.send(sender=None)
+        self.assertEqual(self._put_messages(), self._expected_messages(MessageType.UPDATE_INDEXCARD, [1, 2, 3]))
+
+    @override_settings(INDEX_MESSENGER_BUFFER={'ENABLED': False, 'MAX_SIZE': 1, 'MAX_SECONDS': 1})
+    def test_worker_messenger_disabled(self):
+        _messenger = index_messenger.get_worker_index_messenger(self.mock_celery_app)
+        self.assertIs(type(_messenger), index_messenger.IndexMessenger)
+
+
+class TestShardedIndexMessenger(SimpleTestCase):
+    def test_put_by_shard(self):
+        _mock_celery_app = mock.MagicMock()
+        _mock_connection = _mock_celery_app.pool.acquire.return_value.__enter__.return_value
+        _mock_strategy = mock.Mock(
+            supported_message_types={MessageType.UPDATE_INDEXCARD},
+            urgent_messagequeue_name='q.urgent',
+            nonurgent_messagequeue_name='q.nonurgent',
+        )
+        with override_settings(ELASTICSEARCH={**settings.ELASTICSEARCH, 'MESSAGEQUEUE_SHARD_COUNT': 3}):
+            _messenger = index_messenger.IndexMessenger(
+                celery_app=_mock_celery_app,
+                index_strategys=[_mock_strategy],
+            )
+        self.assertEqual(list(_messenger.each_messagequeue_name(_mock_strategy)), [
+            'q.urgent', 'q.nonurgent',
+            'q.urgent.shard1', 'q.nonurgent.shard1',
+            'q.urgent.shard2', 'q.nonurgent.shard2',
+        ])
+        _messenger.send_messages_chunk(MessagesChunk(MessageType.UPDATE_INDEXCARD, [1, 3, 4, 6]))
+        # each shard queue opened once, in order of first use
+        self.assertEqual(
+            [_call.kwargs['name'] for _call in _mock_connection.SimpleQueue.call_args_list],
+            ['q.nonurgent.shard1', 'q.nonurgent'],
+        )
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from share.search.messages import (
+    DaemonMessage,
+    MessagesChunk,
+    MessageType,
+    V3Message,
+    V4Message,
+    pack_target_ids,
+    unpack_target_ids,
+)
+
+
+class FakeKombuMessage:
+    def __init__(self, payload):
+        self.payload = payload
+        self.channel = mock.Mock()
+        self.delivery_info = {'exchange': '', 'routing_key': 'fake.nonurgent'}
+        self.ack = mock.Mock()
+
+
+class TestDaemonMessages(SimpleTestCase):
+    def test_pack_target_ids(self):
+        for _target_ids in ([], [7], [5, 3, 3, 1], [0, 127, 128, 2 ** 40]):
+            self.assertEqual(
+                unpack_target_ids(pack_target_ids(_target_ids)),
+                tuple(sorted(set(_target_ids))),
+            )
+        with self.assertRaises(ValueError):
+            pack_target_ids([-1])
+
+    def test_received_versions(self):
+        _v2 = DaemonMessage.from_received_message(FakeKombuMessage({
+            'version': 2,
+            'message_type': MessageType.INDEX_SUID.value,
+            'target_id': 7,
+        }))
+        _v3 = DaemonMessage.from_received_message(FakeKombuMessage(
+            V3Message.compose(MessageType.INDEX_SUID, 7),
+        ))
+        for _message in (_v2, _v3):
+            self.assertEqual(_message.message_type, MessageType.INDEX_SUID)
+            self.assertEqual(list(_message.each_target_message()), [_message])
+        _v4 = DaemonMessage.from_received_message(FakeKombuMessage(
+            DaemonMessage.compose_chunk_however(MessageType.INDEX_SUID, [9, 7, 8]),
+        ))
+        self.assertIsInstance(_v4, V4Message)
+        self.assertEqual(_v4.message_type, MessageType.INDEX_SUID)
+        self.assertEqual(
+            [_target_message.target_id for _target_message in _v4.each_target_message()],
+            [7, 8, 9],
+        )
+
+    def test_as_dicts(self):
+        _chunk = MessagesChunk(MessageType.UPDATE_INDEXCARD, range(5))
+        _dicts = list(_chunk.as_dicts(max_ids_per_message=2))
+        self.assertEqual(
+            [unpack_target_ids(_dict['ids']) for _dict in _dicts],
+            [(0, 1), (2, 3), (4,)],
+        )
+        self.assertEqual({_dict['m'] for _dict in _dicts}, {int(MessageType.UPDATE_INDEXCARD)})
+
+    def test_ack_when_all_acked(self):
+        _kombu_message = FakeKombuMessage(V4Message.compose_chunk(MessageType.INDEX_SUID, [1, 2, 3]))
+        _target_messages = list(DaemonMessage.from_received_message(_kombu_message).each_target_message())
+        for _target_message in _target_messages:
+            _kombu_message.ack.assert_not_called()
+            _target_message.ack()
+        _kombu_message.ack.assert_called_once_with()
+        _kombu_message.channel.assert_not_called()
+
+    @mock.patch('share.search.messages.celery')
+    def test_republish_failed(self, mock_celery):
+        _kombu_message = FakeKombuMessage(V4Message.compose_chunk(MessageType.INDEX_SUID, [1, 2, 3]))
+        (_one, _two, _three) = DaemonMessage.from_received_message(_kombu_message).each_target_message()
+        _two.ack_failed()
+        _one.ack()
+        _three.ack_failed()
+        _mock_connection = mock_celery.current_app.pool.acquire.return_value.__enter__.return_value
+        _mock_connection.Producer.return_value.publish.assert_called_once_with(
+            V4Message.compose_chunk(MessageType.INDEX_SUID, [2, 3], attempt=1),
+            exchange='',
+            routing_key='fake.nonurgent',
+            serializer='json',
+            retry=True,
+        )
+        _kombu_message.channel.assert_not_called()  # (not on the consumer's channel)
+        _kombu_message.ack.assert_called_once_with()
+
+    @mock.patch('share.search.messages.celery')
+    def test_give_up_after_attempts(self, mock_celery):
+        _kombu_message = FakeKombuMessage(V4Message.compose_chunk(MessageType.INDEX_SUID, [1], attempt=2))
+        with override_settings(ELASTICSEARCH={**settings.ELASTICSEARCH, 'MAX_MESSAGE_ATTEMPTS': 3}):
+            (_one,) = DaemonMessage.from_received_message(_kombu_message).each_target_message()
+            _one.ack_failed()
+        mock_celery.current_app.pool.acquire.assert_not_called()
+        _kombu_message.ack.assert_called_once_with()
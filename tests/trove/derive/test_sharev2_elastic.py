@@ -18,6 +18,11 @@ class TestShareV2ElasticDeriver(BaseIndexcardDeriverTest):
     def assert_outputs_equal(self, expected, actual):
         self.assertEqual(expected, json.loads(actual))
 
+    def test_derive_card_id(self):
+        _deriver = self._get_deriver(self.inputs['blarg-project'])
+        self.assertEqual(_deriver.derive_card_id(), '--suid_id--')
+        self.assertEqual(json.loads(_deriver.derive_card_as_text())['id'], '--suid_id--')
+
     expected_outputs = {
         'blarg-item': SHOULD_SKIP,
         'blarg-project': {
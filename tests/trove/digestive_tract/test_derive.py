@@ -1,10 +1,13 @@
 import json
+from unittest import mock
 
 from django.test import TestCase
 
 from tests import factories
 from trove import digestive_tract
 from trove import models as trove_db
+from trove.derive import DEFAULT_DERIVER_SET
+from trove.models import resource_description
 from trove.vocab.namespaces import TROVE, BLARG as _BLARG
 from trove.util.iris import get_sufficiently_unique_iri
 
@@ -56,3 +59,13 @@ blarg:this blarg:unlike blarg:nonthing .
             'blarg:like': [{'@id': 'blarg:that'}],
             'blarg:unlike': [{'@id': 'blarg:nonthing'}],
         })
+
+    def test_derive_parses_once(self):
+        with mock.patch.object(
+            resource_description.rdf,
+            'tripledict_from_turtle',
+            wraps=resource_description.rdf.tripledict_from_turtle,
+        ) as _mock_parse:
+            digestive_tract.derive(self.indexcard)
+        self.assertGreater(len(DEFAULT_DERIVER_SET), 1)
+        _mock_parse.assert_called_once_with(self.latest_resource_description.rdf_as_turtle)
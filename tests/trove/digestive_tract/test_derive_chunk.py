@@ -0,0 +1,85 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from tests.trove.factories import create_indexcard, create_supplement
+from trove import digestive_tract
+from trove import models as trove_db
+from trove.vocab.namespaces import RDF, TROVE, BLARG as _BLARG
+
+
+class TestDigestiveTractDeriveChunk(TestCase):
+    def _create_indexcards(self, count):
+        _indexcards = [
+            create_indexcard(rdf_twopledict={
+                RDF.type: {_BLARG.Thing},
+                _BLARG.like: {_BLARG[f'that{_i}']},
+            })
+            for _i in range(count)
+        ]
+        create_supplement(_indexcards[0], _indexcards[0].latest_resource_description.focus_iri, {
+            _BLARG.unlike: {_BLARG.nonthing},
+        })
+        return _indexcards
+
+    def _derive_chunk(self, indexcards, **kwargs):
+        with CaptureQueriesContext(connection) as _queries:
+            digestive_tract.task__derive_chunk.apply(
+                ([_card.pk for _card in indexcards], TROVE['derive/osfmap_json_full']),
+                kwargs,
+            ).get()
+        return len(_queries)
+
+    def test_derive_chunk(self):
+        _indexcards = self._create_indexcards(3)
+        with mock.patch('trove.digestive_tract.get_worker_index_messenger') as _mock_messenger:
+            self._derive_chunk(_indexcards)
+        _mock_messenger.return_value.notify_indexcard_update.assert_called_once()
+        (_notified_cards,) = _mock_messenger.return_value.notify_indexcard_update.call_args.args
+        self.assertEqual({_card.pk for _card in _notified_cards}, {_card.pk for _card in _indexcards})
+        _derived_by_indexcard_id = {
+            _derived.upriver_indexcard_id: json.loads(_derived.derived_text)
+            for _derived in trove_db.DerivedIndexcard.objects.all()
+        }
+        self.assertEqual(_derived_by_indexcard_id.keys(), {_card.pk for _card in _indexcards})
+        self.assertEqual(
+            _derived_by_indexcard_id[_indexcards[0].pk]['blarg:unlike'],
+            [{'@id': 'blarg:nonthing'}],
+        )
+        # again, with changes (updates existing rows)
+        create_supplement(_indexcards[1], _indexcards[1].latest_resource_description.focus_iri, {
+            _BLARG.unlike: {_BLARG.another},
+        })
+        self._derive_chunk(_indexcards, notify_index=False)
+        self.assertEqual(trove_db.DerivedIndexcard.objects.count(), 3)
+        self.assertEqual(
+            json.loads(trove_db.DerivedIndexcard.objects.get(upriver_indexcard=_indexcards[1]).derived_text)['blarg:unlike'],
+            [{'@id': 'blarg:another'}],
+        )
+
+    def test_query_count_independent_of_chunk_size(self):
+        _query_count_small = self._derive_chunk(self._create_indexcards(2), notify_index=False)
+        _query_count_large = self._derive_chunk(self._create_indexcards(7), notify_index=False)
+        self.assertEqual(_query_count_small, _query_count_large)
+
+    def test_schedule_all_for_deriver(self):
+        _indexcards = self._create_indexcards(5)
+        with (
+            self.settings(DIGESTIVE_TRACT={'DERIVE_CHUNK_SIZE': 2}),
+            mock.patch('trove.digestive_tract.task__derive_chunk') as _mock_task,
+        ):
+            digestive_tract.task__schedule_all_for_deriver(TROVE['derive/osfmap_json_full'])
+        _pks = sorted(_card.pk for _card in _indexcards)
+        self.assertEqual(
+            [_call.args[0] for _call in _mock_task.delay.call_args_list],
+            [_pks[0:2], _pks[2:4], _pks[4:]],
+        )
+        for _call in _mock_task.delay.call_args_list:
+            self.assertEqual(_call.kwargs, {
+                'deriver_iri': TROVE['derive/osfmap_json_full'],
+                'notify_index': False,
+                'urgent': False,
+            })
@@ -1,6 +1,7 @@
 import datetime
 from unittest import mock
 
+from django.conf import settings
 from django.test import TestCase
 
 from share import models as share_db
@@ -31,14 +32,16 @@ class TestDigestiveTractExpel(TestCase):
     def setUp(self):
         super().setUp()
         self.notified_indexcard_ids = set()
+        self.notify_call_count = 0
         self.enterContext(mock.patch(
             'share.search.index_messenger.IndexMessenger.notify_indexcard_update',
             new=self._replacement_notify_indexcard_update,
         ))
-        self.mock_derive_task = self.enterContext(mock.patch('trove.digestive_tract.task__derive'))
+        self.mock_derive_task = self.enterContext(mock.patch('trove.digestive_tract.task__derive_chunk'))
 
     def _replacement_notify_indexcard_update(self, indexcards, **kwargs):
         self.notified_indexcard_ids.update(_card.id for _card in indexcards)
+        self.notify_call_count += 1
 
     def test_setup(self):
         self.indexcard_1.refresh_from_db()
@@ -101,7 +104,12 @@ class TestDigestiveTractExpel(TestCase):
         self.assertEqual(self.indexcard_2.derived_indexcard_set.count(), 1)
         # did not notify indexes of update; did enqueue re-derive
         self.assertEqual(self.notified_indexcard_ids, set())
-        self.mock_derive_task.delay.assert_called_once_with(self.indexcard_1.id)
+        self.mock_derive_task.delay.assert_called_once_with(
+            [self.indexcard_1.id],
+            deriver_iri=None,
+            notify_index=True,
+            urgent=False,
+        )
 
     def test_expel_expired_task(self):
         with mock.patch('trove.digestive_tract.expel_expired_data') as _mock_expel_expired:
@@ -132,6 +140,25 @@ class TestDigestiveTractExpel(TestCase):
         self.assertEqual(self.notified_indexcard_ids, {self.indexcard_2.id})
         self.mock_derive_task.delay.assert_not_called()
 
+    def test_forget_staged_records(self):
+        _today = datetime.date.today()
+        _user = self.suid_1.source_config.source.user
+        _old, _recent = [
+            trove_db.StagedRecord.objects.create(
+                from_user=_user,
+                focus_iri=self.focus_1,
+                record_mediatype='text/turtle',
+                raw_record='',
+                status=trove_db.StagedRecord.DIGESTED,
+            )
+            for _ in range(2)
+        ]
+        trove_db.StagedRecord.objects.filter(pk=_old.pk).update(
+            created=_old.created - datetime.timedelta(days=settings.DIGESTIVE_TRACT['STAGED_RECORD_KEEP_DAYS']),
+        )
+        digestive_tract.expel_expired_data(_today)
+        self.assertEqual(list(trove_db.StagedRecord.objects.all()), [_recent])
+
     def test_expel_expired_supplement(self):
         _today = datetime.date.today()
         self.supp.expiration_date = _today
@@ -152,4 +179,37 @@ class TestDigestiveTractExpel(TestCase):
         self.assertEqual(self.indexcard_2.derived_indexcard_set.count(), 1)
         # did not notify indexes of update; did enqueue re-derive
         self.assertEqual(self.notified_indexcard_ids, set())
-        self.mock_derive_task.delay.assert_called_once_with(self.indexcard_1.id)
+        self.mock_derive_task.delay.assert_called_once_with(
+            [self.indexcard_1.id],
+            deriver_iri=None,
+            notify_index=True,
+            urgent=False,
+        )
+
+    def test_expel_expired_in_chunks(self):
+        _today = datetime.date.today()
+        trove_db.LatestResourceDescription.objects.update(expiration_date=_today)
+        trove_db.SupplementaryResourceDescription.objects.update(expiration_date=_today)
+        with self.settings(DIGESTIVE_TRACT={**settings.DIGESTIVE_TRACT, 'EXPEL_CHUNK_SIZE': 1}):
+            digestive_tract.expel_expired_data(_today)
+        self.assertEqual(
+            set(trove_db.Indexcard.objects.filter(deleted__isnull=False).values_list('id', flat=True)),
+            {self.indexcard_1.id, self.indexcard_2.id},
+        )
+        self.assertFalse(trove_db.LatestResourceDescription.objects.exists())
+        self.assertFalse(trove_db.SupplementaryResourceDescription.objects.exists())
+        self.assertFalse(trove_db.DerivedIndexcard.objects.exists())
+        # one notification per chunk; no re-derive for deleted indexcards
+        self.assertEqual(self.notified_indexcard_ids, {self.indexcard_1.id, self.indexcard_2.id})
+        self.assertEqual(self.notify_call_count, 2)
+        self.mock_derive_task.delay.assert_not_called()
+
+    def test_expel_expired_query_count(self):
+        _today = datetime.date.today()
+        trove_db.LatestResourceDescription.objects.update(expiration_date=_today)
+        with self.assertNumQueries(12):
+            # indexcards: 2 chunk selects, savepoint, update, 3 deletes, release, notify select
+            # supplements: 1 chunk select (none expired)
+            # staged records: pending count, delete
+            digestive_tract.expel_expired_data(_today)
+        self.assertEqual(self.notify_call_count, 1)
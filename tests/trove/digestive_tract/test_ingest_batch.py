@@ -0,0 +1,110 @@
+import dataclasses
+from unittest import mock
+
+from django.test import TestCase
+
+from tests import factories
+from trove import digestive_tract
+from trove import models as trove_db
+from trove.vocab import mediatypes
+from trove.vocab.namespaces import BLARG as _BLARG
+
+
+class TestDigestiveTractIngestBatch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = factories.ShareUserFactory()
+
+    def _turtle(self, focus_iri):
+        return f'<{focus_iri}> a <{_BLARG.Thing}> ; <{_BLARG.like}> <{_BLARG.that}> .'
+
+    def test_ingest_batch(self):
+        _records = [
+            digestive_tract.IngestRecord(
+                focus_iri=_BLARG.one,
+                record_mediatype=mediatypes.TURTLE,
+                raw_record=self._turtle(_BLARG.one),
+            ),
+            digestive_tract.IngestRecord(  # focus not in record
+                focus_iri=_BLARG.two,
+                record_mediatype=mediatypes.TURTLE,
+                raw_record=self._turtle(_BLARG.nottwo),
+            ),
+            digestive_tract.IngestRecord(
+                focus_iri=_BLARG.three,
+                record_mediatype=mediatypes.TURTLE,
+                raw_record=self._turtle(_BLARG.three),
+                record_identifier='three',
+            ),
+        ]
+        with (
+            mock.patch('trove.digestive_tract.task__derive_chunk') as _mock_task,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            _outcomes = digestive_tract.ingest_batch(from_user=self.user, records=_records)
+        self.assertEqual([_outcome.record for _outcome in _outcomes], _records)
+        self.assertIsNone(_outcomes[0].error)
+        self.assertIsNotNone(_outcomes[1].error)
+        self.assertIsNone(_outcomes[2].error)
+        self.assertEqual(len(_outcomes[0].indexcards), 1)
+        self.assertEqual(_outcomes[1].indexcards, [])
+        self.assertEqual(len(_outcomes[2].indexcards), 1)
+        self.assertEqual(trove_db.Indexcard.objects.count(), 2)
+        self.assertEqual(trove_db.LatestResourceDescription.objects.count(), 2)
+        _mock_task.delay.assert_called_once_with(
+            [_outcomes[0].indexcards[0].pk, _outcomes[2].indexcards[0].pk],
+            deriver_iri=None,
+            notify_index=True,
+            urgent=False,
+        )
+
+    def test_ingest_batch_same_suid(self):
+        _records = [
+            digestive_tract.IngestRecord(
+                focus_iri=_BLARG.one,
+                record_mediatype=mediatypes.TURTLE,
+                raw_record=self._turtle(_BLARG.one),
+                record_identifier='one',
+            ),
+            digestive_tract.IngestRecord(
+                focus_iri=_BLARG.one,
+                record_mediatype=mediatypes.TURTLE,
+                raw_record=self._turtle(_BLARG.one).replace('that', 'another'),
+                record_identifier='one',
+            ),
+        ]
+        with mock.patch('trove.digestive_tract.task__derive_chunk'):
+            _outcomes = digestive_tract.ingest_batch(from_user=self.user, records=_records)
+        self.assertEqual(
+            [_outcome.indexcards for _outcome in _outcomes],
+            [_outcomes[0].indexcards] * 2,
+        )
+        self.assertEqual(trove_db.Indexcard.objects.count(), 1)
+        self.assertEqual(trove_db.ArchivedResourceDescription.objects.count(), 2)
+
+    def test_ingest_batch_unchanged(self):
+        _records = [
+            digestive_tract.IngestRecord(
+                focus_iri=_iri,
+                record_mediatype=mediatypes.TURTLE,
+                raw_record=self._turtle(_iri),
+            )
+            for _iri in (_BLARG.one, _BLARG.two)
+        ]
+        with mock.patch('trove.digestive_tract.task__derive_chunk'):
+            digestive_tract.ingest_batch(from_user=self.user, records=_records)
+        _records[1] = dataclasses.replace(_records[1], raw_record=self._turtle(_BLARG.two).replace('that', 'another'))
+        with (
+            mock.patch('trove.digestive_tract.task__derive_chunk') as _mock_task,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            _outcomes = digestive_tract.ingest_batch(from_user=self.user, records=_records)
+        self.assertEqual(len(_outcomes[0].indexcards), 1)
+        self.assertEqual(_outcomes[0].changed_indexcards, [])
+        self.assertEqual(_outcomes[1].changed_indexcards, _outcomes[1].indexcards)
+        _mock_task.delay.assert_called_once_with(
+            [_outcomes[1].indexcards[0].pk],
+            deriver_iri=None,
+            notify_index=True,
+            urgent=False,
+        )
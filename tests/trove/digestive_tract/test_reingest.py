@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from tests import factories
+from trove import digestive_tract
+from trove import models as trove_db
+from trove.vocab import mediatypes
+from trove.vocab.namespaces import BLARG as _BLARG
+
+
+class TestDigestiveTractReingest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = factories.ShareUserFactory()
+        cls.raw_turtle = f'<{_BLARG.this}> a <{_BLARG.Thing}> ; <{_BLARG.like}> <{_BLARG.that}> .'
+        cls.supp_raw_turtle = f'<{_BLARG.this}> <{_BLARG.like}> <{_BLARG.another}> .'
+
+    def setUp(self):
+        super().setUp()
+        self.mock_logger_info = self.enterContext(
+            mock.patch.object(digestive_tract.logger, 'info', wraps=digestive_tract.logger.info),
+        )
+        _patcher = mock.patch('trove.digestive_tract.task__derive')
+        self.mock_derive_task = _patcher.start()
+        self.addCleanup(_patcher.stop)
+
+    def _ingest(self, raw_record, **kwargs):
+        digestive_tract.ingest(
+            from_user=self.user,
+            focus_iri=_BLARG.this,
+            record_mediatype=mediatypes.TURTLE,
+            raw_record=raw_record,
+            **kwargs,
+        )
+
+    def _unchanged_indexcard_count(self):
+        # (summed from the logged metric)
+        return sum(
+            _call.kwargs['extra']['metrics']['unchanged_indexcard_count']
+            for _call in self.mock_logger_info.call_args_list
+            if 'metrics' in _call.kwargs.get('extra', {})
+        )
+
+    def _derived_indexcard_ids(self):
+        return [_call.args[0] for _call in self.mock_derive_task.delay.call_args_list]
+
+    def test_ingest_unchanged(self):
+        self._ingest(self.raw_turtle)
+        (_indexcard,) = trove_db.Indexcard.objects.all()
+        _latest_modified = _indexcard.latest_resource_description.modified
+        self.assertEqual(self._derived_indexcard_ids(), [_indexcard.pk])
+        self.assertEqual(self._unchanged_indexcard_count(), 0)
+        # same again: nothing to do
+        self.mock_derive_task.reset_mock()
+        self._ingest(self.raw_turtle)
+        self.assertEqual(self._derived_indexcard_ids(), [])
+        self.assertEqual(self._unchanged_indexcard_count(), 1)
+        self.assertEqual(_indexcard.latest_resource_description.modified, _latest_modified)
+        # changed: derive again
+        self._ingest(self.raw_turtle.replace('that', 'another'))
+        self.assertEqual(self._derived_indexcard_ids(), [_indexcard.pk])
+        self.assertEqual(self._unchanged_indexcard_count(), 1)
+
+    def test_ingest_undeleted(self):
+        self._ingest(self.raw_turtle)
+        (_indexcard,) = trove_db.Indexcard.objects.all()
+        _indexcard.pls_delete(notify_indexes=False)
+        self.mock_derive_task.reset_mock()
+        self._ingest(self.raw_turtle, restore_deleted=True)
+        self.assertEqual(self._derived_indexcard_ids(), [_indexcard.pk])
+        self.assertEqual(self._unchanged_indexcard_count(), 0)
+
+    def test_ingest_supplement_unchanged(self):
+        self._ingest(self.raw_turtle)
+        (_indexcard,) = trove_db.Indexcard.objects.all()
+        self.mock_derive_task.reset_mock()
+        self._ingest(self.supp_raw_turtle, record_identifier='supp', is_supplementary=True)
+        self.assertEqual(self._derived_indexcard_ids(), [_indexcard.pk])
+        self.mock_derive_task.reset_mock()
+        self._ingest(self.supp_raw_turtle, record_identifier='supp', is_supplementary=True)
+        self.assertEqual(self._derived_indexcard_ids(), [])
+        self.assertEqual(self._unchanged_indexcard_count(), 1)
+        self._ingest(self.supp_raw_turtle.replace('another', 'that'), record_identifier='supp', is_supplementary=True)
+        self.assertEqual(self._derived_indexcard_ids(), [_indexcard.pk])
@@ -0,0 +1,135 @@
+import io
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from share.util.checksum_iri import ChecksumIri
+from tests import factories
+from trove import models as trove_db
+from trove.models import content_blob
+from trove.vocab.namespaces import BLARG
+
+
+def _checksum_iri(text):
+    return str(ChecksumIri.digest('sha-256', salt='', data=text))
+
+
+class TestContentBlob(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.indexcard = factories.IndexcardFactory()
+        cls.turtle = f'<{BLARG.this}> <{BLARG.that}> "{"blarg" * 99}" .'
+
+    def _new_description(self, model=trove_db.ArchivedResourceDescription):
+        return model.objects.create(
+            indexcard=self.indexcard,
+            focus_iri=BLARG.this,
+            turtle_checksum_iri=_checksum_iri(self.turtle),
+            rdf_as_turtle=self.turtle,
+        )
+
+    def _inline_turtle(self, description):
+        return (
+            type(description).objects
+            .filter(pk=description.pk)
+            .values_list('rdf_as_turtle', flat=True)
+            .get()
+        )
+
+    def test_codec_roundtrip(self):
+        for _codec in (content_blob.ZLIB, content_blob.get_default_codec()):
+            _compressed = content_blob.compress(_codec, self.turtle.encode())
+            self.assertLess(len(_compressed), len(self.turtle))
+            self.assertEqual(content_blob.decompress(_codec, _compressed).decode(), self.turtle)
+
+    def test_default_codec(self):
+        self.assertEqual(content_blob.get_default_codec(), content_blob.ZLIB)
+        with (
+            override_settings(CONTENT_BLOB_STORE={**settings.CONTENT_BLOB_STORE, 'CODEC': 'zstd'}),
+            mock.patch.object(content_blob, 'zstandard', None),  # (as if not installed)
+        ):
+            with self.assertRaises(ValueError):
+                content_blob.get_default_codec()
+
+    def test_stored_once_by_checksum(self):
+        _archived = self._new_description()
+        _latest = self._new_description(trove_db.LatestResourceDescription)
+        self.assertEqual(self._inline_turtle(_archived), '')
+        self.assertEqual(self._inline_turtle(_latest), '')
+        (_blob,) = trove_db.ContentBlob.objects.all()
+        self.assertEqual(_blob.checksum_iri, _checksum_iri(self.turtle))
+        self.assertEqual(_blob.get_text(), self.turtle)
+
+    def test_lazy_load(self):
+        _pk = self._new_description().pk
+        _description = trove_db.ArchivedResourceDescription.objects.get(pk=_pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(_description.rdf_as_turtle, self.turtle)
+            self.assertEqual(_description.rdf_as_turtle, self.turtle)  # (loaded once)
+
+    def test_lazy_load_deferred(self):
+        _pk = self._new_description().pk
+        _description = trove_db.ArchivedResourceDescription.objects.defer('rdf_as_turtle').get(pk=_pk)
+        with self.assertNumQueries(3):  # (refresh text, then checksum, then blob)
+            self.assertEqual(_description.rdf_as_turtle, self.turtle)
+
+    def test_load_blobbed_texts(self):
+        _other_turtle = f'<{BLARG.this}> <{BLARG.that}> <{BLARG.other}> .'
+        self._new_description()
+        trove_db.ArchivedResourceDescription.objects.create(
+            indexcard=self.indexcard,
+            focus_iri=BLARG.this,
+            turtle_checksum_iri=_checksum_iri(_other_turtle),
+            rdf_as_turtle=_other_turtle,
+        )
+        _descriptions = list(trove_db.ArchivedResourceDescription.objects.order_by('pk'))
+        with self.assertNumQueries(1):
+            trove_db.ContentBlob.objects.load_blobbed_texts(_descriptions, 'rdf_as_turtle')
+            self.assertEqual(
+                [_description.rdf_as_turtle for _description in _descriptions],
+                [self.turtle, _other_turtle],
+            )
+
+    def test_save_blobbed_texts(self):
+        _descriptions = [
+            trove_db.LatestResourceDescription(
+                indexcard=self.indexcard,
+                focus_iri=BLARG.this,
+                turtle_checksum_iri=_checksum_iri(self.turtle),
+                rdf_as_turtle=self.turtle,
+            ),
+        ]
+        with self.assertNumQueries(2):
+            trove_db.ContentBlob.objects.save_blobbed_texts(_descriptions, 'rdf_as_turtle')
+            trove_db.LatestResourceDescription.objects.bulk_create(_descriptions)
+        self.assertEqual(self._inline_turtle(_descriptions[0]), '')
+        self.assertEqual(trove_db.ContentBlob.objects.get_text(_checksum_iri(self.turtle)), self.turtle)
+
+    @override_settings(CONTENT_BLOB_STORE={'ENABLED': False, 'CODEC': 'zlib', 'BACKFILL_CHUNK_SIZE': 2})
+    def test_disabled(self):
+        _description = self._new_description()
+        self.assertEqual(self._inline_turtle(_description), self.turtle)
+        self.assertFalse(trove_db.ContentBlob.objects.exists())
+
+    def test_backfill(self):
+        with override_settings(CONTENT_BLOB_STORE={'ENABLED': False, 'CODEC': 'zlib', 'BACKFILL_CHUNK_SIZE': 2}):
+            _descriptions = [self._new_description() for _ in range(3)]
+            _mismatched = trove_db.ArchivedResourceDescription.objects.create(
+                indexcard=self.indexcard,
+                focus_iri=BLARG.this,
+                turtle_checksum_iri=_checksum_iri('something else'),
+                rdf_as_turtle=self.turtle,
+            )
+        _stdout = io.StringIO()
+        call_command('shtrove_blob_backfill', '--chunk-size', '2', stdout=_stdout)
+        self.assertIn('ArchivedResourceDescription.rdf_as_turtle: moved 3 rows (skipped 1', _stdout.getvalue())
+        for _description in _descriptions:
+            self.assertEqual(self._inline_turtle(_description), '')
+            self.assertEqual(
+                trove_db.ArchivedResourceDescription.objects.get(pk=_description.pk).rdf_as_turtle,
+                self.turtle,
+            )
+        self.assertEqual(self._inline_turtle(_mismatched), self.turtle)
+        self.assertEqual(trove_db.ContentBlob.objects.count(), 1)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.test import TestCase
+from primitive_metadata import primitive_rdf as rdf
+
+from tests import factories
+from tests.trove.factories import create_indexcard, create_supplement, update_indexcard_content
+from trove import digestive_tract
+from trove.models import IndexableCard, Indexcard, resource_description
+from trove.util.lru_cache import SizedLruCache
+from trove.vocab.namespaces import BLARG, DCTERMS, TROVE
+
+
+class TestIndexableCard(TestCase):
+    def setUp(self):
+        super().setUp()
+        _patcher = mock.patch.object(
+            resource_description,
+            'PARSED_TURTLE_CACHE',
+            SizedLruCache(max_size=100_000),
+        )
+        self.cache = _patcher.start()
+        self.addCleanup(_patcher.stop)
+
+    def _create_indexcard(self, focus_iri, title, **kwargs):
+        return create_indexcard(
+            focus_iri,
+            {DCTERMS.title: {rdf.literal(title)}},
+            deriver_iris=[TROVE['derive/osfmap_json']],
+            **kwargs,
+        )
+
+    def test_refresh(self):
+        _indexcard = self._create_indexcard(BLARG.a, 'a')
+        _indexable_card = IndexableCard.objects.get(indexcard=_indexcard)
+        _suid = _indexcard.source_record_suid
+        self.assertEqual(_indexable_card.get_iri(), _indexcard.get_iri())
+        self.assertEqual(_indexable_card.suid_identifier, _suid.identifier)
+        self.assertEqual(_indexable_card.source_config_label, _suid.source_config.label)
+        self.assertEqual(_indexable_card.focus_iri, BLARG.a)
+        self.assertEqual(
+            _indexable_card.turtle_checksum_iri,
+            _indexcard.latest_resource_description.turtle_checksum_iri,
+        )
+        self.assertEqual(_indexable_card.supplement_checksum_iris, [])
+        # updated with descriptions
+        update_indexcard_content(_indexcard, BLARG.a, {DCTERMS.title: {rdf.literal('aa')}})
+        _supplement = create_supplement(_indexcard, BLARG.a, {DCTERMS.subject: {BLARG.subj}})
+        _indexable_card.refresh_from_db()
+        self.assertEqual(
+            _indexable_card.turtle_checksum_iri,
+            _indexcard.latest_resource_description.turtle_checksum_iri,
+        )
+        self.assertEqual(_indexable_card.supplement_checksum_iris, [_supplement.turtle_checksum_iri])
+        # gone when deleted
+        _indexcard.pls_delete(notify_indexes=False)
+        self.assertFalse(IndexableCard.objects.filter(indexcard=_indexcard).exists())
+
+    def test_not_indexable_without_osfmap_json(self):
+        _indexcard = create_indexcard(BLARG.b, {DCTERMS.title: {rdf.literal('b')}})
+        self.assertFalse(IndexableCard.objects.filter(indexcard=_indexcard).exists())
+        digestive_tract.derive(_indexcard, [TROVE['derive/osfmap_json']])
+        self.assertTrue(IndexableCard.objects.filter(indexcard=_indexcard).exists())
+
+    def test_for_indexing(self):
+        _indexcards = [
+            self._create_indexcard(_focus_iri, _title)
+            for _focus_iri, _title in ((BLARG.c, 'c'), (BLARG.d, 'd'))
+        ]
+        create_supplement(_indexcards[0], BLARG.c, {DCTERMS.subject: {BLARG.subj}})
+        _card_pks = [_indexcard.pk for _indexcard in _indexcards]
+        self.cache.clear()
+        with self.assertNumQueries(2):  # cards, then turtle not yet parsed
+            _indexable_cards = IndexableCard.objects.for_indexing(_card_pks)
+            _rdfdocs = {
+                _indexable_card.indexcard_id: _indexable_card.as_rdfdoc_with_supplements()
+                for _indexable_card in _indexable_cards
+            }
+        for _indexcard in Indexcard.objects.filter(pk__in=_card_pks):
+            self.assertEqual(
+                _rdfdocs[_indexcard.pk].tripledict,
+                _indexcard.latest_resource_description.as_rdfdoc_with_supplements().tripledict,
+            )
+        self.assertIn(BLARG.subj, _rdfdocs[_card_pks[0]].q(BLARG.c, DCTERMS.subject))
+        with self.assertNumQueries(1):  # already parsed
+            for _indexable_card in IndexableCard.objects.for_indexing(_card_pks):
+                _indexable_card.as_rdfdoc_with_supplements()
+
+    def test_for_indexing_refreshes_missing(self):
+        _indexcard = self._create_indexcard(BLARG.e, 'e')
+        IndexableCard.objects.all().delete()  # as if added before the projection
+        (_indexable_card,) = IndexableCard.objects.for_indexing([_indexcard.pk])
+        self.assertEqual(_indexable_card.indexcard_id, _indexcard.pk)
+
+    def test_for_indexing_omits_forecompat_replaced(self):
+        _indexcard = self._create_indexcard(BLARG.f, 'f')
+        _suid = _indexcard.source_record_suid
+        _suid.source_config.transformer_key = 'v2_push'
+        _suid.source_config.save()
+        IndexableCard.objects.refresh_for_indexcard_ids([_indexcard.pk])
+        self.assertEqual(len(IndexableCard.objects.for_indexing([_indexcard.pk])), 1)
+        factories.SourceUniqueIdentifierFactory(
+            identifier=_suid.identifier,
+            source_config=factories.SourceConfigFactory(source=_suid.source_config.source),
+        )
+        self.assertTrue(_suid.has_forecompat_replacement())
+        self.assertEqual(IndexableCard.objects.for_indexing([_indexcard.pk]), [])
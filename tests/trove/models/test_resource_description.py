@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from trove.models import LatestResourceDescription
+from trove.models import resource_description
+from trove.util.lru_cache import SizedLruCache
+from trove.vocab.namespaces import BLARG, RDF
+
+
+class TestParsedTurtleCache(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        _patcher = mock.patch.object(
+            resource_description,
+            'PARSED_TURTLE_CACHE',
+            SizedLruCache(max_size=1000),
+        )
+        self.cache = _patcher.start()
+        self.addCleanup(_patcher.stop)
+
+    def _description(self, turtle, checksum):
+        return LatestResourceDescription(
+            focus_iri=BLARG.this,
+            rdf_as_turtle=turtle,
+            turtle_checksum_iri=checksum,
+        )
+
+    def test_parse_once(self):
+        _description = self._description(f'<{BLARG.this}> a <{BLARG.Thing}> .', 'checksum:a')
+        _expected = {BLARG.this: {RDF.type: {BLARG.Thing}}}
+        with mock.patch.object(
+            resource_description.rdf,
+            'tripledict_from_turtle',
+            wraps=resource_description.rdf.tripledict_from_turtle,
+        ) as _mock_parse:
+            self.assertEqual(_description.as_rdf_tripledict(), _expected)
+            self.assertEqual(_description.as_rdf_tripledict(), _expected)
+            # same checksum, different instance
+            self.assertEqual(self._description(_description.rdf_as_turtle, 'checksum:a').as_rdf_tripledict(), _expected)
+        _mock_parse.assert_called_once_with(_description.rdf_as_turtle)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_copy_on_read(self):
+        _description = self._description(f'<{BLARG.this}> a <{BLARG.Thing}> .', 'checksum:b')
+        _tripledict = _description.as_rdf_tripledict()
+        _tripledict[BLARG.this][RDF.type].add(BLARG.Another)
+        _tripledict[BLARG.this][BLARG.like] = {BLARG.that}
+        _tripledict[BLARG.that] = {}
+        self.assertEqual(
+            _description.as_rdf_tripledict(),
+            {BLARG.this: {RDF.type: {BLARG.Thing}}},
+        )
+
+    @override_settings(PARSED_TURTLE_CACHE={'MAX_BYTES': 1000, 'SHARED_CACHE_ALIAS': 'default'})
+    def test_shared_tier(self):
+        _turtle = f'<{BLARG.this}> a <{BLARG.Thing}> .'
+        self._description(_turtle, 'checksum:c').as_rdf_tripledict()
+        self.cache.clear()  # as if another process
+        with mock.patch.object(resource_description.rdf, 'tripledict_from_turtle') as _mock_parse:
+            self.assertEqual(
+                self._description(_turtle, 'checksum:c').as_rdf_tripledict(),
+                {BLARG.this: {RDF.type: {BLARG.Thing}}},
+            )
+        self.assertFalse(_mock_parse.called)
+        # a shared hit needs no turtle (e.g. from a blob)
+        self.cache.clear()
+        _mock_get_turtle = mock.Mock()
+        self.assertEqual(
+            resource_description.get_parsed_turtle('checksum:c', _mock_get_turtle),
+            {BLARG.this: {RDF.type: {BLARG.Thing}}},
+        )
+        _mock_get_turtle.assert_not_called()
+        self.assertEqual(self.cache.stats()['total_size'], len(_turtle))
+
+    def test_stats(self):
+        _before = resource_description.parsed_turtle_cache_stats()
+        self._description(f'<{BLARG.this}> a <{BLARG.Thing}> .', 'checksum:d').as_rdf_tripledict()
+        self.assertNotIn('checksum:e', self.cache)  # (not counted)
+        self.assertIn('checksum:d', self.cache)
+        _stats = resource_description.parsed_turtle_cache_stats()
+        self.assertEqual((_stats['hits'], _stats['misses'], _stats['count']), (0, 1, 1))
+        self.assertEqual(_stats['shared_misses'], _before['shared_misses'])  # (no shared tier)
@@ -60,6 +60,46 @@ class TestResourceIdentifier(TestCase):
         with self.assertRaises(ResourceIdentifier.DoesNotExist):
             ResourceIdentifier.objects.get_for_iri('wa:ba:pow')
 
+    def test_get_or_create_many(self):
+        _iris = [
+            'bar://wibbleplop.example/la',
+            'ha:ba:pow',
+            'https://wibbleplop.example/la/',
+            'http://new.example/one',
+            'https://new.example/one',
+            'new:two',
+            'bar://wibbleplop.example/la',  # repeated
+        ]
+        with self.assertNumQueries(2):
+            _identifiers_by_iri = ResourceIdentifier.objects.get_or_create_many_for_iris(_iris)
+        self.assertEqual(list(_identifiers_by_iri.keys()), list(dict.fromkeys(_iris)))
+        _identifier_foo = _identifiers_by_iri['bar://wibbleplop.example/la']
+        self.assertEqual(_identifier_foo.id, self.identifier_foo.id)
+        self.assertIs(_identifiers_by_iri['https://wibbleplop.example/la/'], _identifier_foo)
+        self.assertEqual(_identifier_foo.scheme_list, ['foo', 'bla', 'bar', 'https'])
+        self.assertEqual(
+            _identifier_foo.raw_iri_list,
+            ['bar://wibbleplop.example/la', 'https://wibbleplop.example/la/'],
+        )
+        _identifier_ha = _identifiers_by_iri['ha:ba:pow']
+        self.assertEqual(_identifier_ha.id, self.identifier_ha.id)
+        self.assertEqual(_identifier_ha.scheme_list, ['ha'])
+        self.assertEqual(_identifier_ha.raw_iri_list, ['ha:ba:pow'])
+        _identifier_one = _identifiers_by_iri['http://new.example/one']
+        self.assertIs(_identifiers_by_iri['https://new.example/one'], _identifier_one)
+        self.assertEqual(_identifier_one.sufficiently_unique_iri, '://new.example/one')
+        self.assertEqual(_identifier_one.scheme_list, ['http', 'https'])
+        self.assertEqual(_identifier_one.raw_iri_list, ['http://new.example/one', 'https://new.example/one'])
+        self.assertEqual(_identifiers_by_iri['new:two'].scheme_list, ['new'])
+        # again, with nothing new -- same identifiers, unchanged
+        _again_by_iri = ResourceIdentifier.objects.get_or_create_many_for_iris(reversed(_iris))
+        self.assertEqual(
+            {_iri: (_identifier.id, _identifier.scheme_list, _identifier.raw_iri_list) for _iri, _identifier in _again_by_iri.items()},
+            {_iri: (_identifier.id, _identifier.scheme_list, _identifier.raw_iri_list) for _iri, _identifier in _identifiers_by_iri.items()},
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(ResourceIdentifier.objects.get_or_create_many_for_iris([]), {})
+
     def test_check_a(self):
         with self.assertRaises(IntegrityError):
             ResourceIdentifier.objects.create(
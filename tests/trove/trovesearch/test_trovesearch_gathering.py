@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from tests.trove.factories import create_indexcard
+from trove.models import resource_description
+from trove.trovesearch import trovesearch_gathering
+from trove.util.lru_cache import SizedLruCache
+from trove.vocab.namespaces import TROVE
+
+
+class TestLoadCardsAndContents(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.indexcards = [
+            create_indexcard(deriver_iris=[TROVE['derive/osfmap_json']])
+            for _ in range(3)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        # (nothing already parsed)
+        self.enterContext(mock.patch.object(resource_description, 'PARSED_TURTLE_CACHE', SizedLruCache(max_size=1000)))
+
+    def test_extracted_rdf_query_count(self):
+        _card_iris = [_card.get_iri() for _card in self.indexcards]
+        with self.assertNumQueries(3):  # descriptions, focus identifiers, blobs
+            _card_foci = trovesearch_gathering._load_cards_and_contents(card_iris=_card_iris, deriver_iri=None)
+        self.assertEqual(set(_card_foci.keys()), set(_card_iris))
+
+    def test_derived_query_count(self):
+        _card_iris = [_card.get_iri() for _card in self.indexcards]
+        with self.assertNumQueries(3):  # derived cards, focus identifiers, blobs
+            _card_foci = trovesearch_gathering._load_cards_and_contents(
+                card_iris=_card_iris,
+                deriver_iri=TROVE['derive/osfmap_json'],
+            )
+        self.assertEqual(set(_card_foci.keys()), set(_card_iris))
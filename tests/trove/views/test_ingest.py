@@ -1,13 +1,18 @@
 import datetime
+import json
 from http import HTTPStatus
 from unittest import mock
 from urllib.parse import urlencode
 
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 
 from share.models.feature_flag import FeatureFlag
 from tests import factories
 from tests._testutil import patch_feature_flag
+from trove import digestive_tract
+from trove import models as trove_db
+from trove.views.ingest import RdfIngestView
+from trove.vocab.namespaces import BLARG as _BLARG
 
 
 class TestIngest(TestCase):
@@ -190,3 +195,202 @@ class TestIngest(TestCase):
             )
         self.assertEqual(_resp.status_code, HTTPStatus.BAD_REQUEST)
         self.assertFalse(_mock_tract.ingest.called)
+
+    def test_post_batch(self):
+        _lines = [
+            '{"focus_iri": "https://foo.example/blarg", "raw_record": "turtleturtleturtle"}',
+            '',
+            '{"focus_iri": "https://foo.example/blerg", "raw_record": "turtle", "record_identifier": "blerg", "expiration_date": "2055-05-05"}',
+            'not json',
+            '{"raw_record": "turtle"}',
+        ]
+        with mock.patch('trove.views.ingest.digestive_tract.ingest_batch') as _mock_ingest_batch:
+            _mock_ingest_batch.side_effect = lambda *, records, **kwargs: [
+                digestive_tract.IngestOutcome(record=_record)
+                for _record in records
+            ]
+            _resp = self.client.post(
+                '/trove/ingest',
+                content_type='application/x-ndjson',
+                data='\n'.join(_lines),
+                HTTP_AUTHORIZATION=self.user.authorization(),
+            )
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        _mock_ingest_batch.assert_called_once_with(
+            from_user=self.user,
+            records=[
+                digestive_tract.IngestRecord(
+                    focus_iri='https://foo.example/blarg',
+                    raw_record='turtleturtleturtle',
+                    record_mediatype='text/turtle',
+                ),
+                digestive_tract.IngestRecord(
+                    focus_iri='https://foo.example/blerg',
+                    raw_record='turtle',
+                    record_mediatype='text/turtle',
+                    record_identifier='blerg',
+                    expiration_date=datetime.date(2055, 5, 5),
+                ),
+            ],
+            urgent=True,
+            restore_deleted=True,
+        )
+        self.assertEqual(
+            [(_result['line'], _result['status']) for _result in _resp.json()['results']],
+            [(1, 201), (3, 201), (4, 400), (5, 400)],
+        )
+
+    def test_post_batch_malformed_record(self):
+        _lines = [
+            json.dumps({'focus_iri': _BLARG.this, 'raw_record': f'<{_BLARG.this}> a <{_BLARG.Thing}> .'}),
+            json.dumps({'focus_iri': _BLARG.that, 'raw_record': 'this is not turtle'}),
+        ]
+        with (
+            mock.patch('trove.digestive_tract.task__derive_chunk'),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            _resp = self.client.post(
+                '/trove/ingest',
+                content_type='application/x-ndjson',
+                data='\n'.join(_lines),
+                HTTP_AUTHORIZATION=self.user.authorization(),
+            )
+        self.assertEqual(_resp.status_code, HTTPStatus.OK)
+        (_ok_result, _malformed_result) = _resp.json()['results']
+        self.assertEqual(_ok_result['status'], HTTPStatus.CREATED)
+        self.assertEqual(_malformed_result['status'], HTTPStatus.BAD_REQUEST)
+        self.assertIn('could not parse turtle', _malformed_result['error'])
+        # (the rest of the batch kept)
+        self.assertEqual(trove_db.Indexcard.objects.count(), 1)
+
+    def test_post_batch_too_large(self):
+        with (
+            self.settings(DIGESTIVE_TRACT={'MAX_BATCH_SIZE': 1}),
+            mock.patch('trove.views.ingest.digestive_tract.ingest_batch') as _mock_ingest_batch,
+        ):
+            _resp = self.client.post(
+                '/trove/ingest',
+                content_type='application/x-ndjson',
+                data='{"focus_iri": "https://foo.example/a", "raw_record": ""}\n' * 2,
+                HTTP_AUTHORIZATION=self.user.authorization(),
+            )
+        self.assertEqual(_resp.status_code, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(_mock_ingest_batch.called)
+
+
+class TestAsyncIngest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = factories.ShareUserFactory(is_trusted=True)
+        cls.raw_turtle = f'<{_BLARG.this}> a <{_BLARG.Thing}> .'
+
+    def _post_async(self, raw_record, **queryparams):
+        with (
+            mock.patch('trove.digestive_tract.task__ingest_staged_record') as _mock_task,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            _resp = self.client.post(
+                '/trove/ingest?' + urlencode({'async': '', **queryparams}),
+                content_type='text/turtle',
+                data=raw_record,
+                HTTP_AUTHORIZATION=self.user.authorization(),
+            )
+        return _resp, _mock_task
+
+    def _get_status(self, status_url, user=None):
+        return self.client.get(
+            status_url,
+            HTTP_AUTHORIZATION=(user or self.user).authorization(),
+        )
+
+    def test_post_async(self):
+        _resp, _mock_task = self._post_async(self.raw_turtle, focus_iri=_BLARG.this)
+        self.assertEqual(_resp.status_code, HTTPStatus.ACCEPTED)
+        _staged_record = trove_db.StagedRecord.objects.get()
+        _mock_task.delay.assert_called_once_with(_staged_record.pk, urgent=True)
+        self.assertEqual(_resp.json()['status'], 'pending')
+        _status_url = _resp['Location']
+        self.assertEqual(
+            _status_url,
+            f'http://testserver/trove/ingest/status/{_staged_record.uuid}',
+        )
+        self.assertEqual(trove_db.Indexcard.objects.count(), 0)
+        self.assertEqual(self._get_status(_status_url).json()['status'], 'pending')
+        # only the pushing user may see status
+        self.assertEqual(self._get_status(_status_url, user=factories.ShareUserFactory()).status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(self.client.get(_status_url).status_code, HTTPStatus.UNAUTHORIZED)
+        # digest
+        with mock.patch('trove.digestive_tract.task__derive'):
+            digestive_tract.ingest_staged_record(_staged_record)
+        self.assertEqual(trove_db.Indexcard.objects.count(), 1)
+        _status_json = self._get_status(_status_url).json()
+        self.assertEqual(_status_json['status'], 'digested')
+        self.assertIsNone(_status_json['error'])
+        _staged_record.refresh_from_db()
+        self.assertEqual(_staged_record.raw_record, '')
+
+    def test_post_async_indigestible(self):
+        _resp, _ = self._post_async(self.raw_turtle, focus_iri=_BLARG.notthis)
+        self.assertEqual(_resp.status_code, HTTPStatus.ACCEPTED)
+        _staged_record = trove_db.StagedRecord.objects.get()
+        digestive_tract.ingest_staged_record(_staged_record)
+        self.assertEqual(trove_db.Indexcard.objects.count(), 0)
+        _status_json = self._get_status(_resp['Location']).json()
+        self.assertEqual(_status_json['status'], 'error')
+        self.assertIn(_BLARG.notthis, _status_json['error'])
+
+    def test_post_async_malformed(self):
+        _resp, _ = self._post_async('this is not turtle', focus_iri=_BLARG.this)
+        self.assertEqual(_resp.status_code, HTTPStatus.ACCEPTED)
+        digestive_tract.task__ingest_staged_record.apply((trove_db.StagedRecord.objects.get().pk,))
+        _status_json = self._get_status(_resp['Location']).json()
+        self.assertEqual(_status_json['status'], 'error')
+        self.assertIn('could not parse turtle', _status_json['error'])
+
+    def test_post_async_unexpected_error(self):
+        _resp, _ = self._post_async(self.raw_turtle, focus_iri=_BLARG.this)
+        _staged_record = trove_db.StagedRecord.objects.get()
+        with (
+            mock.patch('trove.digestive_tract.ingest', side_effect=RuntimeError('oh no')),
+            self.assertRaises(RuntimeError),
+        ):
+            digestive_tract.ingest_staged_record(_staged_record)
+        _status_json = self._get_status(_resp['Location']).json()
+        self.assertEqual(_status_json['status'], 'error')
+        self.assertEqual(_status_json['error'], 'oh no')
+
+    def test_post_async_invalid(self):
+        for _queryparams, _content_type in [
+            ({'focus_iri': 'nope'}, 'text/turtle'),
+            ({'focus_iri': _BLARG.this}, 'text/nope'),
+            ({'focus_iri': _BLARG.this, 'is_supplementary': ''}, 'text/turtle'),
+        ]:
+            with mock.patch('trove.digestive_tract.task__ingest_staged_record') as _mock_task:
+                _resp = self.client.post(
+                    '/trove/ingest?' + urlencode({'async': '', **_queryparams}),
+                    content_type=_content_type,
+                    data=self.raw_turtle,
+                    HTTP_AUTHORIZATION=self.user.authorization(),
+                )
+            self.assertEqual(_resp.status_code, HTTPStatus.BAD_REQUEST)
+            self.assertFalse(_mock_task.delay.called)
+        self.assertFalse(trove_db.StagedRecord.objects.exists())
+
+    def test_post_async_too_large(self):
+        with self.settings(DIGESTIVE_TRACT={'MAX_STAGED_RECORD_SIZE': 7}):
+            _resp, _mock_task = self._post_async(self.raw_turtle, focus_iri=_BLARG.this)
+        self.assertEqual(_resp.status_code, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(trove_db.StagedRecord.objects.exists())
+
+    def test_post_async_too_large_undeclared(self):
+        _request = RequestFactory().post(
+            '/trove/ingest?' + urlencode({'async': '', 'focus_iri': _BLARG.this}),
+            content_type='text/turtle',
+            data='.',
+        )
+        _request._body = self.raw_turtle.encode()  # (longer than the declared content-length, as asgi may give)
+        _request.user = self.user
+        with self.settings(DIGESTIVE_TRACT={'MAX_STAGED_RECORD_SIZE': 7}):
+            _resp = RdfIngestView.as_view()(_request)
+        self.assertEqual(_resp.status_code, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(trove_db.StagedRecord.objects.exists())
@@ -10,10 +10,19 @@ class IndexcardDeriver(abc.ABC):
     focus_iri: str
     data: primitive_rdf.RdfGraph
 
-    def __init__(self, upstream_description: ResourceDescription):
+    def __init__(
+        self,
+        upstream_description: ResourceDescription,
+        upstream_data: primitive_rdf.RdfGraph | None = None,
+    ):
         self.upstream_description = upstream_description
         self.focus_iri = upstream_description.focus_iri
-        self.data = upstream_description.as_rdfdoc_with_supplements()
+        # note: `upstream_data` (if given) may be shared with other derivers -- do not mutate
+        self.data = (
+            upstream_description.as_rdfdoc_with_supplements()
+            if upstream_data is None
+            else upstream_data
+        )
 
     def q(self, pathset: Any) -> Any:
         # convenience for querying self.data on self.focus_iri
@@ -39,3 +48,13 @@ class IndexcardDeriver(abc.ABC):
     @abc.abstractmethod
     def derive_card_as_text(self) -> str:
         raise NotImplementedError
+
+    ###
+    # optional for subclasses to override:
+
+    def derive_card_id(self) -> str:
+        '''an id of the derived card's own (if any), kept alongside its text
+
+        (e.g. a doc id, so an index may pass the text along as-is, without parsing it)
+        '''
+        return ''
@@ -1,6 +1,8 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
+from primitive_metadata import primitive_rdf as rdf
+
 from trove.vocab import namespaces as ns
 from trove.derive.osfmap_json import OsfmapJsonFullDeriver
 from trove.vocab.namespaces import TROVE
@@ -13,8 +15,12 @@ EXCLUDED_PREDICATE_SET = frozenset({
 
 
 class OsfmapJsonMiniDeriver(OsfmapJsonFullDeriver):
-    def __init__(self, upstream_description: ResourceDescription):
-        super().__init__(upstream_description)
+    def __init__(
+        self,
+        upstream_description: ResourceDescription,
+        upstream_data: rdf.RdfGraph | None = None,
+    ):
+        super().__init__(upstream_description, upstream_data)
         self.convert_tripledict()
 
     @staticmethod
@@ -22,7 +28,8 @@ class OsfmapJsonMiniDeriver(OsfmapJsonFullDeriver):
         return TROVE['derive/osfmap_json']
 
     def convert_tripledict(self) -> None:
-        self.data.tripledict = {
+        # new graph (rather than mutate `self.data`, which may be shared)
+        self.data = rdf.RdfGraph({
             _subj: _new_twopledict
             for _subj, _old_twopledict in self.data.tripledict.items()
             if (_new_twopledict := {
@@ -30,7 +37,7 @@ class OsfmapJsonMiniDeriver(OsfmapJsonFullDeriver):
                 for _pred, _obj_set in _old_twopledict.items()
                 if self._should_keep_predicate(_pred)
             })
-        }
+        })
 
     @staticmethod
     def _should_keep_predicate(predicate: str) -> bool:
@@ -1,4 +1,5 @@
 import datetime
+import functools
 import json
 import re
 from typing import Union, Dict, Any, List, Tuple, Optional, Set
@@ -150,17 +151,13 @@ class ShareV2ElasticDeriver(IndexcardDeriver):
 
     # abstract method from IndexcardDeriver
     def derive_card_as_text(self) -> str:
-        _suid = self.upstream_description.indexcard.source_record_suid
-        try:  # maintain doc id in the sharev2 index
-            _suid = _suid.get_backcompat_sharev2_suid()
-        except share_db.SourceUniqueIdentifier.DoesNotExist:
-            pass  # ok, use the actual suid
+        _suid = self._sharev2_suid
         _source_name = _suid.source_config.source.long_title
         _subjects, _subject_synonyms = self._subjects_and_synonyms(_source_name)
         _derived_sharev2 = {
             ###
             # metadata about the record/indexcard in this system
-            'id': IDObfuscator.encode(_suid),
+            'id': self.derive_card_id(),
             'indexcard_id': self.upstream_description.indexcard.id,
             'date_created': self.upstream_description.indexcard.created.isoformat(),
             'date_modified': self.upstream_description.modified.isoformat(),
@@ -208,6 +205,18 @@ class ShareV2ElasticDeriver(IndexcardDeriver):
             sort_keys=True,
         )
 
+    # optional method from IndexcardDeriver
+    def derive_card_id(self) -> str:
+        return IDObfuscator.encode(self._sharev2_suid)  # (the sharev2 doc id)
+
+    @functools.cached_property
+    def _sharev2_suid(self) -> share_db.SourceUniqueIdentifier:
+        _suid = self.upstream_description.indexcard.source_record_suid
+        try:  # maintain doc id in the sharev2 index
+            return _suid.get_backcompat_sharev2_suid()
+        except share_db.SourceUniqueIdentifier.DoesNotExist:
+            return _suid  # ok, use the actual suid
+
     def _related_names(self, *predicate_iris: Tuple[Dict[str, Any]]) -> List[None | str | Any]:
         _obj_iter = self.data.q(
             self.focus_iri,
@@ -6,35 +6,61 @@ sniff: set up identifiers about a record
 extract: gather rdf graph from a record; store as index card(s)
 derive: build other representations from latest card version(s)
 '''
-__all__ = ('sniff', 'extract', 'derive', 'expel', 'ingest')
+__all__ = ('sniff', 'extract', 'derive', 'expel', 'ingest', 'ingest_batch', 'stage')
 
 import copy
+import dataclasses
 import datetime
+import functools
 import logging
 from typing import Iterable
 
 import celery
+from django.conf import settings
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import QuerySet, prefetch_related_objects
 from primitive_metadata import primitive_rdf
 
 from share import models as share_db
-from share.search import IndexMessenger
+from share.search import BufferedIndexMessenger, get_worker_index_messenger
 from share.util.checksum_iri import ChecksumIri
 from trove import models as trove_db
 from trove.exceptions import (
     CannotDigestExpiredDatum,
     DigestiveError,
+    TroveError,
 )
 from trove.extract import get_rdf_extractor_class
 from trove.derive import get_deriver_classes
+from trove.util.django import pk_chunked
 from trove.util.iris import smells_like_iri
+from trove.util.iter import iter_chunked
 from trove.vocab.namespaces import RDFS, RDF, OWL
 
 
 logger = logging.getLogger(__name__)
 
 
+@dataclasses.dataclass(frozen=True)
+class IngestRecord:
+    '''one metadata record to ingest, with the same meaning as `ingest` keyword-args'''
+    focus_iri: str
+    record_mediatype: str
+    raw_record: str
+    record_identifier: str | None = None  # default focus_iri
+    is_supplementary: bool = False
+    expiration_date: datetime.date | None = None  # default "never"
+
+
+@dataclasses.dataclass
+class IngestOutcome:
+    '''what became of an `IngestRecord` given to `ingest_batch`'''
+    record: IngestRecord
+    indexcards: list[trove_db.Indexcard] = dataclasses.field(default_factory=list)
+    changed_indexcards: list[trove_db.Indexcard] = dataclasses.field(default_factory=list)
+    error: TroveError | None = None
+
+
 def ingest(
     *,  # all keyword-args
     from_user: share_db.ShareUser,
@@ -57,17 +83,199 @@ def ingest(
     if _suid.source_config.disabled or _suid.source_config.source.is_deleted:
         expel_suid(_suid)
     else:
-        _extracted_cards = extract(
+        (_, _changed_cards) = _extract_with_changes(
             suid=_suid,
             record_mediatype=record_mediatype,
             raw_record=raw_record,
             restore_deleted=restore_deleted,
             expiration_date=expiration_date,
         )
-        for _card in _extracted_cards:
+        for _card in _changed_cards:
             task__derive.delay(_card.pk, urgent=urgent)
 
 
+def ingest_batch(
+    *,  # all keyword-args
+    from_user: share_db.ShareUser,
+    records: Iterable[IngestRecord],
+    restore_deleted: bool = False,
+    urgent: bool = False,
+) -> list[IngestOutcome]:
+    '''ingest_batch: like `ingest`, but for many records from the same user at once
+
+    sniffs and extracts every record in one database transaction (with a savepoint
+    per record, so one indigestible record does not spoil the batch), then schedules
+    derive in chunks once that transaction commits
+
+    returns an `IngestOutcome` for each record, in the order given
+    '''
+    _records = list(records)
+    _outcomes: list[IngestOutcome] = []
+    with transaction.atomic():
+        _source_config = share_db.SourceConfig.objects.get_or_create_push_config(from_user)
+        _source_is_gone = (_source_config.disabled or _source_config.source.is_deleted)
+        _suids_by_identifier = {
+            _suid.identifier: _suid
+            for _suid in (
+                share_db.SourceUniqueIdentifier.objects
+                .filter(
+                    source_config=_source_config,
+                    identifier__in={
+                        (_record.record_identifier or _record.focus_iri)
+                        for _record in _records
+                    },
+                )
+                .select_related('source_config', 'focus_identifier')
+            )
+        }
+        _focus_identifiers_by_iri = trove_db.ResourceIdentifier.objects.get_or_create_many_for_iris(
+            _record.focus_iri
+            for _record in _records
+            if smells_like_iri(_record.focus_iri)  # others will fail `_raise_if_unsniffable`
+        )
+        for _record in _records:
+            _outcome = IngestOutcome(record=_record)
+            _record_identifier = _record.record_identifier or _record.focus_iri
+            try:
+                with transaction.atomic():  # savepoint, to roll back only this record on error
+                    _raise_if_unsniffable(
+                        from_user=from_user,
+                        focus_iri=_record.focus_iri,
+                        record_identifier=_record.record_identifier,
+                        is_supplementary=_record.is_supplementary,
+                    )
+                    _suid = _sniff_for_source_config(
+                        source_config=_source_config,
+                        focus_iri=_record.focus_iri,
+                        record_identifier=_record.record_identifier,
+                        is_supplementary=_record.is_supplementary,
+                        known_suid=_suids_by_identifier.get(_record_identifier),
+                        known_focus_identifier=_focus_identifiers_by_iri.get(_record.focus_iri),
+                    )
+                    if _source_is_gone:
+                        expel_suid(_suid)
+                    else:
+                        (_outcome.indexcards, _outcome.changed_indexcards) = _extract_with_changes(
+                            suid=_suid,
+                            record_mediatype=_record.record_mediatype,
+                            raw_record=_record.raw_record,
+                            restore_deleted=restore_deleted,
+                            expiration_date=_record.expiration_date,
+                        )
+            except TroveError as _error:  # e.g. DigestiveError, IriMismatch
+                logger.info('could not ingest %r (%s)', _record_identifier, _error)
+                _outcome.error = _error
+                # forget any in-memory changes that were rolled back with the savepoint
+                _suids_by_identifier.pop(_record_identifier, None)
+            else:
+                _suids_by_identifier[_record_identifier] = _suid
+            _outcomes.append(_outcome)
+        _indexcard_pks = list(dict.fromkeys(
+            _card.pk
+            for _outcome in _outcomes
+            for _card in _outcome.changed_indexcards
+        ))
+        transaction.on_commit(functools.partial(
+            schedule_derive_chunks,
+            _indexcard_pks,
+            urgent=urgent,
+        ))
+    return _outcomes
+
+
+def stage(
+    *,  # all keyword-args
+    from_user: share_db.ShareUser,
+    focus_iri: str,
+    record_mediatype: str,
+    raw_record: str,
+    record_identifier: str | None = None,  # default focus_iri
+    is_supplementary: bool = False,
+    expiration_date: datetime.date | None = None,  # default "never"
+    urgent: bool = False,
+) -> trove_db.StagedRecord:
+    '''stage: store a record for asynchronous ingest (after only cheap validation)
+
+    returns the `StagedRecord`, which tracks ingest status
+    '''
+    _raise_if_unsniffable(
+        from_user=from_user,
+        focus_iri=focus_iri,
+        record_identifier=record_identifier,
+        is_supplementary=is_supplementary,
+    )
+    get_rdf_extractor_class(record_mediatype)  # raises CannotDigestMediatype
+    if (expiration_date is not None) and (expiration_date <= datetime.date.today()):
+        raise CannotDigestExpiredDatum(focus_iri, expiration_date)
+    _staged_record = trove_db.StagedRecord.objects.create(
+        from_user=from_user,
+        focus_iri=focus_iri,
+        record_mediatype=record_mediatype,
+        raw_record=raw_record,
+        record_identifier=record_identifier,
+        is_supplementary=is_supplementary,
+        expiration_date=expiration_date,
+    )
+    transaction.on_commit(lambda: task__ingest_staged_record.delay(_staged_record.pk, urgent=urgent))
+    return _staged_record
+
+
+def ingest_staged_record(staged_record: trove_db.StagedRecord, *, urgent: bool = False) -> None:
+    '''ingest a `StagedRecord` (if not already done); record the outcome on it'''
+    if staged_record.status != trove_db.StagedRecord.PENDING:
+        return  # already digested (perhaps a redelivered task)
+    try:
+        ingest(
+            from_user=staged_record.from_user,
+            focus_iri=staged_record.focus_iri,
+            record_mediatype=staged_record.record_mediatype,
+            raw_record=staged_record.raw_record,
+            record_identifier=staged_record.record_identifier,
+            is_supplementary=staged_record.is_supplementary,
+            expiration_date=staged_record.expiration_date,
+            restore_deleted=True,
+            urgent=urgent,
+        )
+    except TroveError as _error:  # e.g. DigestiveError, IriMismatch, CannotParseRecord
+        logger.info('could not ingest %r (%s)', staged_record, _error)
+        _pls_note_staged_record_error(staged_record, _error)
+    except Exception as _error:  # unexpected -- still shown on the status endpoint, not left pending
+        _pls_note_staged_record_error(staged_record, _error)
+        raise
+    else:
+        staged_record.status = trove_db.StagedRecord.DIGESTED
+        staged_record.raw_record = ''  # no longer needed; archived as resource description
+        staged_record.save()
+
+
+def _pls_note_staged_record_error(staged_record: trove_db.StagedRecord, error: Exception) -> None:
+    staged_record.status = trove_db.StagedRecord.ERROR
+    staged_record.error_message = str(error) or type(error).__name__
+    staged_record.raw_record = ''  # no longer needed (would not digest again)
+    staged_record.save()
+
+
+def schedule_derive_chunks(
+    indexcard_pks: Iterable[int],
+    *,
+    deriver_iri: str | None = None,
+    notify_index: bool = True,
+    urgent: bool = False,
+) -> None:
+    '''enqueue one `task__derive_chunk` for each chunk of the given indexcard pks
+
+    chunk size from `settings.DIGESTIVE_TRACT['DERIVE_CHUNK_SIZE']`
+    '''
+    _chunk_size = settings.DIGESTIVE_TRACT['DERIVE_CHUNK_SIZE']
+    for _pk_chunk in iter_chunked(indexcard_pks, _chunk_size):
+        task__derive_chunk.delay(
+            _pk_chunk,
+            deriver_iri=deriver_iri,
+            notify_index=notify_index,
+            urgent=urgent,
+        )
+
+
 @transaction.atomic
 def sniff(
     *,  # all keyword-args
@@ -88,23 +296,61 @@ def sniff(
     for a given `(from_user, record_identifier)` pair, `focus_iri` and `is_supplementary`
     must not change -- raises `DigestiveError` if called again with different values
     '''
+    _raise_if_unsniffable(
+        from_user=from_user,
+        focus_iri=focus_iri,
+        record_identifier=record_identifier,
+        is_supplementary=is_supplementary,
+    )
+    return _sniff_for_source_config(
+        source_config=share_db.SourceConfig.objects.get_or_create_push_config(from_user),
+        focus_iri=focus_iri,
+        record_identifier=record_identifier,
+        is_supplementary=is_supplementary,
+    )
+
+
+def _raise_if_unsniffable(
+    *,
+    from_user: share_db.ShareUser,
+    focus_iri: str,
+    record_identifier: str | None,
+    is_supplementary: bool,
+) -> None:
     if not smells_like_iri(focus_iri):
         raise DigestiveError(f'invalid focus_iri "{focus_iri}"')
     if is_supplementary and not record_identifier:
         raise DigestiveError(f'supplementary records must have non-empty record_identifier! focus_iri={focus_iri} from_user={from_user}')
     if is_supplementary and (record_identifier == focus_iri):
         raise DigestiveError(f'supplementary records must have record_identifier distinct from their focus! focus_iri={focus_iri} record_identifier={record_identifier} from_user={from_user}')
-    _source_config = share_db.SourceConfig.objects.get_or_create_push_config(from_user)
-    _suid, _suid_created = share_db.SourceUniqueIdentifier.objects.get_or_create(
-        source_config=_source_config,
-        identifier=record_identifier or focus_iri,
-        defaults={
-            'is_supplementary': is_supplementary,
-        },
-    )
+
+
+def _sniff_for_source_config(
+    *,
+    source_config: share_db.SourceConfig,
+    focus_iri: str,
+    record_identifier: str | None,
+    is_supplementary: bool,
+    known_suid: share_db.SourceUniqueIdentifier | None = None,  # if already loaded
+    known_focus_identifier: trove_db.ResourceIdentifier | None = None,  # if already loaded
+) -> share_db.SourceUniqueIdentifier:
+    if known_suid is None:
+        _suid, _suid_created = share_db.SourceUniqueIdentifier.objects.get_or_create(
+            source_config=source_config,
+            identifier=record_identifier or focus_iri,
+            defaults={
+                'is_supplementary': is_supplementary,
+            },
+        )
+    else:
+        _suid = known_suid
     if bool(_suid.is_supplementary) != is_supplementary:
         raise DigestiveError(f'suid is_supplementary should not change! suid={_suid}, is_supplementary changed from {bool(_suid.is_supplementary)} to {is_supplementary}')
-    _focus_identifier = trove_db.ResourceIdentifier.objects.get_or_create_for_iri(focus_iri)
+    _focus_identifier = (
+        trove_db.ResourceIdentifier.objects.get_or_create_for_iri(focus_iri)
+        if known_focus_identifier is None
+        else known_focus_identifier
+    )
     if _suid.focus_identifier is None:
         _suid.focus_identifier = _focus_identifier
         _suid.save()
@@ -130,6 +376,7 @@ def extract(
         ArchivedResourceDescription (all extracted metadata, if non-supplementary)
         LatestResourceDescription (all extracted metadata, if latest raw and non-supplementary)
         SupplementaryResourceDescription (all extracted metadata, if supplementary)
+        IndexableCard (for each indexable card, with the latest descriptions)
     may delete:
         LatestResourceDescription (previously extracted from the record, but no longer present)
     '''
@@ -176,42 +423,184 @@ def extract(
     )
 
 
+def _extract_with_changes(
+    suid: share_db.SourceUniqueIdentifier,
+    **extract_kwargs,
+) -> tuple[list[trove_db.Indexcard], list[trove_db.Indexcard]]:
+    '''extract, but also tell which of the extracted cards actually changed
+
+    returns (all extracted cards, changed cards) -- a card is unchanged (and need not
+    be derived or reindexed) if it has the same deleted state, the same latest
+    description checksum, and the same supplementary description checksums as before
+    '''
+    _indexcards_before = (
+        trove_db.Indexcard.objects.filter(trove_supplementaryresourcedescription_set__supplementary_suid=suid)
+        if suid.is_supplementary
+        else trove_db.Indexcard.objects.filter(source_record_suid=suid)
+    )
+    _states_before = _get_digested_states(_indexcards_before.values_list('id', 'deleted'))
+    _indexcards = extract(suid=suid, **extract_kwargs)
+    _states_after = _get_digested_states(
+        (_indexcard.pk, _indexcard.deleted)
+        for _indexcard in _indexcards
+    )
+    _changed_indexcards = [
+        _indexcard
+        for _indexcard in _indexcards
+        if _states_before.get(_indexcard.pk) != _states_after[_indexcard.pk]
+    ]
+    _unchanged_count = len(_indexcards) - len(_changed_indexcards)
+    if _unchanged_count:
+        logger.info(
+            '%s: %d of %d extracted indexcards unchanged (not derived or reindexed)',
+            suid, _unchanged_count, len(_indexcards),
+            extra={'metrics': {  # (in json logs, to sum across processes)
+                'unchanged_indexcard_count': _unchanged_count,
+                'extracted_indexcard_count': len(_indexcards),
+            }},
+        )
+    return (_indexcards, _changed_indexcards)
+
+
+def _get_digested_states(
+    indexcard_ids_and_deleteds: Iterable[tuple[int, datetime.datetime | None]],
+) -> dict[int, tuple[bool, str | None, frozenset[tuple[int, str]]]]:
+    '''for each given indexcard id, a hashable summary of its digested state:
+    (is_deleted, latest_checksum, {(supplementary_suid_id, supplement_checksum), ...})
+    '''
+    _is_deleted_by_id = {
+        _indexcard_id: (_deleted is not None)
+        for _indexcard_id, _deleted in indexcard_ids_and_deleteds
+    }
+    if not _is_deleted_by_id:
+        return {}
+    _latest_checksum_by_id = dict(
+        trove_db.LatestResourceDescription.objects
+        .filter(indexcard_id__in=_is_deleted_by_id.keys())
+        .values_list('indexcard_id', 'turtle_checksum_iri')
+    )
+    _supplement_checksums_by_id: dict[int, set[tuple[int, str]]] = {}
+    for _indexcard_id, _supplementary_suid_id, _checksum in (
+        trove_db.SupplementaryResourceDescription.objects
+        .filter(indexcard_id__in=_is_deleted_by_id.keys())
+        .values_list('indexcard_id', 'supplementary_suid_id', 'turtle_checksum_iri')
+    ):
+        _supplement_checksums_by_id.setdefault(_indexcard_id, set()).add(
+            (_supplementary_suid_id, _checksum),
+        )
+    return {
+        _indexcard_id: (
+            _is_deleted,
+            _latest_checksum_by_id.get(_indexcard_id),
+            frozenset(_supplement_checksums_by_id.get(_indexcard_id, ())),
+        )
+        for _indexcard_id, _is_deleted in _is_deleted_by_id.items()
+    }
+
+
 def derive(indexcard: trove_db.Indexcard, deriver_iris: Iterable[str] | None = None) -> list[trove_db.DerivedIndexcard]:
     '''derive: build other kinds of index cards from the extracted rdf
 
     will create, update, or delete:
         DerivedIndexcard
+        IndexableCard
     '''
-    if indexcard.deleted:
-        return []
-    try:
-        _latest_resource_description = indexcard.latest_resource_description
-    except trove_db.LatestResourceDescription.DoesNotExist:
-        return []
-    _derived_list = []
-    for _deriver_class in get_deriver_classes(deriver_iris):
-        _deriver = _deriver_class(upstream_description=_latest_resource_description)
-        _deriver_identifier = trove_db.ResourceIdentifier.objects.get_or_create_for_iri(_deriver.deriver_iri())
-        if _deriver.should_skip():
-            trove_db.DerivedIndexcard.objects.filter(
-                upriver_indexcard=indexcard,
-                deriver_identifier=_deriver_identifier,
-            ).delete()
-        else:
-            _derived_text = _deriver.derive_card_as_text()
-            _derived_checksum_iri = ChecksumIri.digest('sha-256', salt='', data=_derived_text)
-            _derived, _ = trove_db.DerivedIndexcard.objects.update_or_create(
-                upriver_indexcard=indexcard,
-                deriver_identifier=_deriver_identifier,
-                defaults={
-                    'derived_text': _derived_text,
-                    'derived_checksum_iri': _derived_checksum_iri,
-                },
+    return derive_many([indexcard], deriver_iris)
+
+
+def derive_many(
+    indexcards: Iterable[trove_db.Indexcard],
+    deriver_iris: Iterable[str] | None = None,
+) -> list[trove_db.DerivedIndexcard]:
+    '''like `derive`, but for many indexcards at once (with bulk reads and writes)
+    '''
+    _deriver_classes = get_deriver_classes(deriver_iris)
+    _deriver_identifiers_by_iri = trove_db.ResourceIdentifier.objects.get_or_create_many_for_iris(
+        _deriver_class.deriver_iri()
+        for _deriver_class in _deriver_classes
+    )
+    _derived_list: list[trove_db.DerivedIndexcard] = []
+    _skipped_indexcard_ids_by_deriver_identifier_id: dict[int, set[int]] = {}
+    _indexcards = list(indexcards)
+    _prefetch_descriptions(_indexcards)  # (no-op if already prefetched)
+    for _indexcard in _indexcards:
+        if _indexcard.deleted:
+            continue
+        # (use `.all()`, rather than `.get()`, to benefit from prefetch)
+        _latest_resource_description = next(iter(_indexcard.trove_latestresourcedescription_set.all()), None)
+        if _latest_resource_description is None:
+            continue
+        # parse once, with supplements, shared by all derivers
+        _upstream_data = _latest_resource_description.as_rdfdoc_with_supplements()
+        for _deriver_class in _deriver_classes:
+            _deriver = _deriver_class(
+                upstream_description=_latest_resource_description,
+                upstream_data=_upstream_data,
             )
-            _derived_list.append(_derived)
+            _deriver_identifier = _deriver_identifiers_by_iri[_deriver.deriver_iri()]
+            if _deriver.should_skip():
+                _skipped_indexcard_ids_by_deriver_identifier_id.setdefault(
+                    _deriver_identifier.pk, set(),
+                ).add(_indexcard.pk)
+            else:
+                _derived_text = _deriver.derive_card_as_text()
+                _derived_list.append(trove_db.DerivedIndexcard(
+                    upriver_indexcard=_indexcard,
+                    deriver_identifier=_deriver_identifier,
+                    derived_text=_derived_text,
+                    derived_checksum_iri=ChecksumIri.digest('sha-256', salt='', data=_derived_text),
+                    derived_id=_deriver.derive_card_id(),
+                ))
+    if _derived_list:
+        trove_db.ContentBlob.objects.save_blobbed_texts(_derived_list, 'derived_text')
+        trove_db.DerivedIndexcard.objects.bulk_create(
+            _derived_list,
+            update_conflicts=True,
+            unique_fields=['upriver_indexcard', 'deriver_identifier'],
+            update_fields=['derived_text', 'derived_checksum_iri', 'derived_id', 'modified'],
+        )
+    for _deriver_identifier_id, _skipped_indexcard_ids in _skipped_indexcard_ids_by_deriver_identifier_id.items():
+        trove_db.DerivedIndexcard.objects.filter(
+            upriver_indexcard_id__in=_skipped_indexcard_ids,
+            deriver_identifier_id=_deriver_identifier_id,
+        ).delete()
+    # (whether indexable may depend on what was derived)
+    trove_db.IndexableCard.objects.refresh_for_indexcard_ids(_indexcard.pk for _indexcard in _indexcards)
     return _derived_list
 
 
+def _prefetch_descriptions(indexcards: list[trove_db.Indexcard]) -> None:
+    prefetch_related_objects(
+        indexcards,
+        'trove_latestresourcedescription_set',
+        'trove_supplementaryresourcedescription_set',
+    )
+    # for any descriptions stored as blobs, load all turtle in one query
+    trove_db.ContentBlob.objects.load_blobbed_texts(
+        (
+            _description
+            for _indexcard in indexcards
+            for _description in (
+                *_indexcard.trove_latestresourcedescription_set.all(),
+                *_indexcard.trove_supplementaryresourcedescription_set.all(),
+            )
+        ),
+        'rdf_as_turtle',
+    )
+
+
+def _derivable_indexcards_queryset(indexcard_ids: Iterable[int]) -> QuerySet[trove_db.Indexcard]:
+    return (
+        trove_db.Indexcard.objects
+        .filter(id__in=indexcard_ids)
+        .select_related('source_record_suid__source_config__source')
+        .prefetch_related(
+            'trove_latestresourcedescription_set',
+            'trove_supplementaryresourcedescription_set',
+        )
+    )
+
+
 def expel(from_user: share_db.ShareUser, record_identifier: str) -> None:
     _suid_qs = share_db.SourceUniqueIdentifier.objects.filter(
         source_config__source__user=from_user,
@@ -222,8 +611,7 @@ def expel(from_user: share_db.ShareUser, record_identifier: str) -> None:
 
 
 def expel_suid(suid: share_db.SourceUniqueIdentifier) -> None:
-    for _indexcard in trove_db.Indexcard.objects.filter(source_record_suid=suid):
-        _indexcard.pls_delete()
+    _expel_indexcards(trove_db.Indexcard.objects.filter(source_record_suid=suid))
     _expel_supplementary_descriptions(
         trove_db.SupplementaryResourceDescription.objects.filter(supplementary_suid=suid),
     )
@@ -231,25 +619,50 @@ def expel_suid(suid: share_db.SourceUniqueIdentifier) -> None:
 
 def expel_expired_data(today: datetime.date) -> None:
     # mark indexcards deleted if their latest update has now expired
-    for _indexcard in trove_db.Indexcard.objects.filter(
+    _expel_indexcards(trove_db.Indexcard.objects.filter(
         trove_latestresourcedescription_set__expiration_date__lte=today,
-    ):
-        _indexcard.pls_delete()
+    ))
     # delete expired supplementary metadata
     _expel_supplementary_descriptions(
         trove_db.SupplementaryResourceDescription.objects.filter(expiration_date__lte=today),
     )
+    # forget records staged for async ingest (and their status) once kept long enough
+    _forget_staged_records(trove_db.StagedRecord.objects.filter(
+        created__date__lte=today - datetime.timedelta(days=settings.DIGESTIVE_TRACT['STAGED_RECORD_KEEP_DAYS']),
+    ))
+
+
+def _expel_indexcards(indexcard_queryset: QuerySet[trove_db.Indexcard]) -> None:
+    # mark deleted (and notify indexes) one chunk at a time
+    with BufferedIndexMessenger() as _index_messenger:  # (flushed when full and at the end)
+        for _pk_chunk in pk_chunked(indexcard_queryset, settings.DIGESTIVE_TRACT['EXPEL_CHUNK_SIZE']):
+            trove_db.Indexcard.objects.pls_delete_many(_pk_chunk)
+            _index_messenger.notify_indexcard_update(list(
+                trove_db.Indexcard.objects
+                .filter(id__in=_pk_chunk)
+                .only('id', 'source_record_suid')
+            ))
+
+
+def _forget_staged_records(staged_record_queryset: QuerySet[trove_db.StagedRecord]) -> None:
+    _pending_count = staged_record_queryset.filter(status=trove_db.StagedRecord.PENDING).count()
+    if _pending_count:
+        logger.warning('forgetting %d staged records never digested', _pending_count)
+    staged_record_queryset.delete()
 
 
 def _expel_supplementary_descriptions(supplementary_rdf_queryset: QuerySet[trove_db.SupplementaryResourceDescription]) -> None:
-    # delete expired supplementary metadata
-    _affected_indexcards = set()
-    for _supplement in supplementary_rdf_queryset.select_related('indexcard'):
-        if not _supplement.indexcard.deleted:
-            _affected_indexcards.add(_supplement.indexcard)
-        _supplement.delete()
-    for _indexcard in _affected_indexcards:
-        task__derive.delay(_indexcard.pk)
+    # delete supplementary metadata in chunks, then re-derive affected indexcards (in chunks)
+    _affected_indexcard_ids: set[int] = set()
+    for _pk_chunk in pk_chunked(supplementary_rdf_queryset, settings.DIGESTIVE_TRACT['EXPEL_CHUNK_SIZE']):
+        _chunk_queryset = trove_db.SupplementaryResourceDescription.objects.filter(id__in=_pk_chunk)
+        _affected_indexcard_ids.update(
+            _chunk_queryset
+            .filter(indexcard__deleted__isnull=True)
+            .values_list('indexcard_id', flat=True)
+        )
+        _chunk_queryset.delete()
+    schedule_derive_chunks(sorted(_affected_indexcard_ids))
 
 
 ### BEGIN celery tasks
@@ -270,7 +683,32 @@ def task__derive(
     # TODO: avoid unnecessary work; let IndexStrategy subscribe to a specific
     # IndexcardDeriver (perhaps by deriver-specific MessageType?)
     if notify_index:
-        IndexMessenger(celery_app=task.app).notify_indexcard_update([_indexcard], urgent=urgent)
+        get_worker_index_messenger(task.app).notify_indexcard_update([_indexcard], urgent=urgent)
+
+
+@celery.shared_task(acks_late=True, bind=True)
+def task__derive_chunk(
+    task: celery.Task,
+    indexcard_ids: list[int],
+    deriver_iri: str | None = None,
+    notify_index: bool = True,
+    urgent: bool = False,
+) -> None:
+    _indexcards = list(_derivable_indexcards_queryset(indexcard_ids))
+    derive_many(
+        _indexcards,
+        deriver_iris=(None if deriver_iri is None else [deriver_iri]),
+    )
+    if notify_index and _indexcards:
+        get_worker_index_messenger(task.app).notify_indexcard_update(_indexcards, urgent=urgent)
+
+
+@celery.shared_task(acks_late=True)
+def task__ingest_staged_record(staged_record_id: int, urgent: bool = False) -> None:
+    ingest_staged_record(
+        trove_db.StagedRecord.objects.select_related('from_user').get(id=staged_record_id),
+        urgent=urgent,
+    )
 
 
 @celery.shared_task(acks_late=True)
@@ -280,8 +718,7 @@ def task__schedule_derive_for_source_config(source_config_id: int, notify_index:
         .filter(source_record_suid__source_config_id=source_config_id)
         .values_list('id', flat=True)
     )
-    for _indexcard_id in _indexcard_id_qs.iterator():
-        task__derive.delay(_indexcard_id, notify_index=notify_index)
+    schedule_derive_chunks(_indexcard_id_qs.iterator(), notify_index=notify_index)
 
 
 @celery.shared_task(acks_late=True)
@@ -292,8 +729,11 @@ def task__schedule_all_for_deriver(deriver_iri: str, notify_index: bool = False)
         trove_db.Indexcard.objects
         .values_list('id', flat=True)
     )
-    for _indexcard_id in _indexcard_id_qs.iterator():
-        task__derive.apply_async((_indexcard_id, deriver_iri, notify_index))
+    schedule_derive_chunks(
+        _indexcard_id_qs.iterator(),
+        deriver_iri=deriver_iri,
+        notify_index=notify_index,
+    )
 
 
 @celery.shared_task(acks_late=True)
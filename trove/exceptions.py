@@ -35,6 +35,10 @@ class CannotDigestExpiredDatum(DigestiveError):
     pass
 
 
+class CannotParseRecord(DigestiveError):
+    pass
+
+
 ###
 # parsing a request
 
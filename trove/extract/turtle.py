@@ -1,8 +1,12 @@
 from primitive_metadata import primitive_rdf
 
+from trove.exceptions import CannotParseRecord
 from ._base import BaseRdfExtractor
 
 
 class TurtleRdfExtractor(BaseRdfExtractor):
     def extract_rdf(self, input_document: str):  # type: ignore
-        return primitive_rdf.tripledict_from_turtle(input_document)
+        try:
+            return primitive_rdf.tripledict_from_turtle(input_document)
+        except Exception as _error:  # e.g. rdflib's BadSyntax (a SyntaxError)
+            raise CannotParseRecord(f'could not parse turtle: {_error}') from _error
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from share.util.checksum_iri import ChecksumIri
+from trove import models as trove_db
+
+
+# (model, blobbed text field) for each field to move into the blob store
+BLOBBED_FIELDS = (
+    (trove_db.LatestResourceDescription, 'rdf_as_turtle'),
+    (trove_db.SupplementaryResourceDescription, 'rdf_as_turtle'),
+    (trove_db.ArchivedResourceDescription, 'rdf_as_turtle'),
+    (trove_db.DerivedIndexcard, 'derived_text'),
+)
+
+
+class Command(BaseCommand):
+    help = "Move text stored inline (turtle and derived text) into the content-addressed blob store"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CONTENT_BLOB_STORE['BACKFILL_CHUNK_SIZE'],
+            help="Rows to move per transaction",
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        for _model, _field_name in BLOBBED_FIELDS:
+            _moved_count, _mismatch_count = backfill_blobs(_model, _field_name, chunk_size=chunk_size)
+            self.stdout.write(
+                f'{_model.__name__}.{_field_name}: moved {_moved_count} rows'
+                f' (skipped {_mismatch_count} with mismatched checksum)'
+            )
+
+
+def backfill_blobs(model, field_name: str, *, chunk_size: int) -> tuple[int, int]:
+    '''move inline text for the given model field into the blob store, in pk order
+
+    returns counts of (moved, skipped) rows -- skips any row whose text does not match its checksum
+    '''
+    _checksum_field = model._meta.get_field(field_name).checksum_field
+    _inline_queryset = model.objects.exclude(**{field_name: ''}).order_by('pk')
+    _moved_count = _mismatch_count = 0
+    _last_pk = None
+    while True:
+        _chunk_queryset = (
+            _inline_queryset
+            if _last_pk is None
+            else _inline_queryset.filter(pk__gt=_last_pk)
+        )
+        # (values_list gives the inline column value, without loading blobs)
+        _rows = list(_chunk_queryset.values_list('pk', _checksum_field, field_name)[:chunk_size])
+        if not _rows:
+            return (_moved_count, _mismatch_count)
+        _last_pk = _rows[-1][0]
+        _texts_by_checksum_iri = {}
+        for _pk, _checksum_iri, _text in _rows:
+            if _checksum_iri and (_checksum_iri == _checksum_iri_for(_checksum_iri, _text)):
+                _texts_by_checksum_iri[_checksum_iri] = _text
+            else:
+                _mismatch_count += 1
+        with transaction.atomic():
+            trove_db.ContentBlob.objects.save_texts(_texts_by_checksum_iri)
+            # (filter by checksum, too, in case of concurrent update)
+            _moved_count += (
+                model.objects
+                .filter(pk__in=[_pk for _pk, _, _ in _rows])
+                .filter(**{f'{_checksum_field}__in': _texts_by_checksum_iri.keys()})
+                .update(**{field_name: ''})
+            )
+
+
+def _checksum_iri_for(checksum_iri: str, text: str) -> str | None:
+    try:
+        _checksum = ChecksumIri.from_iri(checksum_iri)
+        return str(ChecksumIri.digest(_checksum.checksumalgorithm_name, salt=_checksum.salt, data=text))
+    except ValueError:
+        return None
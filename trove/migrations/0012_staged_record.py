@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:52
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trove', '0011_upgrade_django_5_2'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('focus_iri', models.TextField()),
+                ('record_mediatype', models.TextField()),
+                ('raw_record', models.TextField()),
+                ('record_identifier', models.TextField(blank=True, null=True)),
+                ('is_supplementary', models.BooleanField(default=False)),
+                ('expiration_date', models.DateField(blank=True, null=True)),
+                ('status', models.TextField(choices=[('pending', 'pending'), ('digested', 'digested'), ('error', 'error')], default='pending')),
+                ('error_message', models.TextField(blank=True)),
+                ('from_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:02
+
+import trove.models.content_blob
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trove', '0012_staged_record'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum_iri', models.TextField(unique=True)),
+                ('codec', models.TextField(choices=[('zstd', 'zstd'), ('zlib', 'zlib')])),
+                ('compressed_content', models.BinaryField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='archivedresourcedescription',
+            name='rdf_as_turtle',
+            field=trove.models.content_blob.BlobbedTextField(checksum_field='turtle_checksum_iri'),
+        ),
+        migrations.AlterField(
+            model_name='derivedindexcard',
+            name='derived_text',
+            field=trove.models.content_blob.BlobbedTextField(checksum_field='derived_checksum_iri'),
+        ),
+        migrations.AlterField(
+            model_name='latestresourcedescription',
+            name='rdf_as_turtle',
+            field=trove.models.content_blob.BlobbedTextField(checksum_field='turtle_checksum_iri'),
+        ),
+        migrations.AlterField(
+            model_name='supplementaryresourcedescription',
+            name='rdf_as_turtle',
+            field=trove.models.content_blob.BlobbedTextField(checksum_field='turtle_checksum_iri'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:14
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trove', '0013_content_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexableCard',
+            fields=[
+                ('indexcard', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='trove.indexcard')),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('indexcard_uuid', models.UUIDField()),
+                ('suid_identifier', models.TextField()),
+                ('source_config_label', models.TextField()),
+                ('source_id', models.IntegerField()),
+                ('is_v2_push', models.BooleanField()),
+                ('focus_iri', models.TextField()),
+                ('turtle_checksum_iri', models.TextField()),
+                ('supplement_checksum_iris', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trove', '0014_indexable_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='derivedindexcard',
+            name='derived_id',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
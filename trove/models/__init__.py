@@ -1,13 +1,18 @@
 __all__ = (
     'ArchivedResourceDescription',
+    'ContentBlob',
     'DerivedIndexcard',
+    'IndexableCard',
     'Indexcard',
     'LatestResourceDescription',
     'ResourceDescription',
     'ResourceIdentifier',
+    'StagedRecord',
     'SupplementaryResourceDescription',
 )
+from .content_blob import ContentBlob
 from .derived_indexcard import DerivedIndexcard
+from .indexable_card import IndexableCard
 from .indexcard import Indexcard
 from .resource_description import (
     ArchivedResourceDescription,
@@ -16,3 +21,4 @@ from .resource_description import (
     SupplementaryResourceDescription,
 )
 from .resource_identifier import ResourceIdentifier
+from .staged_record import StagedRecord
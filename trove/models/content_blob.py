@@ -0,0 +1,194 @@
+from __future__ import annotations
+from collections.abc import Iterable
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # optional (only for the opt-in "zstd" codec)
+    zstandard = None
+
+__all__ = (
+    'BlobbedTextField',
+    'ContentBlob',
+)
+
+
+ZSTD = 'zstd'
+ZLIB = 'zlib'
+
+
+class ContentBlobManager(models.Manager):
+    def save_texts(self, texts_by_checksum_iri: dict[str, str]) -> None:
+        '''store each text (compressed) by its checksum iri, unless already stored'''
+        if not texts_by_checksum_iri:
+            return
+        _codec = get_default_codec()
+        self.bulk_create(
+            [
+                ContentBlob(
+                    checksum_iri=_checksum_iri,
+                    codec=_codec,
+                    compressed_content=compress(_codec, _text.encode()),
+                )
+                for _checksum_iri, _text in sorted(texts_by_checksum_iri.items())  # (sorted to avoid deadlock)
+            ],
+            ignore_conflicts=True,
+        )
+
+    def get_texts(self, checksum_iris: Iterable[str]) -> dict[str, str]:
+        _checksum_iris = set(filter(None, checksum_iris))
+        if not _checksum_iris:
+            return {}
+        return {
+            _checksum_iri: decompress(_codec, bytes(_compressed)).decode()
+            for _checksum_iri, _codec, _compressed in (
+                self.filter(checksum_iri__in=_checksum_iris)
+                .values_list('checksum_iri', 'codec', 'compressed_content')
+            )
+        }
+
+    def get_text(self, checksum_iri: str) -> str:
+        return self.get_texts([checksum_iri]).get(checksum_iri, '')
+
+    def save_blobbed_texts(self, instances: Iterable[models.Model], field_name: str) -> None:
+        '''for bulk writes: store the given `BlobbedTextField` from each instance in one query
+
+        (leaves the field empty on each instance, so `bulk_create`/`bulk_update` write
+        nothing inline -- the text will be loaded lazily, as needed)
+        '''
+        if not settings.CONTENT_BLOB_STORE['ENABLED']:
+            return
+        _instances = list(instances)
+        _texts_by_checksum_iri = {}
+        for _instance in _instances:
+            _field = _instance._meta.get_field(field_name)
+            _text = _instance.__dict__.get(_field.attname)
+            _checksum_iri = _field.get_checksum_iri(_instance)
+            if _text and _checksum_iri:
+                _texts_by_checksum_iri[_checksum_iri] = _text
+                _instance.__dict__[_field.attname] = ''
+        self.save_texts(_texts_by_checksum_iri)
+
+    def load_blobbed_texts(self, instances: Iterable[models.Model], field_name: str) -> None:
+        '''for bulk reads: load the given `BlobbedTextField` for all instances in one query
+        '''
+        _instances_by_checksum_iri: dict[str, list[models.Model]] = {}
+        for _instance in instances:
+            _field = _instance._meta.get_field(field_name)
+            _checksum_iri = _field.get_checksum_iri(_instance)
+            if _checksum_iri and (_instance.__dict__.get(_field.attname) == ''):
+                _instances_by_checksum_iri.setdefault(_checksum_iri, []).append(_instance)
+        _texts = self.get_texts(_instances_by_checksum_iri.keys())
+        for _checksum_iri, _text in _texts.items():
+            for _instance in _instances_by_checksum_iri[_checksum_iri]:
+                _instance.__dict__[_instance._meta.get_field(field_name).attname] = _text
+
+
+class ContentBlob(models.Model):
+    '''compressed text, content-addressed by checksum iri (stored once, however many rows refer to it)
+    '''
+    CODEC_CHOICES = (
+        (ZSTD, ZSTD),
+        (ZLIB, ZLIB),
+    )
+
+    objects = ContentBlobManager()
+
+    checksum_iri = models.TextField(unique=True)
+    codec = models.TextField(choices=CODEC_CHOICES)
+    compressed_content = models.BinaryField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__qualname__}({self.pk}, "{self.checksum_iri}")'
+
+    def __str__(self) -> str:
+        return repr(self)
+
+    def get_text(self) -> str:
+        return decompress(self.codec, bytes(self.compressed_content)).decode()
+
+
+class BlobbedTextAttribute(DeferredAttribute):
+    '''descriptor for `BlobbedTextField` -- loads text from the blob store, when needed'''
+    field: BlobbedTextField
+
+    def __get__(self, instance, cls=None):
+        _text = super().__get__(instance, cls)
+        if (instance is None) or _text:
+            return _text
+        _checksum_iri = self.field.get_checksum_iri(instance)
+        if _checksum_iri:
+            _text = ContentBlob.objects.get_text(_checksum_iri)
+            instance.__dict__[self.field.attname] = _text
+        return _text
+
+    def __set__(self, instance, value):
+        # (a data descriptor, so `__get__` is called even when the value is in `__dict__`)
+        instance.__dict__[self.field.attname] = value
+
+
+class BlobbedTextField(models.TextField):
+    '''text field stored (when `CONTENT_BLOB_STORE['ENABLED']`) in `ContentBlob` by checksum iri
+
+    the column itself holds the empty string for blobbed text (or the full text, for
+    rows written inline) -- either way, reading the attribute gives the full text
+    '''
+    descriptor_class = BlobbedTextAttribute
+
+    def __init__(self, *args, checksum_field: str, **kwargs):
+        self.checksum_field = checksum_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        _name, _path, _args, _kwargs = super().deconstruct()
+        _kwargs['checksum_field'] = self.checksum_field
+        return _name, _path, _args, _kwargs
+
+    def get_checksum_iri(self, instance: models.Model) -> str:
+        return str(getattr(instance, self.checksum_field) or '')
+
+    def pre_save(self, model_instance, add):
+        # (empty means already blobbed -- no need to load)
+        _text = model_instance.__dict__.get(self.attname, '')
+        _checksum_iri = self.get_checksum_iri(model_instance)
+        if _text and _checksum_iri and settings.CONTENT_BLOB_STORE['ENABLED']:
+            ContentBlob.objects.save_texts({_checksum_iri: _text})
+            return ''  # nothing inline
+        return _text
+
+
+###
+# compression
+
+def get_default_codec() -> str:
+    '''codec for new blobs -- "zlib", unless "zstd" is opted into
+
+    (blobs are read by every host, so opt into "zstd" only with "zstandard" installed everywhere)
+    '''
+    _codec = settings.CONTENT_BLOB_STORE['CODEC']
+    if (_codec == ZSTD) and (zstandard is None):
+        raise ValueError('cannot use codec "zstd" without the optional "zstandard" package')
+    return _codec
+
+
+def compress(codec: str, data: bytes) -> bytes:
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor().compress(data)
+    if codec == ZLIB:
+        return zlib.compress(data)
+    raise ValueError(f'unknown codec "{codec}"')
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == ZSTD:
+        if zstandard is None:
+            raise ValueError('cannot decompress zstd without the optional "zstandard" package')
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == ZLIB:
+        return zlib.decompress(data)
+    raise ValueError(f'unknown codec "{codec}"')
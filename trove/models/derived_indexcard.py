@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 from django.db import models
 from primitive_metadata import primitive_rdf as rdf
 
+from trove.models.content_blob import BlobbedTextField
 from trove.models.resource_identifier import ResourceIdentifier
 if TYPE_CHECKING:
     from trove.derive._base import IndexcardDeriver
@@ -24,7 +25,10 @@ class DerivedIndexcard(models.Model):
     )
     deriver_identifier = models.ForeignKey(ResourceIdentifier, on_delete=models.PROTECT, related_name='+')
     derived_checksum_iri = models.TextField()
-    derived_text = models.TextField()  # TODO: store elsewhere by checksum
+    derived_text = BlobbedTextField(checksum_field='derived_checksum_iri')
+
+    # optional:
+    derived_id = models.TextField(blank=True, default='')  # (see `IndexcardDeriver.derive_card_id`)
 
     class Meta:
         constraints = [
@@ -0,0 +1,227 @@
+from __future__ import annotations
+from collections.abc import Iterable
+import functools
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from primitive_metadata import primitive_rdf as rdf
+
+from share import models as share_db  # TODO: break this dependency
+from trove.models.content_blob import ContentBlob
+from trove.models.derived_indexcard import DerivedIndexcard
+from trove.models import resource_description
+from trove.models.resource_description import (
+    LatestResourceDescription,
+    SupplementaryResourceDescription,
+    get_parsed_turtle,
+)
+from trove.models.resource_identifier import ResourceIdentifier
+from trove.vocab.namespaces import TROVE
+from trove.vocab.trove import trove_indexcard_iri
+
+__all__ = ('IndexableCard',)
+
+
+class IndexableCardManager(models.Manager['IndexableCard']):
+    def refresh_for_indexcard_ids(self, indexcard_ids: Iterable[int]) -> None:
+        '''update the rows for the given index-cards (adding or deleting, as each is indexable or not)
+
+        (called after writing descriptions or derived cards; see `IndexableCard`)
+        '''
+        _indexcard_ids = set(indexcard_ids)
+        if not _indexcard_ids:
+            return
+        _rows = [
+            IndexableCard(
+                indexcard_id=_indexcard_id,
+                indexcard_uuid=_indexcard_uuid,
+                suid_identifier=_suid_identifier,
+                source_config_label=_source_config_label,
+                source_id=_source_id,
+                is_v2_push=(_transformer_key == 'v2_push'),
+                focus_iri=_focus_iri,
+                turtle_checksum_iri=_turtle_checksum_iri,
+            )
+            for (
+                _indexcard_id,
+                _indexcard_uuid,
+                _suid_identifier,
+                _source_config_label,
+                _source_id,
+                _transformer_key,
+                _focus_iri,
+                _turtle_checksum_iri,
+            ) in (
+                LatestResourceDescription.objects
+                .filter(indexcard_id__in=_indexcard_ids, indexcard__deleted__isnull=True)
+                .filter(indexcard_id__in=(  # only index items that have an osfmap_json representation
+                    DerivedIndexcard.objects
+                    .filter(deriver_identifier__in=(
+                        ResourceIdentifier.objects
+                        .queryset_for_iri(TROVE['derive/osfmap_json'])
+                    ))
+                    .values('upriver_indexcard_id')
+                ))
+                .values_list(
+                    'indexcard_id',
+                    'indexcard__uuid',
+                    'indexcard__source_record_suid__identifier',
+                    'indexcard__source_record_suid__source_config__label',
+                    'indexcard__source_record_suid__source_config__source_id',
+                    'indexcard__source_record_suid__source_config__transformer_key',
+                    'focus_iri',
+                    'turtle_checksum_iri',
+                )
+            )
+        ]
+        _supplement_checksum_iris: dict[int, list[str]] = {}
+        for _indexcard_id, _checksum_iri in (
+            SupplementaryResourceDescription.objects
+            .filter(indexcard_id__in=[_row.indexcard_id for _row in _rows])
+            .order_by('pk')
+            .values_list('indexcard_id', 'turtle_checksum_iri')
+        ):
+            _supplement_checksum_iris.setdefault(_indexcard_id, []).append(_checksum_iri)
+        for _row in _rows:
+            _row.supplement_checksum_iris = _supplement_checksum_iris.get(_row.indexcard_id, [])
+        if _rows:
+            self.bulk_create(
+                _rows,
+                update_conflicts=True,
+                unique_fields=['indexcard'],
+                update_fields=[
+                    _field.name
+                    for _field in IndexableCard._meta.concrete_fields
+                    if not _field.primary_key
+                ],
+            )
+        (  # any not indexable (any longer)
+            self.filter(indexcard_id__in=_indexcard_ids)
+            .exclude(indexcard_id__in=[_row.indexcard_id for _row in _rows])
+            .delete()
+        )
+
+    def for_indexing(self, indexcard_ids: Iterable[int]) -> list[IndexableCard]:
+        '''get rows for the given index-cards (in one query, with turtle not yet parsed in one more)
+
+        omits cards from an obsolete suid with a later duplicate (a "forecompat replacement"),
+        and refreshes any missing rows first (for cards not projected since added)
+        '''
+        _indexcard_ids = set(indexcard_ids)
+        _rows = list(self._for_indexing_queryset(_indexcard_ids))
+        _missing_ids = _indexcard_ids.difference(_row.indexcard_id for _row in _rows)
+        if _missing_ids:
+            self.refresh_for_indexcard_ids(_missing_ids)
+            _rows.extend(self._for_indexing_queryset(_missing_ids))
+        _indexable_cards = [
+            _row
+            for _row in _rows
+            if not _row.has_forecompat_replacement
+        ]
+        _load_unparsed_turtles(_indexable_cards)
+        return _indexable_cards
+
+    def _for_indexing_queryset(self, indexcard_ids: Iterable[int]) -> models.QuerySet[IndexableCard]:
+        return (
+            self.filter(indexcard_id__in=indexcard_ids)
+            .annotate(has_forecompat_replacement=models.ExpressionWrapper(
+                # (see `SourceUniqueIdentifier.has_forecompat_replacement`)
+                models.Q(is_v2_push=True) & models.Exists(
+                    share_db.SourceUniqueIdentifier.objects
+                    .filter(
+                        identifier=models.OuterRef('suid_identifier'),
+                        source_config__source_id=models.OuterRef('source_id'),
+                        source_config__transformer_key__isnull=True,
+                    )
+                ),
+                output_field=models.BooleanField(),
+            ))
+        )
+
+
+class IndexableCard(models.Model):
+    '''a denormalized projection of an index-card with all an index needs to build its docs,
+    kept for each indexable card (not deleted, with latest description and osfmap_json)
+
+    turtle is held by checksum iri (as in `ContentBlob` and the parsed-turtle cache)
+    '''
+    objects = IndexableCardManager()
+
+    indexcard = models.OneToOneField(
+        'trove.Indexcard',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    modified = models.DateTimeField(auto_now=True)
+    indexcard_uuid = models.UUIDField()
+    suid_identifier = models.TextField()
+    source_config_label = models.TextField()
+    source_id = models.IntegerField()
+    is_v2_push = models.BooleanField()  # (may have a forecompat replacement)
+    focus_iri = models.TextField()
+    turtle_checksum_iri = models.TextField()  # of the latest description
+    supplement_checksum_iris = ArrayField(models.TextField(), default=list)
+
+    _loaded_turtles: dict[str, str]  # (by checksum iri; see `IndexableCardManager.for_indexing`)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_turtles = {}
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__qualname__}({self.indexcard_id}, "{self.focus_iri}")'
+
+    def __str__(self) -> str:
+        return repr(self)
+
+    def get_iri(self) -> str:
+        return trove_indexcard_iri(self.indexcard_uuid)
+
+    def each_turtle_checksum_iri(self) -> Iterable[str]:
+        yield self.turtle_checksum_iri
+        yield from self.supplement_checksum_iris
+
+    def as_rdfdoc_with_supplements(self) -> rdf.RdfGraph:
+        '''build an rdf graph composed of the latest description and all current card supplements'''
+        _rdfdoc = rdf.RdfGraph()
+        for _checksum_iri in self.each_turtle_checksum_iri():
+            _rdfdoc.add_tripledict(get_parsed_turtle(_checksum_iri, functools.partial(self._get_turtle, _checksum_iri)))
+        return _rdfdoc
+
+    def _get_turtle(self, turtle_checksum_iri: str) -> str:
+        if turtle_checksum_iri not in self._loaded_turtles:  # (e.g. evicted from cache since loading)
+            _load_unparsed_turtles([self], also_parsed=True)
+        return self._loaded_turtles.get(turtle_checksum_iri, '')
+
+
+###
+# local helpers
+
+def _load_unparsed_turtles(indexable_cards: Iterable[IndexableCard], *, also_parsed: bool = False) -> None:
+    # load turtle for all the given cards not already parsed (from blobs, or else inline)
+    _cards = list(indexable_cards)
+    _checksum_iris = {
+        _checksum_iri
+        for _card in _cards
+        for _checksum_iri in _card.each_turtle_checksum_iri()
+        if also_parsed or (_checksum_iri not in resource_description.PARSED_TURTLE_CACHE)
+    }
+    _turtles = ContentBlob.objects.get_texts(_checksum_iris)
+    _inline_checksum_iris = _checksum_iris.difference(_turtles.keys())
+    for _description_model in (LatestResourceDescription, SupplementaryResourceDescription):
+        if _inline_checksum_iris:
+            # (values_list gives the inline column value, without loading blobs)
+            _turtles.update(
+                _description_model.objects
+                .filter(turtle_checksum_iri__in=_inline_checksum_iris)
+                .exclude(rdf_as_turtle='')
+                .values_list('turtle_checksum_iri', 'rdf_as_turtle')
+            )
+            _inline_checksum_iris.difference_update(_turtles.keys())
+    for _card in _cards:
+        _card._loaded_turtles = {
+            _checksum_iri: _turtles[_checksum_iri]
+            for _checksum_iri in _card.each_turtle_checksum_iri()
+            if _checksum_iri in _turtles
+        }
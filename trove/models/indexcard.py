@@ -1,6 +1,7 @@
 from __future__ import annotations
 import datetime
 import uuid
+from collections.abc import Collection
 from typing import Any
 
 from django.db import models
@@ -12,6 +13,7 @@ from share import models as share_db  # TODO: break this dependency
 from share.util.checksum_iri import ChecksumIri
 from trove.exceptions import DigestiveError
 from trove.models.derived_indexcard import DerivedIndexcard
+from trove.models.indexable_card import IndexableCard
 from trove.models.resource_description import (
     ArchivedResourceDescription,
     ResourceDescription,
@@ -31,6 +33,17 @@ class IndexcardManager(models.Manager['Indexcard']):
         _uuid = rdf.iri_minus_namespace(iri, namespace=trove_indexcard_namespace())
         return self.get(uuid=_uuid)
 
+    @transaction.atomic
+    def pls_delete_many(self, indexcard_ids: Collection[int]) -> None:
+        '''like `Indexcard.pls_delete`, but for many at once (and without notifying indexes)
+        '''
+        # do not actually delete Indexcard, just mark deleted:
+        self.filter(id__in=indexcard_ids, deleted__isnull=True).update(deleted=timezone.now())
+        # actually delete LatestResourceDescription and DerivedIndexcard:
+        LatestResourceDescription.objects.filter(indexcard_id__in=indexcard_ids).delete()
+        DerivedIndexcard.objects.filter(upriver_indexcard_id__in=indexcard_ids).delete()
+        IndexableCard.objects.filter(indexcard_id__in=indexcard_ids).delete()
+
     @transaction.atomic
     def save_indexcards_from_tripledicts(
         self, *,
@@ -95,6 +108,7 @@ class IndexcardManager(models.Manager['Indexcard']):
             if _supplement_to_delete.indexcard_id not in _seen_indexcard_ids:
                 _indexcards.append(_supplement_to_delete.indexcard)
             _supplement_to_delete.delete()
+            IndexableCard.objects.refresh_for_indexcard_ids([_supplement_to_delete.indexcard_id])
         return _indexcards
 
     @transaction.atomic
@@ -111,10 +125,11 @@ class IndexcardManager(models.Manager['Indexcard']):
             ResourceIdentifier.objects
             .save_equivalent_identifier_set(rdf_tripledict, focus_iri)
         )
-        _focustype_identifier_set = [  # TODO: require non-zero?
-            ResourceIdentifier.objects.get_or_create_for_iri(_iri)
-            for _iri in rdf_tripledict[focus_iri].get(RDF.type, ())
-        ]
+        _focustype_identifier_set = list(dict.fromkeys(  # TODO: require non-zero?
+            ResourceIdentifier.objects
+            .get_or_create_many_for_iris(rdf_tripledict[focus_iri].get(RDF.type, ()))
+            .values()
+        ))
         _indexcard: Indexcard | None = Indexcard.objects.filter(
             source_record_suid=suid,
             focus_identifier_set__in=_focus_identifier_set,
@@ -227,6 +242,7 @@ class Indexcard(models.Model):
             .filter(upriver_indexcard=self)
             .delete()
         )
+        IndexableCard.objects.filter(indexcard=self).delete()
         if notify_indexes:
             # TODO: rearrange to avoid local import
             from share.search.index_messenger import IndexMessenger
@@ -260,7 +276,8 @@ class Indexcard(models.Model):
         if (not _archived_created) and (_archived.rdf_as_turtle != _rdf_as_turtle):
             raise DigestiveError(f'hash collision? {_archived}\n===\n{_rdf_as_turtle}')
         if not self.deleted:
-            _latest_resource_description, _created = LatestResourceDescription.objects.update_or_create(
+            _latest_resource_description = _update_or_create_if_changed(
+                LatestResourceDescription,
                 indexcard=self,
                 defaults={
                     'turtle_checksum_iri': _turtle_checksum_iri,
@@ -269,6 +286,7 @@ class Indexcard(models.Model):
                     'expiration_date': expiration_date,
                 },
             )
+            IndexableCard.objects.refresh_for_indexcard_ids([self.pk])
             return _latest_resource_description
         return _archived
 
@@ -283,7 +301,8 @@ class Indexcard(models.Model):
         if focus_iri not in rdf_tripledict:
             raise DigestiveError(f'expected {focus_iri} in {set(rdf_tripledict.keys())}')
         _rdf_as_turtle, _turtle_checksum_iri = _turtlify(rdf_tripledict)
-        _supplement_rdf, _ = SupplementaryResourceDescription.objects.update_or_create(
+        _supplement_rdf = _update_or_create_if_changed(
+            SupplementaryResourceDescription,
             indexcard=self,
             supplementary_suid=supplementary_suid,
             defaults={
@@ -293,12 +312,31 @@ class Indexcard(models.Model):
                 'expiration_date': expiration_date,
             },
         )
+        IndexableCard.objects.refresh_for_indexcard_ids([self.pk])
         return _supplement_rdf
 
 
 ###
 # local helpers
 
+def _update_or_create_if_changed[D: ResourceDescription](
+    description_model: type[D],
+    *,
+    defaults: dict[str, Any],
+    **lookup: Any,
+) -> D:
+    '''like `update_or_create`, but without a write if nothing would change'''
+    _existing = description_model.objects.filter(**lookup).first()
+    if (_existing is not None) and all(
+        getattr(_existing, _fieldname) == _value
+        for _fieldname, _value in defaults.items()
+        if _fieldname != 'rdf_as_turtle'  # (compare by turtle_checksum_iri, without loading)
+    ):
+        return _existing
+    _description, _ = description_model.objects.update_or_create(defaults=defaults, **lookup)
+    return _description
+
+
 def _turtlify(rdf_tripledict: rdf.RdfTripleDictionary) -> tuple[str, str]:
     '''return turtle serialization and checksum iri of that serialization'''
     _rdf_as_turtle = rdf.turtle_from_tripledict(rdf_tripledict)
@@ -1,9 +1,16 @@
 from __future__ import annotations
+import collections
+from collections.abc import Callable, Iterable
 import datetime
 
+from django.conf import settings
+from django.core.cache import BaseCache, caches
 from django.db import models
 from primitive_metadata import primitive_rdf as rdf
 
+from trove.models.content_blob import BlobbedTextField, ContentBlob
+from trove.util.lru_cache import SizedLruCache
+
 __all__ = (
     'ArchivedResourceDescription',
     'ResourceDescription',
@@ -11,6 +18,12 @@ __all__ = (
     'SupplementaryResourceDescription',
 )
 
+# parsed turtle, keyed by checksum (so never stale) -- in-process and (optionally) shared
+PARSED_TURTLE_CACHE: SizedLruCache[str, rdf.RdfTripleDictionary] = SizedLruCache(
+    max_size=settings.PARSED_TURTLE_CACHE['MAX_BYTES'],
+)
+_SHARED_CACHE_COUNTS: collections.Counter[str] = collections.Counter()  # "hits", "misses" (approximate)
+
 
 class ResourceDescription(models.Model):
     # auto:
@@ -25,7 +38,7 @@ class ResourceDescription(models.Model):
     )
     turtle_checksum_iri = models.TextField(db_index=True)
     focus_iri = models.TextField()  # exact iri used in rdf_as_turtle
-    rdf_as_turtle = models.TextField()  # TODO: store elsewhere by checksum
+    rdf_as_turtle = BlobbedTextField(checksum_field='turtle_checksum_iri')
 
     # optional:
     expiration_date = models.DateField(
@@ -45,7 +58,14 @@ class ResourceDescription(models.Model):
         )
 
     def as_rdf_tripledict(self) -> rdf.RdfTripleDictionary:
-        return rdf.tripledict_from_turtle(self.rdf_as_turtle)
+        # each caller gets its own copy, free to mutate
+        return _copy_tripledict(self._get_parsed_turtle())
+
+    def _get_parsed_turtle(self) -> rdf.RdfTripleDictionary:
+        # note: the cached tripledict must not be mutated; see `as_rdf_tripledict`
+        if not self.turtle_checksum_iri:  # no key to cache by
+            return rdf.tripledict_from_turtle(self.rdf_as_turtle)
+        return get_parsed_turtle(self.turtle_checksum_iri, lambda: self.rdf_as_turtle)
 
     def as_quoted_graph(self) -> rdf.QuotedGraph:
         return rdf.QuotedGraph(
@@ -57,7 +77,8 @@ class ResourceDescription(models.Model):
         '''build an rdf graph composed of this rdf and all current card supplements'''
         _rdfdoc = rdf.RdfGraph(self.as_rdf_tripledict())
         for _supplement in self.indexcard.supplementary_description_set.all():
-            _rdfdoc.add_tripledict(_supplement.as_rdf_tripledict())
+            # (no copy needed; add_tripledict only reads)
+            _rdfdoc.add_tripledict(_supplement._get_parsed_turtle())
         return _rdfdoc
 
     def __repr__(self) -> str:
@@ -107,3 +128,78 @@ class SupplementaryResourceDescription(ResourceDescription):
         indexes = [
             models.Index(fields=['expiration_date']),  # for expiring
         ]
+
+
+def get_parsed_turtle(
+    turtle_checksum_iri: str,
+    get_turtle: Callable[[], str],
+) -> rdf.RdfTripleDictionary:
+    '''get parsed turtle by checksum iri, from cache if there (else calling `get_turtle`)
+
+    (the returned tripledict is shared, so must not be mutated)
+    '''
+    _cached = PARSED_TURTLE_CACHE.get(turtle_checksum_iri)
+    if _cached is not None:
+        return _cached
+    _shared_cache = _get_shared_cache()
+    # (shared with its size, so a hit needs no turtle)
+    _sized = (
+        None
+        if _shared_cache is None
+        else _shared_cache.get(_shared_cache_key(turtle_checksum_iri))
+    )
+    if _shared_cache is not None:
+        _SHARED_CACHE_COUNTS['misses' if _sized is None else 'hits'] += 1
+    if _sized is None:
+        _turtle = get_turtle()
+        # approximate size by turtle length (parsed is bigger, but proportional)
+        _sized = (len(_turtle), rdf.tripledict_from_turtle(_turtle))
+        if _shared_cache is not None:
+            _shared_cache.set(_shared_cache_key(turtle_checksum_iri), _sized)
+    (_size, _parsed) = _sized
+    PARSED_TURTLE_CACHE.put(turtle_checksum_iri, _parsed, size=_size)
+    return _parsed
+
+
+def load_unparsed_turtles(resource_descriptions: Iterable[ResourceDescription]) -> None:
+    '''for bulk reads: load turtle for the given descriptions (not already parsed) in one query'''
+    ContentBlob.objects.load_blobbed_texts(
+        (
+            _description
+            for _description in resource_descriptions
+            if _description.turtle_checksum_iri not in PARSED_TURTLE_CACHE
+        ),
+        'rdf_as_turtle',
+    )
+
+
+def parsed_turtle_cache_stats() -> dict:
+    '''counts for the parsed-turtle cache in this process (and its use of the shared tier, if any)'''
+    return {
+        **PARSED_TURTLE_CACHE.stats(),
+        'shared_hits': _SHARED_CACHE_COUNTS['hits'],
+        'shared_misses': _SHARED_CACHE_COUNTS['misses'],
+    }
+
+
+###
+# local helpers
+
+def _copy_tripledict(tripledict: rdf.RdfTripleDictionary) -> rdf.RdfTripleDictionary:
+    # only the dicts and sets are mutable; all rdf objects are immutable
+    return {
+        _subject: {
+            _predicate: set(_objects)
+            for _predicate, _objects in _twopledict.items()
+        }
+        for _subject, _twopledict in tripledict.items()
+    }
+
+
+def _get_shared_cache() -> BaseCache | None:
+    _alias = settings.PARSED_TURTLE_CACHE['SHARED_CACHE_ALIAS']
+    return (caches[_alias] if _alias else None)
+
+
+def _shared_cache_key(turtle_checksum_iri: str) -> str:
+    return f'trove.parsed_turtle.sized:{turtle_checksum_iri}'
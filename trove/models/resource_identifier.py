@@ -3,7 +3,7 @@ import typing
 
 from django.core.exceptions import ValidationError
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.db import connections, models
 from django.db.models import QuerySet
 from django.db.models.functions import Substr, StrIndex
 from primitive_metadata import primitive_rdf
@@ -88,18 +88,84 @@ class ResourceIdentifierManager(models.Manager["ResourceIdentifier"]):
             _identifier.save()
         return _identifier
 
+    def get_or_create_many_for_iris(self, iris: typing.Iterable[str]) -> dict[str, ResourceIdentifier]:
+        '''like `get_or_create_for_iri`, but for many iris in (at most) two queries
+
+        returns a dict mapping each given iri to its identifier (in the order given)
+        '''
+        # may raise if invalid
+        _suffuniq_by_iri: dict[str, str] = {}
+        _new_lists_by_suffuniq: dict[str, tuple[list[str], list[str]]] = {}
+        for _iri in iris:
+            if _iri not in _suffuniq_by_iri:
+                (_suffuniq_iri, _scheme) = get_sufficiently_unique_iri_and_scheme(_iri)
+                _suffuniq_by_iri[_iri] = _suffuniq_iri
+                (_scheme_list, _raw_iri_list) = _new_lists_by_suffuniq.setdefault(_suffuniq_iri, ([], []))
+                if _scheme not in _scheme_list:
+                    _scheme_list.append(_scheme)
+                _raw_iri_list.append(_iri)
+        if not _suffuniq_by_iri:
+            return {}
+        self._upsert_suffuniq_iris(_new_lists_by_suffuniq)
+        _identifier_by_suffuniq = {
+            _identifier.sufficiently_unique_iri: _identifier
+            for _identifier in self.filter(sufficiently_unique_iri__in=_new_lists_by_suffuniq.keys())
+        }
+        return {
+            _iri: _identifier_by_suffuniq[_suffuniq_iri]
+            for _iri, _suffuniq_iri in _suffuniq_by_iri.items()
+        }
+
+    def _upsert_suffuniq_iris(self, new_lists_by_suffuniq: dict[str, tuple[list[str], list[str]]]) -> None:
+        # one `INSERT ... ON CONFLICT` for all identifiers; on conflict, append any
+        # not-yet-seen schemes and raw iris (in order) and skip rows with nothing new
+        _meta = self.model._meta
+        _connection = connections[self.db]
+        _quote = _connection.ops.quote_name
+
+        def _column(field_name: str) -> str:
+            return _quote(_meta.get_field(field_name).column)
+
+        def _merged_array(field_name: str) -> str:
+            return (
+                f'_ri.{_column(field_name)} || ARRAY('
+                f'SELECT _new._item FROM unnest(EXCLUDED.{_column(field_name)})'
+                ' WITH ORDINALITY AS _new(_item, _ordinal)'
+                f' WHERE NOT (_new._item = ANY(_ri.{_column(field_name)}))'
+                ' ORDER BY _new._ordinal)'
+            )
+        _values_sql = ', '.join(['(NOW(), NOW(), %s, %s, %s)'] * len(new_lists_by_suffuniq))
+        _params: list = []
+        # consistent order, to avoid deadlocks between concurrent upserts
+        for _suffuniq_iri in sorted(new_lists_by_suffuniq.keys()):
+            (_scheme_list, _raw_iri_list) = new_lists_by_suffuniq[_suffuniq_iri]
+            _params.extend((_suffuniq_iri, _scheme_list, _raw_iri_list))
+        _sql = (
+            f'INSERT INTO {_quote(_meta.db_table)} AS _ri'
+            f' ({_column("created")}, {_column("modified")}, {_column("sufficiently_unique_iri")},'
+            f' {_column("scheme_list")}, {_column("raw_iri_list")})'
+            f' VALUES {_values_sql}'
+            f' ON CONFLICT ({_column("sufficiently_unique_iri")}) DO UPDATE SET'
+            f' {_column("scheme_list")} = {_merged_array("scheme_list")},'
+            f' {_column("raw_iri_list")} = {_merged_array("raw_iri_list")},'
+            f' {_column("modified")} = NOW()'
+            f' WHERE NOT (_ri.{_column("scheme_list")} @> EXCLUDED.{_column("scheme_list")}'
+            f' AND _ri.{_column("raw_iri_list")} @> EXCLUDED.{_column("raw_iri_list")})'
+        )
+        with _connection.cursor() as _cursor:
+            _cursor.execute(_sql, _params)
+
     def save_equivalent_identifier_set(
         self,
         tripledict: primitive_rdf.RdfTripleDictionary,
         focus_iri: str,
     ) -> list['ResourceIdentifier']:
-        _identifier_set = [self.get_or_create_for_iri(focus_iri)]
-        _identifier_set.extend(
-            self.get_or_create_for_iri(_sameas_iri)
-            for _sameas_iri in tripledict[focus_iri].get(OWL.sameAs, ())
-            if _sameas_iri != focus_iri
-        )
-        return _identifier_set
+        _identifiers_by_iri = self.get_or_create_many_for_iris([
+            focus_iri,
+            *tripledict[focus_iri].get(OWL.sameAs, ()),
+        ])
+        # focus identifier first; each identifier once
+        return list(dict.fromkeys(_identifiers_by_iri.values()))
 
 
 class ResourceIdentifier(models.Model):
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+__all__ = ('StagedRecord',)
+
+
+class StagedRecord(models.Model):
+    '''a metadata record pushed for asynchronous ingest, waiting to be (or already) digested
+
+    (deleted after `DIGESTIVE_TRACT['STAGED_RECORD_KEEP_DAYS']`, with expired data)
+    '''
+    PENDING = 'pending'     # waiting for "task__ingest_staged_record"
+    DIGESTED = 'digested'   # ingested without error
+    ERROR = 'error'         # could not ingest (see error_message)
+    STATUS_CHOICES = (
+        (PENDING, PENDING),
+        (DIGESTED, DIGESTED),
+        (ERROR, ERROR),
+    )
+
+    # auto:
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True)  # for public-api id
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    # required:
+    from_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    focus_iri = models.TextField()
+    record_mediatype = models.TextField()
+    raw_record = models.TextField()  # emptied once digested
+
+    # optional:
+    record_identifier = models.TextField(null=True, blank=True)
+    is_supplementary = models.BooleanField(default=False)
+    expiration_date = models.DateField(null=True, blank=True)
+
+    # digestion:
+    status = models.TextField(choices=STATUS_CHOICES, default=PENDING)
+    error_message = models.TextField(blank=True)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__qualname__}({self.uuid}, "{self.status}")'
+
+    def __str__(self) -> str:
+        return repr(self)
@@ -5,6 +5,7 @@ from primitive_metadata import gather
 from primitive_metadata import primitive_rdf as rdf
 
 from trove import models as trove_db
+from trove.models.resource_description import load_unparsed_turtles
 from trove.util.iris import get_sufficiently_unique_iri
 from trove.vocab import namespaces as ns
 from trove.vocab import static_vocab
@@ -45,11 +46,23 @@ def gather_cards_focused_on(focus: gather.Focus, *, blend_cards: bool) -> Gather
         .select_related('indexcard')
     )
     if blend_cards:
-        for _resource_description in _lrd_qs:
+        _lrds = list(_lrd_qs.prefetch_related('indexcard__trove_supplementaryresourcedescription_set'))
+        # (all turtle in one query, not one per card)
+        load_unparsed_turtles([
+            *_lrds,
+            *(
+                _supplement
+                for _lrd in _lrds
+                for _supplement in _lrd.indexcard.supplementary_description_set.all()
+            ),
+        ])
+        for _resource_description in _lrds:
             yield from rdf.iter_tripleset(_resource_description.as_rdfdoc_with_supplements().tripledict)
             yield (ns.FOAF.isPrimaryTopicOf, _resource_description.indexcard.get_iri())
     else:
-        for _resource_description in _lrd_qs:
+        _lrds = list(_lrd_qs)
+        load_unparsed_turtles(_lrds)  # (one query, not one per card)
+        for _resource_description in _lrds:
             _card_iri = _resource_description.indexcard.get_iri()
             yield (ns.FOAF.isPrimaryTopicOf, _card_iri)
             yield (_card_iri, ns.RDF.type, ns.TROVE.Indexcard)
@@ -10,6 +10,7 @@ from primitive_metadata import primitive_rdf as rdf
 from trove import models as trove_db
 from trove.derive.osfmap_json import _RdfOsfmapJsonldRenderer
 from trove.links import cardsearch_feed_links
+from trove.models.resource_description import load_unparsed_turtles
 from trove.util.iris import get_sufficiently_unique_iri
 from trove.vocab.namespaces import RDF, FOAF, DCTERMS, RDFS, DCAT, TROVE
 from trove.vocab.jsonapi import (
@@ -414,8 +415,10 @@ def _load_cards_and_extracted_rdf_contents(
                 .queryset_for_iris(value_iris)
             ),
         )
+    _resource_descriptions = list(_resource_description_qs)
+    load_unparsed_turtles(_resource_descriptions)  # (one query, not one per card)
     _card_foci: dict[str, IndexcardFocus] = {}
-    for _resource_description in _resource_description_qs:
+    for _resource_description in _resource_descriptions:
         _card = _resource_description.indexcard
         _card_iri = _card.get_iri()
         _quoted_graph = _resource_description.as_quoted_graph()
@@ -463,8 +466,10 @@ def _load_cards_and_derived_contents(
                 .queryset_for_iris(value_iris)
             ),
         )
+    _derived_indexcards = list(_derived_indexcard_qs)
+    trove_db.ContentBlob.objects.load_blobbed_texts(_derived_indexcards, 'derived_text')  # (one query, not one per card)
     _card_foci: dict[str, IndexcardFocus] = {}
-    for _derived in _derived_indexcard_qs:
+    for _derived in _derived_indexcards:
         _card_iri = _derived.upriver_indexcard.get_iri()
         _card_foci[_card_iri] = IndexcardFocus.new(
             iris=_card_iri,
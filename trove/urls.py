@@ -9,7 +9,7 @@ from .views.feeds import (
     CardsearchRssView,
     CardsearchAtomView,
 )
-from .views.ingest import RdfIngestView
+from .views.ingest import IngestStatusView, RdfIngestView
 from .views.indexcard import IndexcardView
 from .views.search import (
     CardsearchView,
@@ -27,6 +27,7 @@ urlpatterns = [
     path('index-card-search/atom.xml', view=CardsearchAtomView.as_view(), name='cardsearch-atom'),
     path('browse', view=BrowseIriView.as_view(), name='browse-iri'),
     path('ingest', view=RdfIngestView.as_view(), name='ingest-rdf'),
+    path('ingest/status/<uuid:staged_record_uuid>', view=IngestStatusView.as_view(), name='ingest-status'),
     path('docs/openapi.json', view=OpenapiJsonView.as_view(), name='docs.openapi-json'),
     path('docs/openapi.html', view=OpenapiHtmlView.as_view(), name='docs.openapi-html'),
     re_path(r'docs/?', view=OpenapiHtmlView.as_view(), name='docs'),
@@ -17,3 +17,22 @@ def iter_unique[T: Hashable](iterable: Iterable[T]) -> Generator[T]:
         if _item not in _seen:
             _seen.add(_item)
             yield _item
+
+
+def iter_chunked[T](iterable: Iterable[T], chunksize: int) -> Generator[list[T]]:
+    '''
+    >>> list(iter_chunked(range(7), 3))
+    [[0, 1, 2], [3, 4, 5], [6]]
+    >>> list(iter_chunked([], 3))
+    []
+    '''
+    if chunksize < 1:
+        raise ValueError(f'chunksize must be positive (got {chunksize})')
+    _chunk: list[T] = []
+    for _item in iterable:
+        _chunk.append(_item)
+        if len(_chunk) >= chunksize:
+            yield _chunk
+            _chunk = []
+    if _chunk:
+        yield _chunk
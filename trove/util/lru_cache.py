@@ -0,0 +1,82 @@
+import collections
+import dataclasses
+from collections.abc import Hashable
+import threading
+
+
+@dataclasses.dataclass
+class SizedLruCache[K: Hashable, V]:
+    '''thread-safe least-recently-used cache, bounded by the total (caller-given) size of values
+
+    >>> _cache = SizedLruCache(max_size=10)
+    >>> _cache.put('a', 'aaaa', size=4)
+    >>> _cache.put('b', 'bbbb', size=4)
+    >>> _cache.get('a')
+    'aaaa'
+    >>> _cache.put('c', 'cccc', size=4)  # evicts least recently used ('b')
+    >>> (_cache.get('b'), _cache.get('c'))
+    (None, 'cccc')
+    >>> _cache.put('d', 'd' * 11, size=11)  # too big; not cached
+    >>> _cache.get('d') is None
+    True
+    >>> (len(_cache), _cache.total_size, _cache.hits, _cache.misses)
+    (2, 8, 2, 2)
+    >>> ('a' in _cache, 'b' in _cache)  # (not counted as hits or misses; not "used")
+    (True, False)
+    >>> _cache.stats()
+    {'count': 2, 'total_size': 8, 'max_size': 10, 'hits': 2, 'misses': 2}
+    '''
+    max_size: int
+    total_size: int = 0
+    hits: int = 0
+    misses: int = 0
+    _items: collections.OrderedDict[K, tuple[V, int]] = dataclasses.field(
+        default_factory=collections.OrderedDict,
+        repr=False,
+    )
+    _lock: threading.Lock = dataclasses.field(default_factory=threading.Lock, repr=False)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            try:
+                (_value, _) = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return _value
+
+    def put(self, key: K, value: V, *, size: int) -> None:
+        if size > self.max_size:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            _replaced = self._items.pop(key, None)
+            if _replaced is not None:
+                self.total_size -= _replaced[1]
+            self._items[key] = (value, size)
+            self.total_size += size
+            while self.total_size > self.max_size:
+                (_, (_, _evicted_size)) = self._items.popitem(last=False)
+                self.total_size -= _evicted_size
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'count': len(self._items),
+                'total_size': self.total_size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.total_size = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._items
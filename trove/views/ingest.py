@@ -1,15 +1,21 @@
 import datetime
 from http import HTTPStatus
+import json
 import logging
+import uuid
 
 from django import http
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
+from django.urls import reverse
 from django.views import View
 
 from share.models.feature_flag import FeatureFlag
 from trove import digestive_tract
 from trove import exceptions as trove_exceptions
+from trove import models as trove_db
 from trove.util.queryparams import parse_booly_str
+from trove.vocab import mediatypes
 if __debug__:
     from share.models import ShareUser
 
@@ -30,6 +36,8 @@ class RdfIngestView(View):
         assert isinstance(request.user, ShareUser)
         if FeatureFlag.objects.flag_is_up(FeatureFlag.FORBID_UNTRUSTED_FEED) and not request.user.is_trusted:
             return http.HttpResponse(status=HTTPStatus.FORBIDDEN)
+        if request.content_type == mediatypes.NDJSON:
+            return self._post_batch(request)
         # TODO: declare/validate params with dataclass
         _focus_iri = request.GET.get('focus_iri')
         if not _focus_iri:
@@ -47,6 +55,36 @@ class RdfIngestView(View):
         try:
             if not request.content_type:
                 raise trove_exceptions.DigestiveError('missing content-type')
+            if parse_booly_str(request.GET.get('async')):
+                _max_size = settings.DIGESTIVE_TRACT['MAX_STAGED_RECORD_SIZE']
+                # check the declared length before reading, and the body as read
+                if (
+                    int(request.headers.get('Content-Length') or 0) > _max_size
+                    or len(request.body) > _max_size
+                ):
+                    return http.HttpResponse(
+                        f'record too large (max {_max_size} bytes)',
+                        status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    )
+                _staged_record = digestive_tract.stage(
+                    raw_record=request.body.decode(encoding='utf-8'),
+                    record_mediatype=request.content_type,
+                    from_user=request.user,
+                    record_identifier=_record_identifier,
+                    focus_iri=_focus_iri,
+                    is_supplementary=(request.GET.get('is_supplementary') is not None),
+                    urgent=(not _nonurgent),
+                    expiration_date=_expiration_date,
+                )
+                _response = http.JsonResponse(
+                    _staged_record_json(_staged_record),
+                    status=HTTPStatus.ACCEPTED,
+                )
+                _response['Location'] = request.build_absolute_uri(reverse(
+                    f'{request.resolver_match.namespace}:ingest-status',
+                    kwargs={'staged_record_uuid': _staged_record.uuid},
+                ))
+                return _response
             digestive_tract.ingest(
                 raw_record=request.body.decode(encoding='utf-8'),
                 record_mediatype=request.content_type,
@@ -64,6 +102,54 @@ class RdfIngestView(View):
         # TODO: include (link to?) extracted card(s)
         return http.HttpResponse(status=HTTPStatus.CREATED)
 
+    def _post_batch(self, request: HttpRequest) -> HttpResponse:
+        '''ingest many records at once, given as newline-delimited json
+
+        each non-empty line is a json object with keys:
+            "focus_iri" (required)
+            "raw_record" (required)
+            "record_mediatype" (default "text/turtle")
+            "record_identifier" (default focus_iri)
+            "is_supplementary" (default false)
+            "expiration_date" (default none; ISO-8601 date format)
+
+        responds with a json object with a status for each line, in order
+        '''
+        assert isinstance(request.user, ShareUser)
+        _max_batch_size = settings.DIGESTIVE_TRACT['MAX_BATCH_SIZE']
+        _parsed_lines: list[tuple[int, digestive_tract.IngestRecord | trove_exceptions.TroveError]] = []
+        # stream lines (rather than load `request.body` all at once)
+        for _line_number, _line in enumerate(request, start=1):
+            if _line.strip():
+                if len(_parsed_lines) >= _max_batch_size:
+                    return http.HttpResponse(
+                        f'too many records (max {_max_batch_size} per request)',
+                        status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    )
+                try:
+                    _parsed_lines.append((_line_number, _parse_batch_line(_line)))
+                except trove_exceptions.DigestiveError as _error:
+                    _parsed_lines.append((_line_number, _error))
+        _outcomes = iter(digestive_tract.ingest_batch(
+            from_user=request.user,
+            records=[
+                _parsed
+                for _, _parsed in _parsed_lines
+                if isinstance(_parsed, digestive_tract.IngestRecord)
+            ],
+            urgent=(not parse_booly_str(request.GET.get('nonurgent'))),
+            restore_deleted=True,
+        ))
+        _results = [
+            (
+                _batch_outcome_json(_line_number, next(_outcomes))
+                if isinstance(_parsed, digestive_tract.IngestRecord)
+                else _batch_error_json(_line_number, _parsed)
+            )
+            for _line_number, _parsed in _parsed_lines
+        ]
+        return http.JsonResponse({'results': _results}, status=HTTPStatus.OK)
+
     def delete(self, request: HttpRequest) -> HttpResponse:
         # TODO: cleaner permissions
         if not request.user.is_authenticated:
@@ -80,3 +166,88 @@ class RdfIngestView(View):
             record_identifier=_record_identifier,
         )
         return http.HttpResponse(status=HTTPStatus.OK)
+
+
+class IngestStatusView(View):
+    def get(self, request: HttpRequest, staged_record_uuid: uuid.UUID) -> HttpResponse:
+        if not request.user.is_authenticated:
+            return http.HttpResponse(status=HTTPStatus.UNAUTHORIZED)
+        try:
+            _staged_record = trove_db.StagedRecord.objects.get(
+                uuid=staged_record_uuid,
+                from_user=request.user,  # only for the user who pushed it
+            )
+        except trove_db.StagedRecord.DoesNotExist:
+            raise http.Http404
+        return http.JsonResponse(_staged_record_json(_staged_record))
+
+
+def _staged_record_json(staged_record: trove_db.StagedRecord) -> dict:
+    return {
+        'id': str(staged_record.uuid),
+        'focus_iri': staged_record.focus_iri,
+        'record_identifier': staged_record.record_identifier,
+        'status': staged_record.status,
+        'error': (staged_record.error_message or None),
+        'created': staged_record.created.isoformat(),
+        'modified': staged_record.modified.isoformat(),
+    }
+
+
+###
+# local helpers for batch ingest
+
+def _parse_batch_line(line: bytes) -> digestive_tract.IngestRecord:
+    try:
+        _line_json = json.loads(line)
+    except ValueError:
+        raise trove_exceptions.DigestiveError('each line must be valid json')
+    if not isinstance(_line_json, dict):
+        raise trove_exceptions.DigestiveError('each line must be a json object')
+    _focus_iri = _line_json.get('focus_iri')
+    if not _focus_iri:
+        raise trove_exceptions.DigestiveError('"focus_iri" required')
+    _raw_record = _line_json.get('raw_record')
+    if not isinstance(_raw_record, str):
+        raise trove_exceptions.DigestiveError('"raw_record" required (as a string)')
+    _expiration_date_str = _line_json.get('expiration_date')
+    _expiration_date = None
+    if _expiration_date_str is not None:
+        try:
+            _expiration_date = datetime.date.fromisoformat(_expiration_date_str)
+        except (TypeError, ValueError):
+            raise trove_exceptions.DigestiveError('"expiration_date" must be in ISO-8601 date format (YYYY-MM-DD)')
+    return digestive_tract.IngestRecord(
+        focus_iri=_focus_iri,
+        raw_record=_raw_record,
+        record_mediatype=_line_json.get('record_mediatype') or mediatypes.TURTLE,
+        record_identifier=_line_json.get('record_identifier'),
+        is_supplementary=bool(_line_json.get('is_supplementary')),
+        expiration_date=_expiration_date,
+    )
+
+
+def _batch_outcome_json(line_number: int, outcome: digestive_tract.IngestOutcome) -> dict:
+    if outcome.error is not None:
+        return _batch_error_json(line_number, outcome.error, record=outcome.record)
+    return {
+        'line': line_number,
+        'focus_iri': outcome.record.focus_iri,
+        'record_identifier': outcome.record.record_identifier,
+        'status': HTTPStatus.CREATED,
+        'indexcard_iris': [_card.get_iri() for _card in outcome.indexcards],
+    }
+
+
+def _batch_error_json(
+    line_number: int,
+    error: trove_exceptions.TroveError,
+    record: digestive_tract.IngestRecord | None = None,
+) -> dict:
+    return {
+        'line': line_number,
+        'focus_iri': (record.focus_iri if record else None),
+        'record_identifier': (record.record_identifier if record else None),
+        'status': HTTPStatus.BAD_REQUEST,
+        'error': str(error),
+    }
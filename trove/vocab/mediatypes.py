@@ -1,6 +1,7 @@
 JSON = 'application/json'
 JSONAPI = 'application/vnd.api+json'
 JSONLD = 'application/ld+json'
+NDJSON = 'application/x-ndjson'
 TURTLE = 'text/turtle'
 HTML = 'text/html'
 TSV = 'text/tab-separated-values'
@@ -13,6 +14,7 @@ _file_extensions = {
     JSON: '.json',
     JSONAPI: '.json',
     JSONLD: '.json',
+    NDJSON: '.ndjson',
     TURTLE: '.turtle',
     HTML: '.html',
     TSV: '.tsv',